@@ -1,14 +1,23 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask_cors import CORS, cross_origin
 from datetime import datetime
 from io import BytesIO
-from .models import db, User, Board, Tag
+from .models import db, User, Board, Tag, board_user_association, board_tag_association
 import uuid
 import boto3
 import base64
 from sqlalchemy import or_
-from .services.notifications import create_notification
+from .services.notifications import create_notifications
+from .services.user_search import typeahead_users, invalidate_collaborators
+from .services.tag_cache import tags as tag_dictionary, invalidate_tags
+from .services.batch import (
+    existing_ids, load_by_ids, parse_ids, insert_associations, remove_associations, sync_associations
+)
+from .services.read_models import (
+    list_member_boards, list_favorite_boards, board_access, board_document_sql, board_document_orm
+)
+from .concurrency import check_version, stale_conflict, touch, with_etag, StaleDataError
 
 board_bp = Blueprint("board", __name__)
 CORS(board_bp)
@@ -18,6 +27,12 @@ s3 = boto3.client("s3")
 BUCKET_NAME = "trainit404"
 
 
+def reset_s3_client():
+    # Los clientes de boto3 no son seguros entre procesos: se recrean en cada worker
+    global s3
+    s3 = boto3.client("s3")
+
+
 #Tambien se puede instalar con
 #pip install python-dotenv
 # Esta función sube una imagen a S3 y devuelve la URL de la imagen
@@ -91,32 +106,25 @@ def create_board():
             is_public=is_public
         )
 
-        # Agregar miembros (si se proporcionan)
-        member_ids = request.form.getlist("member_ids")
-        for uid in member_ids:
-            member = User.query.get(uid)
-            if member:
-                new_board.members.append(member)
-
-        # Agregar tags (si se proporcionan)
-        tag_ids = request.form.getlist("tag_ids")
-        for tid in tag_ids:
-            tag = Tag.query.get(tid)
-            if tag:
-                new_board.tags.append(tag)
-
-        new_board.members.append(user)  # Agregar el creador del tablero como miembro
-
-        general_tag=Tag.query.filter_by(name="General").first()
-        if not general_tag:
-            general_tag = Tag(name="General")
-            db.session.add(general_tag)
-            db.session.flush()
-            
-        new_board.tags.append(general_tag)  # Agregar tag general por defecto
-        # Guardar en la base de datos
         db.session.add(new_board)
+        db.session.flush()  # obtener new_board.id para las tablas pivote
+
+        # Miembros (si se proporcionan) más el creador: se validan en una consulta y se insertan en otra
+        member_ids = existing_ids(db.session, User, request.form.getlist("member_ids"))
+        member_ids = insert_associations(db.session, board_user_association, "board_id", new_board.id,
+                                         "user_id", [user.id, *member_ids])
+
+        # Tags (si se proporcionan) más el tag general por defecto, resueltos desde el diccionario en memoria
+        tag_ids = tag_dictionary.existing_ids(db.session, request.form.getlist("tag_ids"))
+        (general_id,), created = tag_dictionary.ids_for_names(db.session, ["General"])
+        insert_associations(db.session, board_tag_association, "board_id", new_board.id,
+                            "tag_id", [*tag_ids, general_id])
+
+        # Guardar en la base de datos
         db.session.commit()
+        if created:
+            invalidate_tags()
+        invalidate_collaborators(member_ids)
 
         return jsonify(new_board.serialize()), 201
 
@@ -133,11 +141,31 @@ def get_my_boards():
         user=User.query.get(user_id)
         if not user:
             return jsonify({"Error":"Usuario no encontrado"}),404
-        boards=user.boards
-        return jsonify([board.serialize() for board in boards]), 200
+        return jsonify(list_member_boards(db.session, user.id)), 200
     except Exception as error:
         return jsonify({"Error":str(error)}),500
 
+
+def _notify_members_added(actor: User, board: Board, members):
+    # Notificaciones (persistidas, emitidas por pusher y opcional email) en lote; event_id para idempotencia
+    try:
+        create_notifications(
+            db.session,
+            recipients=members,
+            type_="BOARD_MEMBER_ADDED",
+            title="Has sido agregado a un tablero",
+            message=f"{actor.first_name} {actor.last_name} te agregó al tablero '{board.name}'.",
+            resource_kind="board",
+            resource_id=str(board.id),
+            actor_id=str(actor.id),
+            event_base=f"board:{board.id}:member_added",
+            board_id=board.id,
+        )
+    except Exception as notif_err:
+        # No fallamos la operación principal por error en notificación; registramos y seguimos
+        print(f"[Notification Error] {notif_err}")
+
+
 # AÑADIR MIEMBRO A UN TABLERO-------------------------------------------------------------------------------------------------------        
 @board_bp.route("/addMember/<int:board_id>", methods=["POST"])
 @jwt_required()
@@ -169,28 +197,9 @@ def add_member_to_board(board_id):
         # Agrego el miembro al tablero
         board.members.append(member)
         db.session.commit()
+        invalidate_collaborators(m.id for m in board.members)
 
-        # Generar event_id para idempotencia
-        event_id = f"board:{board_id}:member_added:{member.id}"
-
-        # Crear notificación (persistida, emitida por pusher y opcional email)
-        try:
-            create_notification(
-                db.session,
-                user_id=str(member.id),
-                type_="BOARD_MEMBER_ADDED",
-                title="Has sido agregado a un tablero",
-                message=f"{actor.first_name} {actor.last_name} te agregó al tablero '{board.name}'.",
-                resource_kind="board",
-                resource_id=str(board.id),
-                actor_id=str(actor.id),
-                event_id=event_id,
-                user_email=member.email,
-                send_email_also=True
-            )
-        except Exception as notif_err:
-            # No fallamos la operación principal por error en notificación; registramos y seguimos
-            print(f"[Notification Error] {notif_err}")
+        _notify_members_added(actor, board, [member])
 
         return jsonify({"message": "Miembro agregado exitosamente"}), 200
     except Exception as error:
@@ -218,7 +227,36 @@ def get_board_by_id(board_id):
         if not board.is_public and not is_member:
             return jsonify({"Error": "No tienes acceso a este tablero"}), 403
         
-        return jsonify(board.serialize()), 200
+        return with_etag(jsonify(board.serialize()), board), 200
+    except Exception as error:
+        return jsonify({"Error": str(error)}), 500
+
+#OBTENER UN TABLERO COMPLETO (LISTAS, TARJETAS, ETIQUETAS Y MIEMBROS)-----------------------------------------------
+@board_bp.route("/getBoardFull/<int:board_id>", methods=["GET"])
+@jwt_required()
+def get_board_full(board_id):
+    """
+    Devuelve el tablero con sus listas y tarjetas en una sola respuesta.
+    Con ?mode=sql el JSON lo arma PostgreSQL y se envía tal cual, sin pasar por Python.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        access = board_access(db.session, board_id, user_id)
+        if access is None:
+            return jsonify({"Error": "Tablero no encontrado"}), 404
+        if not access:
+            return jsonify({"Error": "No tienes acceso a este tablero"}), 403
+
+        if request.args.get("mode", "").lower() == "sql":
+            raw = board_document_sql(db.session, board_id)
+            if raw is None:  # eliminado después de comprobar el acceso
+                return jsonify({"Error": "Tablero no encontrado"}), 404
+            return Response(raw, status=200, mimetype="application/json")
+
+        board = Board.query.get(board_id)
+        if not board:
+            return jsonify({"Error": "Tablero no encontrado"}), 404
+        return jsonify(board_document_orm(board)), 200
     except Exception as error:
         return jsonify({"Error": str(error)}), 500
 
@@ -253,8 +291,7 @@ def get_favorite_boards():
         user=User.query.get(user_id)
         if not user:
             return jsonify({"Warning":"Usuario no encontrado"}),404
-        favorite_boards=user.favorites
-        return jsonify([board.serialize() for board in favorite_boards]),200
+        return jsonify(list_favorite_boards(db.session, user.id)),200
     except Exception as error:
            return jsonify({"Warning":str(error)}),500
 
@@ -302,7 +339,10 @@ def update_board(board_id):
             print(f"DEBUG: ACCESO DENEGADO - Los IDs no coinciden")
             return jsonify({"Warning": "No tienes permiso para actualizar este tablero"}), 403
 
-
+        # Antes de subir la imagen: si la versión no coincide no tiene sentido procesar nada
+        conflict = check_version(board, Board.serialize, request.form)
+        if conflict:
+            return conflict
 
           # Recibir datos del formulario
         name = request.form.get("name")
@@ -326,27 +366,23 @@ def update_board(board_id):
          # PROCESAR ETIQUETAS 
         tag_names = request.form.getlist("tags")  # Obtener lista de etiquetas
         
-        # Limpiar etiquetas existentes del tablero
-        board.tags.clear()
-        
-        # Agregar nuevas etiquetas
-        for tag_name in tag_names:
-            if tag_name.strip():
-                # Buscar si la etiqueta ya existe
-                tag = Tag.query.filter_by(name=tag_name.strip()).first()
-                if not tag:
-                    # Crear nueva etiqueta si no existe
-                    tag = Tag(name=tag_name.strip())
-                    db.session.add(tag)
-                board.tags.append(tag)
+        # Resolver todas las etiquetas de una vez (las nuevas se crean en la misma consulta)
+        tag_ids, created_tags = tag_dictionary.ids_for_names(db.session, tag_names)
+        added, removed = sync_associations(db.session, board_tag_association, "board_id", board.id, "tag_id", tag_ids)
 
         board.name = name
         board.description = description
         board.is_public = is_public
+        if added or removed:
+            touch(board, "name")
 
         db.session.commit()
-        db.session.commit()
-        return jsonify({"message": "Tablero actualizado exitosamente"}), 200
+        if created_tags:
+            invalidate_tags()
+        response = jsonify({"message": "Tablero actualizado exitosamente", "version": board.version})
+        return with_etag(response, board), 200
+    except StaleDataError:
+        return stale_conflict(db.session, Board, board_id, Board.serialize)
     except Exception as error:
         db.session.rollback()
         return jsonify({"error":str(error)}),500
@@ -373,8 +409,10 @@ def delete_board(board_id):
         # Nota: Sería ideal eliminar la imagen asociada de S3 aquí para no dejar archivos huérfanos.
 
         # 3. Eliminar el tablero de la base de datos
+        member_ids = [m.id for m in board.members]
         db.session.delete(board)
         db.session.commit()
+        invalidate_collaborators(member_ids)
 
         return jsonify({"message": "Tablero eliminado exitosamente"}), 200
 
@@ -397,22 +435,12 @@ def search_users():
                 "message": "Ingrese al menos 2 caracteres para buscar"
             }), 200
 
-        # Buscar por nombre, apellido o email
-        users = User.query.filter(
-            db.or_(
-                User.first_name.ilike(f"%{query}%"),
-                User.last_name.ilike(f"%{query}%"),
-                User.email.ilike(f"%{query}%")
-            )
-        ).limit(10).all()
-
-        # Serializar resultados
-        users_serialized = [{
-            "id": user.id,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "email": user.email
-        } for user in users]
+        # Colaboradores del usuario (índice en memoria); la búsqueda global por trigramas solo si no hay
+        # coincidencias o con ?global=true
+        board_id = request.args.get("boardId", type=int)
+        include_global = request.args.get("global", "false").lower() in ["true", "1", "yes"]
+        users_serialized = typeahead_users(db.session, int(get_jwt_identity()), query, limit=10, board_id=board_id,
+                                           include_global=include_global)
 
         return jsonify({
             "success": True,
@@ -470,9 +498,92 @@ def remove_member_from_board():
 
         board.members.remove(user_to_remove)
         db.session.commit()
+        invalidate_collaborators([user_to_remove.id, *(m.id for m in board.members)])
 
         return jsonify({"message": "Miembro eliminado correctamente"}), 200
 
     except Exception as error:
         db.session.rollback()
         return jsonify({"error": str(error)}), 500
+
+
+# AGREGAR Y QUITAR ETIQUETAS DE UN TABLERO (SOLO LA DIFERENCIA)-------------------------------------------------------
+@board_bp.route("/updateTags/<int:board_id>", methods=["PATCH"])
+@jwt_required()
+def patch_board_tags(board_id):
+    """Body: {"add": [nombres], "remove": [nombres]}. Las etiquetas nuevas se crean; devuelve ids agregados y quitados."""
+    try:
+        user_id = int(get_jwt_identity())
+        data = request.get_json() or {}
+        board = Board.query.get(board_id)
+        if not board:
+            return jsonify({"Warning": "Tablero no encontrado"}), 404
+        if board.user_id != user_id:
+            return jsonify({"Warning": "No tienes permiso para actualizar este tablero"}), 403
+
+        conflict = check_version(board, Board.serialize, data)
+        if conflict:
+            return conflict
+
+        add_ids, created_tags = tag_dictionary.ids_for_names(db.session, data.get("add") or [])
+        remove_ids = [tag["id"] for tag in (tag_dictionary.find(db.session, name) for name in data.get("remove") or []) if tag]
+        remove_ids = [tid for tid in remove_ids if tid not in add_ids]
+
+        removed = remove_associations(db.session, board_tag_association, "board_id", board.id, "tag_id", remove_ids)
+        added = insert_associations(db.session, board_tag_association, "board_id", board.id, "tag_id", add_ids)
+        if added or removed:
+            touch(board, "name")
+
+        db.session.commit()
+        if created_tags:
+            invalidate_tags()
+        response = jsonify({"added": added, "removed": removed, "version": board.version})
+        return with_etag(response, board), 200
+    except StaleDataError:
+        return stale_conflict(db.session, Board, board_id, Board.serialize)
+    except Exception as error:
+        db.session.rollback()
+        return jsonify({"error": str(error)}), 500
+
+
+# AGREGAR Y QUITAR MIEMBROS DE UN TABLERO (SOLO LA DIFERENCIA)--------------------------------------------------------
+@board_bp.route("/updateMembers/<int:board_id>", methods=["PATCH"])
+@jwt_required()
+def patch_board_members(board_id):
+    """Body: {"add": [userIds], "remove": [userIds]}. El propietario no puede quitarse."""
+    try:
+        actor = User.query.get(get_jwt_identity())
+        if not actor:
+            return jsonify({"error": "Usuario no encontrado"}), 404
+        data = request.get_json() or {}
+        board = Board.query.get(board_id)
+        if not board:
+            return jsonify({"error": "Tablero no encontrado"}), 404
+        if board.user_id != actor.id:
+            return jsonify({"error": "No tienes permiso para modificar los miembros de este tablero"}), 403
+
+        conflict = check_version(board, Board.serialize, data)
+        if conflict:
+            return conflict
+
+        add_ids = existing_ids(db.session, User, data.get("add") or [])
+        remove_ids = [uid for uid in parse_ids(data.get("remove") or []) if uid != board.user_id and uid not in add_ids]
+
+        removed = remove_associations(db.session, board_user_association, "board_id", board.id, "user_id", remove_ids)
+        added = insert_associations(db.session, board_user_association, "board_id", board.id, "user_id", add_ids)
+        if added or removed:
+            touch(board, "name")
+
+        db.session.commit()
+        invalidate_collaborators([*removed, *(m.id for m in board.members)])
+
+        for member in load_by_ids(db.session, User, added).values():
+            _notify_members_added(actor, board, [member])
+
+        response = jsonify({"added": added, "removed": removed, "version": board.version})
+        return with_etag(response, board), 200
+    except StaleDataError:
+        return stale_conflict(db.session, Board, board_id, Board.serialize)
+    except Exception as error:
+        db.session.rollback()
+        return jsonify({"error": str(error)}), 500
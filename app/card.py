@@ -2,9 +2,13 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask_cors import CORS, cross_origin
 from datetime import datetime
-from .models import db, Board, Card, User, List
-from .services.notifications import create_notification
+from .models import db, Board, Card, User, List, card_user_association, card_tag_association
+from .services.notifications import create_notifications
 from .services.pusher_client import get_pusher_client
+from .services.tag_cache import tags as tag_dictionary, invalidate_tags
+from .services.batch import load_by_ids, parse_ids, insert_associations, remove_associations, sync_associations
+from .services.read_models import list_board_cards, with_users_map, list_assigned_work, CARD_SORTS
+from .concurrency import check_version, stale_conflict, touch, with_etag, StaleDataError
 import uuid
 from sqlalchemy import func
 
@@ -121,21 +125,19 @@ def create_card():
 
         if responsable_id:
             try:
-                event_id = f"card:{new_card.id}:assigned:{responsable_id}"
                 assignee = User.query.get(responsable_id)
                 if assignee:
-                    create_notification(
+                    create_notifications(
                         db.session,
-                        user_id=str(assignee.id),
+                        recipients=[assignee],
                         type_="CARD_ASSIGNED",
                         title="Te asignaron una tarjeta",
                         message=f"Has sido asignado a la tarjeta '{new_card.title}' en el tablero '{board.name}'.",
                         resource_kind="card",
                         resource_id=str(new_card.id),
                         actor_id=str(user_id),
-                        event_id=event_id,
-                        user_email=assignee.email,
-                        send_email_also=True
+                        event_base=f"card:{new_card.id}:assigned",
+                        board_id=new_card.board_id,
                     )
             except Exception as notif_err:
                 print(f"[Notification Error] {notif_err}")
@@ -148,17 +150,96 @@ def create_card():
 
 
 # MOSTRAR TARJETAS DE UN TABLERO (TODOS)-------------------------------------------------------------------------------------------------------
+def _int_list(value):
+    return [int(v) for v in value.split(",") if v.strip()] if value else None
+
+def _user_param(value, current_user_id):
+    # Acepta un id o "me" para el usuario autenticado
+    if not value:
+        return None
+    return int(current_user_id) if value == "me" else int(value)
+
+def _card_filters_from_args(args, current_user_id):
+    """Lanza ValueError si algún parámetro tiene un formato inválido."""
+    due_from = args.get("dueFrom")
+    due_to = args.get("dueTo")
+    return {
+        "list_ids": _int_list(args.get("listId")),
+        "member_id": _user_param(args.get("memberId"), current_user_id),
+        "responsable_id": _user_param(args.get("responsableId"), current_user_id),
+        "tags": [t.strip() for t in args.getlist("tag") if t.strip()],
+        "priorities": [p for p in (args.get("priority") or "").split(",") if p in ("Baja", "Media", "Alta")],
+        "due_from": datetime.fromisoformat(due_from) if due_from else None,
+        "due_to": datetime.fromisoformat(due_to) if due_to else None,
+        "state": (args.get("state") or "").strip() or None,
+    }
+
 @card_bp.route("/getCards/<int:board_id>", methods=["GET"])
 @jwt_required()
 def get_all_cards(board_id):
+    """
+    Filtros: listId (uno o varios separados por coma), memberId, responsableId (id o "me"),
+    tag (repetible), priority (Baja,Media,Alta), dueFrom / dueTo (ISO), state.
+    Orden: sort=position|dueDate|createdAt|priority|title y order=asc|desc.
+    Con limit (y cursor de la respuesta anterior) se pagina por keyset y la respuesta
+    pasa a ser {"items": [...], "nextCursor": ...}; sin limit devuelve la lista completa.
+    """
     try:
-        all_cards = Card.query.filter_by(board_id = board_id)
-        if not all_cards:
-            return jsonify({"Error": "Tablero no encontrado"}), 404
-        return jsonify([card.serialize() for card in all_cards]), 200
+        # view=compact devuelve solo lo necesario para pintar el tablero
+        compact = request.args.get("view", "").lower() == "compact"
+        # normalize=true envía cada miembro una sola vez en "users" y las tarjetas llevan memberIds
+        normalize = request.args.get("normalize", "false").lower() == "true" and not compact
+
+        sort = request.args.get("sort", "position")
+        if sort not in CARD_SORTS:
+            return jsonify({"error": f"sort inválido, opciones: {', '.join(CARD_SORTS)}"}), 400
+        descending = request.args.get("order", "asc").lower() == "desc"
+        limit = request.args.get("limit", type=int)
+        cursor = request.args.get("cursor")
+        if limit is not None:
+            limit = min(max(limit, 1), 500)
+
+        try:
+            filters = _card_filters_from_args(request.args, get_jwt_identity())
+            cards, next_cursor = list_board_cards(
+                db.session, board_id, compact=compact, normalized=normalize, filters=filters,
+                sort=sort, descending=descending, limit=limit, cursor=cursor,
+            )
+        except ValueError as error:
+            return jsonify({"error": "Parámetros de filtro inválidos", "details": str(error)}), 400
+
+        paginated = limit is not None or cursor is not None
+        if normalize:
+            payload = with_users_map(db.session, cards, "memberIds")
+            if paginated:
+                payload["nextCursor"] = next_cursor
+            return jsonify(payload), 200
+        if paginated:
+            return jsonify({"items": cards, "nextCursor": next_cursor}), 200
+        return jsonify(cards), 200
     except Exception as error:
         return jsonify({"error": "Se ha producido un error al obtener las tarjetas", "details": str(error)}), 500
 
+# MI TRABAJO: TARJETAS Y SUBTAREAS ASIGNADAS EN TODOS LOS TABLEROS-----------------------------------------------------------
+@card_bp.route("/myWork", methods=["GET"])
+@jwt_required()
+def my_work():
+    """
+    Tarjetas donde el usuario es responsable o miembro y subtareas activas a su cargo,
+    ordenadas por fecha límite (las sin fecha al final). Paginado con limit y cursor.
+    """
+    try:
+        limit = min(max(request.args.get("limit", 50, type=int), 1), 200)
+        try:
+            items, next_cursor = list_assigned_work(
+                db.session, int(get_jwt_identity()), limit=limit, cursor=request.args.get("cursor"),
+            )
+        except ValueError as error:
+            return jsonify({"error": "Cursor inválido", "details": str(error)}), 400
+        return jsonify({"items": items, "nextCursor": next_cursor}), 200
+    except Exception as error:
+        return jsonify({"error": "Se ha producido un error al obtener las tareas asignadas", "details": str(error)}), 500
+
 # MOSTRAR TARJETAS POR ID-------------------------------------------------------------------------------------------------------
 @card_bp.route("/getCard/<int:card_id>", methods=["GET"])
 @jwt_required()
@@ -167,7 +248,7 @@ def get_card(card_id):
         card = Card.query.get(card_id)
         if not card:
             return jsonify({"Error": "Tarjeta no encontrada"}), 404
-        return jsonify(card.serialize()), 200
+        return with_etag(jsonify(card.serialize()), card), 200
     except Exception as error:
         return jsonify({"error": "Se ha producido un error al obtener la tarjeta", "details": str(error)}), 500
 
@@ -183,6 +264,10 @@ def update_card(card_id):
         if not card:
             return jsonify({"error": "Tarjeta no encontrada"}), 404
 
+        conflict = check_version(card, Card.serialize, data)
+        if conflict:
+            return conflict
+
         # --- Campos básicos ---
         if "title" in data:
             card.title = data.get("title") or card.title
@@ -246,21 +331,22 @@ def update_card(card_id):
             card.state = state_value
 
         # --- Etiquetas ---
+        created_tags = False
         if "tags" in data:
-            card.tags.clear()
-            for raw in data.get("tags") or []:
-                name = (raw or "").strip()
-                if not name:
-                    continue
-                tag = Tag.query.filter_by(name=name).first()
-                if not tag:
-                    tag = Tag(name=name)
-                    db.session.add(tag)
-                card.tags.append(tag)
+            tag_ids, created_tags = tag_dictionary.ids_for_names(db.session, data.get("tags") or [])
+            added, removed = sync_associations(db.session, card_tag_association, "card_id", card.id, "tag_id", tag_ids)
+            # La tabla pivote se escribe por fuera del ORM: se fuerza el UPDATE para que suba la versión
+            if added or removed:
+                touch(card, "title")
 
         db.session.commit()
-        return jsonify({"message": "Tarjeta actualizada correctamente", "card": card.serialize()}), 200
+        if created_tags:
+            invalidate_tags()
+        response = jsonify({"message": "Tarjeta actualizada correctamente", "card": card.serialize()})
+        return with_etag(response, card), 200
 
+    except StaleDataError:
+        return stale_conflict(db.session, Card, card_id, Card.serialize)
     except Exception as error:
         db.session.rollback()
         try:
@@ -287,57 +373,63 @@ def delete_card(card_id):
         db.session.rollback()
         return jsonify({"error": "Error al eliminar la tarjeta", "details": str(error)}), 500
 
+
+def _notify_members_added(actor: User, card: Card, members):
+    # Una notificación por usuario agregado, con preferencias, inserción y pushes en lote
+    try:
+        create_notifications(
+            db.session,
+            recipients=members,
+            type_="CARD_ASSIGNED",
+            title="Te agregaron a una tarjeta",
+            message=f"{actor.first_name} {actor.last_name} te agregó a la tarjeta '{card.title}' en el tablero '{card.board.name}'.",
+            resource_kind="card",
+            resource_id=str(card.id),
+            actor_id=str(actor.id),
+            event_base=f"card:{card.id}:member_added",
+            board_id=card.board_id,
+        )
+    except Exception as notif_err:
+        print(f"[Notification Error] {notif_err}")
+
+
 # AGREGAR MIEMBROS A UNA TARJETA-------------------------------------------------------------------------------------------------------
 @card_bp.route('/addMembers/<int:card_id>', methods=['POST'])
 @jwt_required()
 def add_memember(card_id):
+    """Agrega uno (userId) o varios (userIds) miembros; devuelve los que se agregaron."""
     try:
         current_user_id=get_jwt_identity()
         user= User.query.get(current_user_id)
         if not user:
             return jsonify({"Warning":"Usuario no encontrado"}),404
 
-        data=request.get_json()
-        user_id=data.get("userId")
-        print(request.data)
-        print(request.get_json())
+        data=request.get_json() or {}
+        requested = parse_ids(data.get("userIds") or [data.get("userId")])
 
-        if not user_id:
+        if not requested:
             return jsonify({"Warning":"Datos incompletos"}),400
 
         card = Card.query.get(card_id)
         if not card:
             return jsonify({"Warning":"Tarjeta no encontrada"}),404
 
-        user_to_add = User.query.get(user_id)
-        if not user_to_add:
+        users = load_by_ids(db.session, User, requested)
+        if not users:
             return jsonify({"Warning":"Usuario no encontrado"}),404
-        if user_to_add in card.members:
-            return jsonify({"Warning":"El usuario ya es miembro de la tarjeta"}),400
 
-        card.members.append(user_to_add)
+        added = insert_associations(db.session, card_user_association, "card_id", card.id, "user_id", list(users))
+        if not added:
+            return jsonify({"Warning":"El usuario ya es miembro de la tarjeta"}),400
         db.session.commit()
 
-        # Crear notificación para el usuario agregado a la tarjeta
-        try:
-            event_id = f"card:{card_id}:member_added:{user_to_add.id}"
-            create_notification(
-                db.session,
-                user_id=str(user_to_add.id),
-                type_="CARD_ASSIGNED",
-                title="Te agregaron a una tarjeta",
-                message=f"{user.first_name} {user.last_name} te agregó a la tarjeta '{card.title}' en el tablero '{card.board.name}'.",
-                resource_kind="card",
-                resource_id=str(card.id),
-                actor_id=str(user.id),
-                event_id=event_id,
-                user_email=user_to_add.email,
-                send_email_also=True
-            )
-        except Exception as notif_err:
-            print(f"[Notification Error] {notif_err}")
+        _notify_members_added(user, card, [users[uid] for uid in added])
 
-        return jsonify({"Message": "Miembro agregado correctamente"}), 200
+        return jsonify({
+            "Message": "Miembro agregado correctamente",
+            "added": added,
+            "notFound": [uid for uid in requested if uid not in users],
+        }), 200
 
     except Exception as error:
         db.session.rollback()
@@ -421,5 +513,97 @@ def move_card(card_id: int):
     return jsonify(card.serialize()), 200
 
 
+# AGREGAR Y QUITAR ETIQUETAS DE UNA TARJETA (SOLO LA DIFERENCIA)-------------------------------------------------------
+@card_bp.route("/updateTags/<int:card_id>", methods=["PATCH"])
+@jwt_required()
+def patch_card_tags(card_id):
+    """Body: {"add": [nombres], "remove": [nombres]}. Las etiquetas nuevas se crean; devuelve ids agregados y quitados."""
+    try:
+        user_id = int(get_jwt_identity())
+        data = request.get_json() or {}
+        card = Card.query.get(card_id)
+        if not card:
+            return jsonify({"error": "Tarjeta no encontrada"}), 404
+
+        board = card.board
+        if not board:
+            return jsonify({"error": "Tablero inválido"}), 400
+
+        # debe ser miembro del tablero
+        if not (board.user_id == user_id or any(m.id == user_id for m in board.members)):
+            return jsonify({"error": "No autorizado"}), 403
+
+        conflict = check_version(card, Card.serialize, data)
+        if conflict:
+            return conflict
+
+        add_ids, created_tags = tag_dictionary.ids_for_names(db.session, data.get("add") or [])
+        remove_ids = [tag["id"] for tag in (tag_dictionary.find(db.session, name) for name in data.get("remove") or []) if tag]
+        remove_ids = [tid for tid in remove_ids if tid not in add_ids]
+
+        removed = remove_associations(db.session, card_tag_association, "card_id", card.id, "tag_id", remove_ids)
+        added = insert_associations(db.session, card_tag_association, "card_id", card.id, "tag_id", add_ids)
+        if added or removed:
+            touch(card, "title")
+
+        db.session.commit()
+        if created_tags:
+            invalidate_tags()
+        response = jsonify({"added": added, "removed": removed, "card": card.serialize()})
+        return with_etag(response, card), 200
+    except StaleDataError:
+        return stale_conflict(db.session, Card, card_id, Card.serialize)
+    except Exception as error:
+        db.session.rollback()
+        return jsonify({"error": "Error al actualizar las etiquetas", "details": str(error)}), 500
+
+
+# AGREGAR Y QUITAR MIEMBROS DE UNA TARJETA (SOLO LA DIFERENCIA)--------------------------------------------------------
+@card_bp.route("/updateMembers/<int:card_id>", methods=["PATCH"])
+@jwt_required()
+def patch_card_members(card_id):
+    """Body: {"add": [userIds], "remove": [userIds]}. Notifica solo a los que realmente se agregaron."""
+    try:
+        actor = User.query.get(get_jwt_identity())
+        if not actor:
+            return jsonify({"error": "Usuario no encontrado"}), 404
+        user_id = actor.id
+        data = request.get_json() or {}
+        card = Card.query.get(card_id)
+        if not card:
+            return jsonify({"error": "Tarjeta no encontrada"}), 404
+
+        board = card.board
+        if not board:
+            return jsonify({"error": "Tablero inválido"}), 400
+
+        # debe ser miembro del tablero
+        if not (board.user_id == user_id or any(m.id == user_id for m in board.members)):
+            return jsonify({"error": "No autorizado"}), 403
+
+        conflict = check_version(card, Card.serialize, data)
+        if conflict:
+            return conflict
+
+        users = load_by_ids(db.session, User, data.get("add") or [])
+        remove_ids = [uid for uid in parse_ids(data.get("remove") or []) if uid not in users]
+
+        removed = remove_associations(db.session, card_user_association, "card_id", card.id, "user_id", remove_ids)
+        added = insert_associations(db.session, card_user_association, "card_id", card.id, "user_id", list(users))
+        if added or removed:
+            touch(card, "title")
+
+        db.session.commit()
+        _notify_members_added(actor, card, [users[uid] for uid in added])
+
+        response = jsonify({"added": added, "removed": removed, "card": card.serialize()})
+        return with_etag(response, card), 200
+    except StaleDataError:
+        return stale_conflict(db.session, Card, card_id, Card.serialize)
+    except Exception as error:
+        db.session.rollback()
+        return jsonify({"error": "Error al actualizar los miembros", "details": str(error)}), 500
+
+
 # NOTA: El endpoint /pusher/auth se movió a main.py en la raíz de la aplicación
 # para coincidir con la configuración del frontend que espera /pusher/auth
@@ -0,0 +1,60 @@
+import click
+from .database import db
+from .config import (
+    COMMENT_RETENTION_DAYS, RETENTION_BATCH_SIZE, RETENTION_PAUSE_SECONDS,
+    NOTIFICATION_PARTITIONS_AHEAD, NOTIFICATION_RETENTION_MONTHS, NOTIFICATION_ARCHIVE,
+)
+from .services.retention import archive_deleted_comments, purge_expired_idempotency_keys
+from .services.partitions import ensure_notification_partitions, apply_notification_retention
+
+
+def register_commands(app):
+    """Comandos de mantenimiento: flask --app app.main <grupo> <comando>."""
+
+    @app.cli.group()
+    def retention():
+        """Archivado y limpieza de datos antiguos."""
+
+    @retention.command("comments")
+    @click.option("--days", default=COMMENT_RETENTION_DAYS, show_default=True,
+                  help="Antigüedad mínima del borrado lógico.")
+    @click.option("--batch-size", default=RETENTION_BATCH_SIZE, show_default=True)
+    @click.option("--pause", default=RETENTION_PAUSE_SECONDS, show_default=True,
+                  help="Segundos de espera entre lotes.")
+    @click.option("--max-batches", default=None, type=int, help="Corta después de N lotes (se retoma luego).")
+    def retention_comments(days, batch_size, pause, max_batches):
+        """Mueve los comentarios eliminados a comments_archive."""
+        total = archive_deleted_comments(db.session, older_than_days=days, batch_size=batch_size,
+                                         pause=pause, max_batches=max_batches, log=click.echo)
+        click.echo(f"✅ {total} comentarios archivados")
+
+    @retention.command("notifications")
+    @click.option("--keep-months", default=NOTIFICATION_RETENTION_MONTHS, show_default=True)
+    @click.option("--archive/--no-archive", default=NOTIFICATION_ARCHIVE, show_default=True,
+                  help="Copiar las notificaciones a notifications_archive antes de borrarlas.")
+    def retention_notifications(keep_months, archive):
+        """Elimina las particiones mensuales de notificaciones vencidas."""
+        summary = apply_notification_retention(db.session, keep_months=keep_months, archive=archive,
+                                               log=click.echo)
+        click.echo(f"✅ {len(summary['dropped'])} particiones eliminadas, {summary['archived']} archivadas, "
+                   f"{summary['purged_default']} borradas de la partición por defecto")
+
+    @retention.command("idempotency-keys")
+    @click.option("--batch-size", default=5000, show_default=True)
+    def retention_idempotency_keys(batch_size):
+        """Borra las respuestas guardadas por Idempotency-Key ya vencidas."""
+        total = purge_expired_idempotency_keys(db.session, batch_size=batch_size, log=click.echo)
+        click.echo(f"✅ {total} claves vencidas borradas")
+
+    @app.cli.group()
+    def partitions():
+        """Mantenimiento de tablas particionadas."""
+
+    @partitions.command("notifications")
+    @click.option("--months-ahead", default=NOTIFICATION_PARTITIONS_AHEAD, show_default=True)
+    def partitions_notifications(months_ahead):
+        """Crea las particiones mensuales que faltan (mes actual y siguientes)."""
+        created = ensure_notification_partitions(db.session, months_ahead=months_ahead, log=click.echo)
+        click.echo(f"✅ {len(created)} particiones creadas")
+
+    return app
@@ -3,8 +3,11 @@ from flask_cors import CORS
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from .models import db, User, Card, Board, Comment
+from sqlalchemy import update
 from sqlalchemy.orm import joinedload
-from .services.notifications import create_notification
+from .services.notifications import create_grouped_notifications
+from .services.read_models import list_card_comments, list_comment_threads, with_users_map
+from .concurrency import check_version, stale_conflict, with_etag, StaleDataError
 
 
 comment_bp = Blueprint("comment", __name__)
@@ -31,6 +34,14 @@ def _user_can_view_card(user_id: int, card: Card) -> bool:
         return True
     return any(m.id == user_id for m in board.members)
 
+def _adjust_comment_count(card_id: int, delta: int):
+    """Actualiza cards.comment_count en la misma transacción, con un UPDATE atómico."""
+    db.session.execute(
+        update(Card).where(Card.id == card_id)
+        .values(comment_count=Card.comment_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+
 #Crear comentario
 @comment_bp.route("/create", methods=["POST"])
 @jwt_required()
@@ -65,15 +76,15 @@ def create_comment():
             content=content
         )
         db.session.add(c)
+        _adjust_comment_count(card.id, 1)
         db.session.commit()
 
         try:
-            from .services.notifications import create_notification
-
             preview = (content[:50] + "…") if len(content) > 50 else content
             actor = c.user 
             actor_name = f"{actor.first_name} {actor.last_name}".strip() if actor else "Alguien"
 
+            # Ráfagas de comentarios se agrupan en una sola notificación por destinatario
             if not parent_id:
                 recipient_ids = set()
 
@@ -87,36 +98,35 @@ def create_comment():
 
                 recipient_ids.discard(int(user_id))
 
-                for rid in recipient_ids:
-                    event_id = f"card:{card.id}:comment:{c.id}:to:{rid}"  
-                    create_notification(
-                        db.session,
-                        user_id=str(rid),
-                        type_="COMMENT_NEW",
-                        title="Nuevo comentario en una tarjeta",
-                        message=f"{actor_name} comentó en '{card.title}': {preview}",
-                        resource_kind="card",
-                        resource_id=str(card.id),
-                        actor_id=str(user_id),
-                        event_id=event_id,
-                        user_email=None,
-                        send_email_also=False,
-                    )
+                create_grouped_notifications(
+                    db.session,
+                    recipient_ids=recipient_ids,
+                    type_="COMMENT_NEW",
+                    group_key=f"card:{card.id}:COMMENT_NEW",
+                    title="Nuevo comentario en una tarjeta",
+                    message=f"{actor_name} comentó en '{card.title}': {preview}",
+                    grouped_message=f"{actor_name} y {{others}} más comentaron en '{card.title}'",
+                    resource_kind="card",
+                    resource_id=str(card.id),
+                    actor_id=str(user_id),
+                    event_id=f"card:{card.id}:comment:{c.id}",
+                    board_id=card.board_id,
+                )
             else:
                 if parent and int(parent.user_id) != int(user_id):
-                    event_id = f"card:{card.id}:comment:{parent.id}:reply:{c.id}:to:{parent.user_id}"
-                    create_notification(
+                    create_grouped_notifications(
                         db.session,
-                        user_id=str(parent.user_id),
+                        recipient_ids=[parent.user_id],
                         type_="COMMENT_REPLY",
+                        group_key=f"comment:{parent.id}:COMMENT_REPLY",
                         title="Nueva respuesta a tu comentario",
                         message=f"{actor_name} respondió: {preview}",
+                        grouped_message=f"{actor_name} y {{others}} más respondieron a tu comentario",
                         resource_kind="card",
                         resource_id=str(card.id),
                         actor_id=str(user_id),
-                        event_id=event_id,
-                        user_email=None,
-                        send_email_also=False,
+                        event_id=f"card:{card.id}:comment:{parent.id}:reply:{c.id}",
+                        board_id=card.board_id,
                     )
         except Exception as notif_err:
             current_app.logger.exception(f"[comments] notify failed (non-blocking): {notif_err}")
@@ -140,6 +150,7 @@ def list_comments():
 
         card_id = request.args.get("cardId", type=int)
         include_deleted = request.args.get("include_deleted", "false").lower() == "true"
+        normalize = request.args.get("normalize", "false").lower() == "true"
         limit  = request.args.get("limit", 100, type=int)
         offset = request.args.get("offset", 0, type=int)
 
@@ -153,24 +164,30 @@ def list_comments():
         if not _user_can_view_card(uid, card):
             return jsonify({"error": "No tienes acceso a esta tarjeta"}), 403
 
-        q = (Comment.query
-             .options(joinedload(Comment.user))   
-             .filter(Comment.card_id == card_id))
-
-        if not include_deleted:
-            q = q.filter(Comment.deleted_at.is_(None))
-
-        q = q.order_by(Comment.created_at.asc())
-
-        total = q.count()
-        rows = q.limit(limit).offset(offset).all()
-
-        payload = [c.serialize(include_deleted_content=include_deleted) for c in rows]
-
-        return jsonify({
+        # mode=tree: comentarios raíz paginados por cursor, cada uno con sus respuestas anidadas
+        if request.args.get("mode", "").lower() == "tree":
+            try:
+                tree, nodes, next_cursor = list_comment_threads(
+                    db.session, card_id, include_deleted=include_deleted,
+                    limit=min(max(limit, 1), 100), cursor=request.args.get("cursor"), normalized=normalize,
+                )
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            response = {"items": tree, "nextCursor": next_cursor, "meta": {"commentCount": card.comment_count}}
+            if normalize:
+                response["users"] = with_users_map(db.session, nodes, "userId")["users"]
+            return jsonify(response), 200
+
+        payload, total = list_card_comments(db.session, card_id, include_deleted=include_deleted,
+                                            limit=limit, offset=offset, normalized=normalize)
+
+        response = {
             "items": payload,
             "meta": {"total": total, "limit": limit, "offset": offset}
-        }), 200
+        }
+        if normalize:
+            response["users"] = with_users_map(db.session, payload, "userId")["users"]
+        return jsonify(response), 200
 
     except Exception as e:
         current_app.logger.exception(f"[comments] list failed: {e}")
@@ -198,13 +215,19 @@ def update_comment(comment_id: int):
         if not content:
             return jsonify({"error": "content requerido"}), 400
 
+        conflict = check_version(comment, Comment.serialize, data)
+        if conflict:
+            return conflict
+
         comment.content = content
         comment.is_edited = True
         comment.updated_at = datetime.utcnow()
         db.session.commit()
 
-        return jsonify(comment.serialize()), 200
+        return with_etag(jsonify(comment.serialize()), comment), 200
 
+    except StaleDataError:
+        return stale_conflict(db.session, Comment, comment_id, Comment.serialize)
     except Exception as e:
         db.session.rollback()
         current_app.logger.exception(f"[comments] update failed: {e}")
@@ -226,6 +249,7 @@ def soft_delete_comment(comment_id: int):
         if not comment.deleted_at:
             comment.deleted_at = datetime.utcnow()
             comment.deleted_by = user_id
+            _adjust_comment_count(comment.card_id, -1)
             db.session.commit()
 
         return jsonify({"message": "Comentario eliminado"}), 200
@@ -252,6 +276,7 @@ def restore_comment(comment_id: int):
         if comment.deleted_at:
             comment.deleted_at = None
             comment.deleted_by = None
+            _adjust_comment_count(comment.card_id, 1)
             db.session.commit()
 
         return jsonify({"message": "Comentario restaurado"}), 200
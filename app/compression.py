@@ -0,0 +1,55 @@
+import gzip
+from flask import request
+from .config import COMPRESS_MIN_SIZE, COMPRESS_GZIP_LEVEL, COMPRESS_BROTLI_QUALITY
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se ofrece gzip
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/html", "text/plain", "text/css", "application/javascript"}
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def init_compression(app):
+    """
+    Comprime con brotli o gzip las respuestas que superan COMPRESS_MIN_SIZE bytes.
+    Respuestas chicas no se comprimen: el costo de CPU no compensa el ahorro.
+    """
+
+    @app.after_request
+    def compress_response(response):
+        if (response.direct_passthrough
+                or response.is_streamed
+                or "Content-Encoding" in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or response.status_code < 200 or response.status_code == 204):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        if response.content_length is None or response.content_length < COMPRESS_MIN_SIZE:
+            return response
+
+        encoding = _choose_encoding()
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if encoding == "br":
+            compressed = brotli.compress(data, quality=COMPRESS_BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(data, compresslevel=COMPRESS_GZIP_LEVEL)
+
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    return app
@@ -0,0 +1,91 @@
+"""
+Control de concurrencia optimista.
+
+Card, Board, Subtask y Comment tienen una columna `version` (version_id_col de SQLAlchemy): cada
+UPDATE del ORM la incrementa e incluye `WHERE version = <leída>`, así dos ediciones simultáneas
+no se pisan. El cliente envía la versión que editó en If-Match (o en el campo "version") y recibe
+la nueva en la respuesta y en ETag. Si no coincide se responde 409 con el estado actual.
+"""
+from flask import request, jsonify
+from sqlalchemy.orm.attributes import flag_modified
+from sqlalchemy.orm.exc import StaleDataError
+
+__all__ = ["expected_version", "version_conflict", "check_version", "stale_conflict", "touch", "with_etag",
+           "StaleDataError"]
+
+
+def etag_for(obj) -> str:
+    return f'"{obj.version}"'
+
+
+def expected_version(data: dict | None = None) -> int | None:
+    """Versión que el cliente dice haber editado: If-Match ("3", W/"3" o 3) o el campo version."""
+    header = (request.headers.get("If-Match") or "").strip()
+    if header and header != "*":
+        value = header.split(",")[0].strip()
+        if value.startswith("W/"):
+            value = value[2:]
+        value = value.strip('"')
+        if value.isdigit():
+            return int(value)
+        raise ValueError("If-Match inválido")
+
+    raw = (data or {}).get("version")
+    if raw is None or raw == "":
+        return None
+    try:
+        return int(raw)
+    except (TypeError, ValueError) as error:
+        raise ValueError("version inválida") from error
+
+
+def version_conflict(current: dict, version: int):
+    """409 con el estado actual para que el cliente resuelva sin volver a pedirlo."""
+    response = jsonify({
+        "error": "El recurso fue modificado por otra persona",
+        "code": "VERSION_CONFLICT",
+        "currentVersion": version,
+        "current": current,
+    })
+    response.status_code = 409
+    response.headers["ETag"] = f'"{version}"'
+    return response
+
+
+def check_version(obj, serialize, data: dict | None = None):
+    """
+    Devuelve una respuesta (400 o 409) si la versión esperada no es la actual, o None para seguir.
+    Sin If-Match ni version la edición se acepta (compatibilidad con clientes anteriores).
+    """
+    try:
+        expected = expected_version(data)
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+    if expected is not None and expected != obj.version:
+        return version_conflict(serialize(obj), obj.version)
+    return None
+
+
+def touch(obj, attribute: str):
+    """
+    Fuerza el UPDATE (y el incremento de versión) aunque solo cambien tablas pivote,
+    que se escriben por fuera del ORM.
+    """
+    flag_modified(obj, attribute)
+
+
+def with_etag(response, obj):
+    response.headers["ETag"] = etag_for(obj)
+    return response
+
+
+def stale_conflict(session, model, pk, serialize):
+    """
+    El UPDATE no encontró la versión leída (StaleDataError al hacer commit): otro request ganó
+    entre la lectura y la escritura. Se descarta la transacción y se responde con el estado nuevo.
+    """
+    session.rollback()
+    current = session.get(model, pk)
+    if current is None:
+        return jsonify({"error": "El recurso ya no existe"}), 404
+    return version_conflict(serialize(current), current.version)
@@ -18,4 +18,65 @@ DEBUG = os.getenv("DEBUG", "True").lower() in ["true", "1", "yes"]
 PUSHER_APP_ID = os.getenv("PUSHER_APP_ID")
 PUSHER_KEY = os.getenv("PUSHER_KEY")
 PUSHER_SECRET = os.getenv("PUSHER_SECRET")
-PUSHER_CLUSTER = os.getenv("PUSHER_CLUSTER")
\ No newline at end of file
+PUSHER_CLUSTER = os.getenv("PUSHER_CLUSTER")
+
+# Compresión de respuestas (bytes mínimos para comprimir y nivel de cada algoritmo)
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+
+# Autocompletado de usuarios: cantidad de índices de colaboradores en memoria y su vigencia (segundos)
+TYPEAHEAD_CACHE_SIZE = int(os.getenv("TYPEAHEAD_CACHE_SIZE", "2048"))
+TYPEAHEAD_CACHE_TTL = int(os.getenv("TYPEAHEAD_CACHE_TTL", "300"))
+
+# Diccionario de etiquetas en memoria: vigencia máxima (segundos) antes de recargar desde la base
+TAG_CACHE_TTL = int(os.getenv("TAG_CACHE_TTL", "60"))
+# Cada cuántos segundos se compara la versión local con la compartida (cambios hechos en otros workers)
+TAG_VERSION_CHECK_INTERVAL = float(os.getenv("TAG_VERSION_CHECK_INTERVAL", "1"))
+
+# Retención de comentarios eliminados: antigüedad mínima (días) y tamaño/pausa de cada lote
+COMMENT_RETENTION_DAYS = int(os.getenv("COMMENT_RETENTION_DAYS", "90"))
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "500"))
+RETENTION_PAUSE_SECONDS = float(os.getenv("RETENTION_PAUSE_SECONDS", "0.5"))
+
+# Notificaciones particionadas por mes: particiones a crear por adelantado, meses que se conservan
+# y si las notificaciones vencidas se copian a notifications_archive antes de borrarlas
+NOTIFICATION_PARTITIONS_AHEAD = int(os.getenv("NOTIFICATION_PARTITIONS_AHEAD", "3"))
+NOTIFICATION_RETENTION_MONTHS = int(os.getenv("NOTIFICATION_RETENTION_MONTHS", "6"))
+NOTIFICATION_ARCHIVE = os.getenv("NOTIFICATION_ARCHIVE", "True").lower() in ["true", "1", "yes"]
+
+# Agrupación de notificaciones: ventana (segundos) en la que eventos iguales se suman a la misma
+# notificación no leída y tiempo mínimo entre pushes de una misma notificación agrupada
+NOTIFICATION_GROUP_WINDOW = int(os.getenv("NOTIFICATION_GROUP_WINDOW", "600"))
+NOTIFICATION_PUSH_DEBOUNCE = float(os.getenv("NOTIFICATION_PUSH_DEBOUNCE", "5"))
+
+# Idempotency-Key: vigencia (segundos) de las respuestas guardadas y tamaño máximo de cuerpo a guardar
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_MAX_BODY = int(os.getenv("IDEMPOTENCY_MAX_BODY", "262144"))
+
+# Réplicas de lectura (URLs separadas por coma) y segundos que un usuario lee del primario tras escribir
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+
+# Log de SQL en stdout (solo para depurar: cada sentencia se imprime y eso es lento)
+SQLALCHEMY_ECHO = os.getenv("SQLALCHEMY_ECHO", "False").lower() in ["true", "1", "yes"]
+
+# Consultas por solicitud: umbrales (ms / cantidad) para registrar en el log y cabecera Server-Timing
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+REQUEST_QUERY_COUNT_WARN = int(os.getenv("REQUEST_QUERY_COUNT_WARN", "50"))
+REQUEST_DB_TIME_WARN_MS = float(os.getenv("REQUEST_DB_TIME_WARN_MS", "500"))
+SERVER_TIMING = os.getenv("SERVER_TIMING", "True").lower() in ["true", "1", "yes"]
+
+# /metrics: si se define, se exige "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+# Directorio compartido por los workers de gunicorn para agregar las métricas entre procesos (vacío:
+# cada proceso expone las suyas) y cada cuántos segundos vuelca cada worker su estado
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+# Perfilador por muestreo: token de la cabecera X-Profile, fracción de solicitudes perfiladas al azar,
+# intervalo entre muestras (segundos) y pilas distintas guardadas por endpoint
+PROFILER_TOKEN = os.getenv("PROFILER_TOKEN")
+PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", "0"))
+PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL", "0.005"))
+PROFILER_MAX_STACKS = int(os.getenv("PROFILER_MAX_STACKS", "2000"))
@@ -0,0 +1,201 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from flask import request, g, current_app, jsonify, Response
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from sqlalchemy import text, bindparam
+from sqlalchemy.dialects.postgresql import JSONB
+from .database import db
+from .config import IDEMPOTENCY_TTL, IDEMPOTENCY_MAX_BODY
+
+IDEMPOTENT_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+# Cabeceras de la respuesta original que se repiten en los reintentos (además del Content-Type)
+REPLAYED_HEADERS = ("ETag", "Location", "Last-Modified")
+FORM_MIMETYPES = {"multipart/form-data", "application/x-www-form-urlencoded"}
+# status_code de una clave cuyo handler terminó pero cuya respuesta no se pudo guardar
+COMPLETED_UNKNOWN = 0
+
+# Reclama la clave: inserta una fila "pendiente" o reutiliza una vencida. Si devuelve fila,
+# esta solicitud es la dueña de la clave y ejecuta el handler.
+CLAIM_SQL = text("""
+    INSERT INTO idempotency_keys (scope, key, fingerprint, method, path, created_at, expires_at)
+    VALUES (:scope, :key, :fingerprint, :method, :path, :now, :expires_at)
+    ON CONFLICT (scope, key) DO UPDATE
+        SET fingerprint = EXCLUDED.fingerprint, method = EXCLUDED.method, path = EXCLUDED.path,
+            status_code = NULL, response_body = NULL, content_type = NULL, response_headers = NULL,
+            created_at = EXCLUDED.created_at, expires_at = EXCLUDED.expires_at
+        WHERE idempotency_keys.expires_at < :now
+    RETURNING key
+""")
+
+LOOKUP_SQL = text("""
+    SELECT fingerprint, status_code, response_body, content_type, response_headers
+    FROM idempotency_keys WHERE scope = :scope AND key = :key
+""")
+
+COMPLETE_SQL = text("""
+    UPDATE idempotency_keys
+    SET status_code = :status_code, response_body = :body, content_type = :content_type,
+        response_headers = :headers
+    WHERE scope = :scope AND key = :key
+""").bindparams(bindparam("headers", type_=JSONB))
+
+COMPLETE_UNKNOWN_SQL = text(f"""
+    UPDATE idempotency_keys SET status_code = {COMPLETED_UNKNOWN}
+    WHERE scope = :scope AND key = :key AND status_code IS NULL
+""")
+
+RELEASE_SQL = text("DELETE FROM idempotency_keys WHERE scope = :scope AND key = :key AND status_code IS NULL")
+
+
+def _scope() -> str:
+    # Las claves son por usuario: dos usuarios pueden generar la misma sin pisarse
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        identity = None
+    if identity is not None:
+        return f"user:{identity}"
+    auth = request.headers.get("Authorization", "")
+    return "anon:" + hashlib.sha256(auth.encode("utf-8")).hexdigest()[:32]
+
+
+def _file_digest(storage) -> bytes:
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: storage.stream.read(65536), b""):
+        digest.update(chunk)
+    storage.stream.seek(0)  # el handler vuelve a leer el archivo
+    return digest.digest()
+
+
+def _fingerprint() -> str:
+    # Se hashea la forma canónica del cuerpo y no los bytes: el boundary de un multipart cambia cada
+    # vez que el cliente rearma el FormData, y un JSON puede llegar con otro orden de claves
+    digest = hashlib.sha256()
+    digest.update(request.method.encode("ascii"))
+    digest.update(b"\0" + request.full_path.encode("utf-8"))
+    if request.mimetype in FORM_MIMETYPES:
+        for name, value in sorted(request.form.items(multi=True)):
+            digest.update(f"\0field:{name}={value}".encode("utf-8"))
+        files = sorted(request.files.items(multi=True), key=lambda item: (item[0], item[1].filename or ""))
+        for name, storage in files:
+            digest.update(f"\0file:{name}:{storage.filename or ''}:".encode("utf-8") + _file_digest(storage))
+        return digest.hexdigest()
+
+    body = request.get_json(silent=True) if request.is_json else None
+    if body is not None:
+        digest.update(b"\0" + json.dumps(body, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    else:
+        digest.update(b"\0" + request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def _execute(statement, params):
+    # Conexión propia y en autocommit: el estado de la clave no depende de la transacción del handler
+    with db.engine.begin() as conn:
+        return conn.execute(statement, params)
+
+
+def _release():
+    claim = g.pop("idempotency_claim", None)
+    if claim:
+        _execute(RELEASE_SQL, claim)
+
+
+def init_idempotency(app):
+    """
+    Soporte de la cabecera Idempotency-Key en POST/PUT/PATCH/DELETE. La primera solicitud con una
+    clave ejecuta el handler y su respuesta (< 500) se guarda por IDEMPOTENCY_TTL segundos; los
+    reintentos con la misma clave y el mismo cuerpo reciben esa respuesta (con las REPLAYED_HEADERS
+    originales) sin volver a ejecutarlo.
+    Misma clave con otra solicitud: 422. Mientras la primera sigue en curso: 409. Si la respuesta no
+    se puede guardar (muy grande o falla la BD) la clave queda completada sin respuesta y los
+    reintentos reciben 409 en vez de ejecutar el handler otra vez.
+    Registrar después de init_query_stats e init_metrics: así las respuestas repetidas también se miden.
+    """
+
+    @app.before_request
+    def claim_idempotency_key():
+        key = request.headers.get("Idempotency-Key")
+        if not key or request.method not in IDEMPOTENT_METHODS:
+            return None
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({"error": f"Idempotency-Key admite hasta {MAX_KEY_LENGTH} caracteres"}), 400
+
+        now = datetime.utcnow()
+        params = {"scope": _scope(), "key": key}
+        fingerprint = _fingerprint()
+        claimed = _execute(CLAIM_SQL, {
+            **params, "fingerprint": fingerprint, "method": request.method, "path": request.path,
+            "now": now, "expires_at": now + timedelta(seconds=IDEMPOTENCY_TTL),
+        }).first()
+        if claimed:
+            g.idempotency_claim = params
+            return None
+
+        stored = _execute(LOOKUP_SQL, params).first()
+        if stored is None:  # vencida y borrada entre ambas consultas: se ejecuta sin caché
+            return None
+        if stored.fingerprint != fingerprint:
+            return jsonify({"error": "La Idempotency-Key ya se usó con otra solicitud"}), 422
+        if stored.status_code is None:
+            response = jsonify({"error": "Hay una solicitud en curso con esta Idempotency-Key"})
+            response.status_code = 409
+            response.headers["Retry-After"] = "1"
+            return response
+        if stored.status_code == COMPLETED_UNKNOWN:
+            return jsonify({"error": "La solicitud con esta Idempotency-Key ya se procesó, "
+                                     "pero su respuesta no está disponible"}), 409
+
+        response = Response(bytes(stored.response_body or b""), status=stored.status_code,
+                            content_type=stored.content_type)
+        for name, value in (stored.response_headers or {}).items():
+            response.headers[name] = value
+        response.headers["Idempotent-Replayed"] = "true"
+        return response
+
+    @app.after_request
+    def store_idempotent_response(response):
+        claim = g.get("idempotency_claim")
+        if not claim:
+            return response
+        if response.status_code >= 500:
+            # Error del servidor: el handler deshizo su transacción y el reintento debe ejecutarse
+            try:
+                _release()
+            except Exception as e:
+                current_app.logger.exception(f"[idempotency] failed to release key: {e}")
+            return response
+
+        # Desde acá la clave no se libera nunca: el handler pudo haber confirmado sus cambios y un
+        # reintento que vuelva a ejecutarlo duplicaría el efecto
+        g.pop("idempotency_claim", None)
+        try:
+            storable = not response.direct_passthrough and not response.is_streamed
+            body = response.get_data() if storable else b""
+            if storable and len(body) <= IDEMPOTENCY_MAX_BODY:
+                headers = {name: response.headers[name] for name in REPLAYED_HEADERS if name in response.headers}
+                _execute(COMPLETE_SQL, {**claim, "status_code": response.status_code, "body": body,
+                                        "content_type": response.content_type, "headers": headers or None})
+                return response
+        except Exception as e:
+            current_app.logger.exception(f"[idempotency] failed to store response: {e}")
+        try:
+            _execute(COMPLETE_UNKNOWN_SQL, claim)
+        except Exception as e:
+            # La fila queda "en curso" hasta vencer: los reintentos reciben 409, no una segunda ejecución
+            current_app.logger.exception(f"[idempotency] failed to mark key as completed: {e}")
+        return response
+
+    @app.teardown_request
+    def release_idempotency_key(error=None):
+        # Si el handler lanzó una excepción after_request no guardó nada: se libera la clave
+        if g.get("idempotency_claim"):
+            try:
+                _release()
+            except Exception as e:
+                current_app.logger.exception(f"[idempotency] failed to release key: {e}")
+
+    return app
@@ -16,19 +16,35 @@ from datetime import timedelta
 from .subtask import subtask_bp
 from .comment import comment_bp
 from .list import list_bp
+from .search import search_bp
+from .json_provider import FastJSONProvider
+from .compression import init_compression
+from .idempotency import init_idempotency
+from .replicas import init_replicas, STICKY_HEADER
+from .query_stats import init_query_stats
+from .metrics import init_metrics
+from .profiler import init_profiler
+from .commands import register_commands
 from . import models 
 import os
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 
 # Configuración de la base de datos
 app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URL
 app.config["DEBUG"] = DEBUG
 
-CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
+CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True, expose_headers=[STICKY_HEADER])
 initialize_database(app)
+init_compression(app)
+init_replicas(app)
+init_query_stats(app)
+init_metrics(app)
+init_idempotency(app)  # después de métricas: sus before_request deben correr también en las respuestas repetidas
 
 migrate = Migrate(app, db)
+register_commands(app)
 
 
 # Configuración de JWT
@@ -60,6 +76,8 @@ app.register_blueprint(realtime_bp, url_prefix="/realtime")
 app.register_blueprint(subtask_bp, url_prefix="/subtask")
 app.register_blueprint(comment_bp, url_prefix="/comment")
 app.register_blueprint(list_bp, url_prefix="/list")
+app.register_blueprint(search_bp, url_prefix="/search")
+init_profiler(app)
 # Pusher Auth endpoint
 
 @app.route("/pusher/auth", methods=["POST"])
@@ -114,7 +132,7 @@ def test_notification():
             message=data.get("message", "Esto es un test"),
             send_email_also=False
         )
-    return {"status": "ok", "notif_id": notif.id}
+    return {"status": "ok", "notif_id": notif.id if notif else None}
 
 #---------------------------------------------------------------------------------------------------------------------------------
 
@@ -138,4 +156,5 @@ def get_messages():
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    # Servidor de desarrollo. En producción usar gunicorn (ver gunicorn.conf.py)
+    app.run(host="0.0.0.0", port=int(os.getenv("PORT", "5000")), debug=DEBUG)
@@ -0,0 +1,404 @@
+"""
+Métricas en memoria con exposición en formato de texto de Prometheus (GET /metrics).
+
+Contadores e histogramas escriben en un fragmento por hilo, sin locks: cada hilo solo toca su
+propio diccionario y /metrics suma los fragmentos al leer. Los gauges se calculan al momento de
+leer (pool de la BD).
+
+Con gunicorn cada scrape llega a un worker cualquiera, así que con METRICS_DIR configurado los
+valores se agregan entre procesos (como el modo multiproceso de prometheus_client): cada worker
+vuelca su estado a METRICS_DIR/worker_<pid>_<id>.json cada METRICS_FLUSH_SECONDS y al salir, y
+/metrics suma el estado en vivo del worker que atiende, los archivos de los demás y dead.json, donde
+el maestro acumula contadores e histogramas de los workers que terminaron (child_exit). Así los
+totales no retroceden cuando max_requests recicla un worker y no hay una serie nueva por pid.
+"""
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from flask import request, g, current_app, Response, jsonify
+from .config import METRICS_TOKEN, METRICS_DIR, METRICS_FLUSH_SECONDS
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def _format_labels(names, values, extra=None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Sharded:
+    """Base de las métricas escritas por varios hilos: un dict por hilo, sumados al exponer."""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "values", None)
+        if shard is None:
+            shard = self._local.values = {}
+            with self._shards_lock:  # solo la primera vez de cada hilo
+                self._shards.append(shard)
+        return shard
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def _snapshot(self) -> list[dict]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [dict(shard) for shard in shards]
+
+
+class Counter(_Sharded):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def state(self) -> dict:
+        totals = {}
+        for shard in self._snapshot():
+            for key, value in shard.items():
+                self.merge(totals, key, value)
+        return totals
+
+    @staticmethod
+    def merge(totals: dict, key: tuple, value):
+        totals[key] = totals.get(key, 0) + value
+
+    def render(self, totals: dict) -> list[str]:
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+                for key, value in sorted(totals.items())]
+
+
+class Histogram(_Sharded):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        entry = shard.get(key)
+        if entry is None:
+            # [conteo por bucket (+Inf al final), suma, cantidad]
+            entry = shard[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def state(self) -> dict:
+        totals = {}
+        for shard in self._snapshot():
+            for key, entry in shard.items():
+                self.merge(totals, key, entry)
+        return totals
+
+    def merge(self, totals: dict, key: tuple, entry):
+        counts, total, count = entry
+        merged = totals.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0, 0])
+        merged[0] = [a + b for a, b in zip(merged[0], counts)]
+        merged[1] += total
+        merged[2] += count
+
+    def render(self, totals: dict) -> list[str]:
+        lines = []
+        for key, (counts, total, count) in sorted(totals.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+        return lines
+
+
+class Gauge:
+    """Valor calculado al exponer: `callback` devuelve [(labels, valor), ...]."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels, callback):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.callback = callback
+
+    def state(self) -> dict:
+        totals = {}
+        for key, value in self.callback():
+            self.merge(totals, tuple(key), value)
+        return totals
+
+    merge = staticmethod(Counter.merge)  # se suman entre los workers vivos
+
+    def render(self, totals: dict) -> list[str]:
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+                for key, value in sorted(totals.items())]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name, documentation, labels, callback) -> Gauge:
+        return self.register(Gauge(name, documentation, labels, callback))
+
+    def state(self) -> dict:
+        """Estado del proceso, serializable: {nombre: [[labels, valor], ...]}."""
+        snapshot = {}
+        for metric in self._metrics.values():
+            try:
+                snapshot[metric.name] = [[list(key), value] for key, value in metric.state().items()]
+            except Exception:
+                continue  # un gauge roto no debe tirar /metrics
+        return snapshot
+
+    def merge_into(self, totals: dict, snapshot: dict, types=None):
+        """Suma `snapshot` a `totals` ({nombre: {labels: valor}}); `types` filtra por tipo de métrica."""
+        for name, samples in snapshot.items():
+            metric = self._metrics.get(name)
+            if metric is None or (types and metric.type_name not in types):
+                continue
+            merged = totals.setdefault(name, {})
+            for key, value in samples:
+                metric.merge(merged, tuple(key), value)
+
+    def exposition(self, snapshots=()) -> str:
+        totals = {}
+        self.merge_into(totals, self.state())
+        for snapshot in snapshots:
+            self.merge_into(totals, snapshot)
+
+        lines = []
+        for metric in self._metrics.values():
+            if metric.name not in totals:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render(totals[metric.name]))
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# HTTP
+http_requests = registry.counter("http_requests_total", "Solicitudes atendidas", ("endpoint", "method", "status"))
+http_latency = registry.histogram("http_request_duration_seconds", "Duración de las solicitudes", ("endpoint", "method"))
+
+# Base de datos
+db_query_latency = registry.histogram("db_query_duration_seconds", "Duración de cada sentencia SQL", ("host",))
+
+# Servicios externos
+pusher_latency = registry.histogram("pusher_request_duration_seconds", "Llamadas HTTP a Pusher", ("operation",))
+pusher_failures = registry.counter("pusher_failures_total", "Llamadas a Pusher que fallaron", ("operation",))
+email_latency = registry.histogram("email_request_duration_seconds", "Llamadas HTTP a Resend")
+email_failures = registry.counter("email_failures_total", "Envíos de email que fallaron", ("reason",))
+
+# Notificaciones
+notification_fanout = registry.histogram("notification_fanout_recipients", "Destinatarios por evento de notificación",
+                                         ("type",), buckets=SIZE_BUCKETS)
+pusher_batch_size = registry.histogram("pusher_batch_events", "Eventos por envío a Pusher", buckets=SIZE_BUCKETS)
+
+
+# AGREGACIÓN ENTRE WORKERS (METRICS_DIR)----------------------------------------------------------------------------
+DEAD_FILE = "dead.json"
+ACCUMULATED_TYPES = ("counter", "histogram")  # los gauges de un worker que terminó se descartan
+MAX_DEAD_WORKERS = 1000
+
+
+def _write_json(path: str, data):
+    # Escritura atómica: quien lee ve el archivo anterior o el nuevo, nunca uno a medias
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(data, fh)
+    os.replace(tmp, path)
+
+
+def _read_json(path: str):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+class _WorkerSnapshots:
+    """Vuelca el estado del worker a METRICS_DIR; un hilo por proceso, arrancado después del fork."""
+
+    def __init__(self, directory: str, interval: float):
+        self.directory = directory
+        self.interval = interval
+        self._pid = None
+        self._file = None
+        self._app = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self, app):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._app = app
+            # El id evita confundir archivos si el sistema reutiliza un pid
+            self._file = os.path.join(self.directory, f"worker_{self._pid}_{uuid.uuid4().hex[:8]}.json")
+            threading.Thread(target=self._run, name="metrics-flush", daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        if self._pid != os.getpid():
+            return
+        with self._app.app_context():  # los gauges del pool leen db.engines
+            state = registry.state()
+        _write_json(self._file, state)
+
+    def others(self) -> list[dict]:
+        """Estado de los demás workers vivos y de los que ya terminaron."""
+        snapshots = []
+        files = [path for path in glob.glob(os.path.join(self.directory, "worker_*.json")) if path != self._file]
+        read = {}
+        for path in files:
+            data = _read_json(path)  # puede haber desaparecido: entonces ya está en dead.json
+            if data is not None:
+                read[os.path.basename(path)] = data
+        # dead.json se lee al final y dice qué archivos ya incluye: así un worker que termina
+        # mientras se arma la respuesta no se cuenta dos veces ni se pierde
+        dead = _read_json(os.path.join(self.directory, DEAD_FILE)) or {}
+        merged_files = set(dead.get("files", ()))
+        snapshots.extend(data for name, data in read.items() if name not in merged_files)
+        snapshots.append(dead.get("metrics", {}))
+        return snapshots
+
+
+worker_snapshots = _WorkerSnapshots(METRICS_DIR, METRICS_FLUSH_SECONDS) if METRICS_DIR else None
+
+
+def flush_worker_metrics():
+    """Para worker_exit de gunicorn: último volcado antes de que el maestro lo acumule."""
+    if worker_snapshots is not None:
+        worker_snapshots.flush()
+
+
+def mark_process_dead(pid: int):
+    """Para child_exit de gunicorn (en el maestro): pasa contadores e histogramas del worker a dead.json."""
+    if not METRICS_DIR:
+        return
+    dead_path = os.path.join(METRICS_DIR, DEAD_FILE)
+    for path in glob.glob(os.path.join(METRICS_DIR, f"worker_{pid}_*.json")):
+        data = _read_json(path)
+        dead = _read_json(dead_path) or {}
+        totals = {}
+        registry.merge_into(totals, dead.get("metrics", {}))
+        if data is not None:
+            registry.merge_into(totals, data, types=ACCUMULATED_TYPES)
+        files = [*dead.get("files", ()), os.path.basename(path)][-MAX_DEAD_WORKERS:]
+        _write_json(dead_path, {
+            "files": files,
+            "metrics": {name: [[list(key), value] for key, value in samples.items()] for name, samples in totals.items()},
+        })
+        os.remove(path)
+
+
+def reset_metrics_dir():
+    """Para on_starting de gunicorn: los contadores empiezan de cero con cada arranque del servidor."""
+    if not METRICS_DIR:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+        os.remove(path)
+
+
+def _pool_stats(method: str):
+    from .database import db
+
+    def callback():
+        values = []
+        for bind, engine in db.engines.items():
+            pool = engine.pool
+            if hasattr(pool, method):
+                values.append(((bind or "primary",), getattr(pool, method)()))
+        return values
+    return callback
+
+
+def init_metrics(app):
+    # /metrics se sirve dentro de la solicitud, así que db.engines está disponible al leer los gauges
+    registry.gauge("db_pool_size", "Conexiones permanentes del pool", ("bind",), _pool_stats("size"))
+    registry.gauge("db_pool_checked_out", "Conexiones del pool en uso", ("bind",), _pool_stats("checkedout"))
+    registry.gauge("db_pool_overflow", "Conexiones abiertas por encima de pool_size (negativo: libres)",
+                   ("bind",), _pool_stats("overflow"))
+
+    @app.before_request
+    def _start_timer():
+        if worker_snapshots is not None:
+            worker_snapshots.ensure_started(current_app._get_current_object())
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.get("metrics_started")
+        if started is None:
+            return response
+        endpoint = request.endpoint or "unmatched"
+        http_latency.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method)
+        http_requests.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+        return response
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+            return jsonify({"error": "No autorizado"}), 401
+        snapshots = worker_snapshots.others() if worker_snapshots is not None else ()
+        return Response(registry.exposition(snapshots), mimetype="text/plain; version=0.0.4")
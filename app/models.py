@@ -1,7 +1,7 @@
 from .database import db
 from datetime import datetime
 import bcrypt
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR, ARRAY, JSONB
 import uuid
 
 
@@ -20,7 +20,8 @@ board_tag_association = db.Table('board_tag_association',
 #Tabla pivote para declarar relación muchos a muchos entre tarjetas y usuarios'
 card_user_association = db.Table('card_user_association',
     db.Column('card_id', db.Integer, db.ForeignKey('cards.id'), primary_key=True),
-    db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
+    db.Index('ix_card_user_association_user_card', 'user_id', 'card_id'),
 )
 
 #Tabla pivote para declaracion de muchos a muchos entre favoritos y usuarios
@@ -32,7 +33,8 @@ favorite_boards = db.Table('favorite_boards',
 # Agregar esta tabla card y etiquetas para la relación muchos a muchos entre tarjetas y etiquetas:
 card_tag_association = db.Table('card_tag_association',
     db.Column('card_id', db.Integer, db.ForeignKey('cards.id'), primary_key=True),
-    db.Column('tag_id', db.Integer, db.ForeignKey('tags.id'), primary_key=True)
+    db.Column('tag_id', db.Integer, db.ForeignKey('tags.id'), primary_key=True),
+    db.Index('ix_card_tag_association_tag_card', 'tag_id', 'card_id'),
 )
 
 
@@ -41,6 +43,19 @@ class Message(db.Model):
      id = db.Column(db.Integer, primary_key=True)
      content = db.Column(db.String(255), nullable=False)
 
+# Configuración de búsqueda de texto completo. Las columnas search_vector son generadas por
+# PostgreSQL (siempre al día) y las consultas deben usar la misma configuración.
+FTS_CONFIG = "spanish"
+
+def _search_vector(*weighted_columns):
+    parts = [f"setweight(to_tsvector('{FTS_CONFIG}', coalesce({column}, '')), '{weight}')"
+             for column, weight in weighted_columns]
+    return db.deferred(db.Column(TSVECTOR, db.Computed(" || ".join(parts), persisted=True)))
+
+# Texto de búsqueda de usuarios (nombre, apellido y email). Indexado con trigramas (pg_trgm)
+# para que los ILIKE '%q%' del buscador de miembros no recorran toda la tabla.
+USER_SEARCH_SQL = "lower(first_name || ' ' || last_name || ' ' || email)"
+
 class User(db.Model):
     __tablename__ = "users"
     id = db.Column(db.Integer, primary_key=True)
@@ -53,6 +68,10 @@ class User(db.Model):
     boards = db.relationship('Board', secondary='board_user_association', back_populates='members')
     favorites = db.relationship('Board', secondary='favorite_boards', backref='favorited_by')
 
+    __table_args__ = (
+        db.Index("ix_users_search_trgm", db.text(f"({USER_SEARCH_SQL}) gin_trgm_ops"), postgresql_using="gin"),
+    )
+
     def set_password(self, password):
         # Guarda la contraseña encriptada
         password_bytes = password.encode("utf-8")
@@ -91,7 +110,10 @@ class Board(db.Model):
     is_public = db.Column(db.Boolean, default=False) # Indica si el tablero es público o privado, por defecto será privado.
 
     cards = db.relationship("Card", backref="board", cascade="all, delete-orphan")
-   
+
+    # Concurrencia optimista (ver app/concurrency.py)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
 
 
     def serialize(self):
@@ -104,7 +126,8 @@ class Board(db.Model):
             "userId": self.user_id,
             "members": [member.serialize() for member in self.members],
             "tags": [tag.serialize() for tag in self.tags],
-            "isPublic": self.is_public
+            "isPublic": self.is_public,
+            "version": self.version,
         }
 
 class Tag(db.Model):
@@ -136,9 +159,30 @@ class Card(db.Model):
     priority = db.Column(db.String(20), nullable=True)
 
     position= db.Column(db.Integer,nullable=True, default=0)
+    # Comentarios no eliminados; se mantiene en comment.py (alta, borrado lógico y restauración)
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Concurrencia optimista (ver app/concurrency.py)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
     tags = db.relationship('Tag', secondary='card_tag_association', backref='cards')
     members = db.relationship('User', secondary='card_user_association', backref='cards')
     list = db.relationship("List", backref="cards")
+
+    search_vector = _search_vector(("title", "A"), ("description", "B"))
+
+    __table_args__ = (
+        db.Index("ix_cards_search_vector", "search_vector", postgresql_using="gin"),
+        # Filtros y órdenes de /card/getCards (ver CARD_SORTS en services/read_models.py)
+        db.Index("ix_cards_board_position", "board_id", db.text("COALESCE(position, 0)"), "id"),
+        db.Index("ix_cards_board_due", "board_id", db.text("COALESCE(due_date, '9999-12-31'::timestamp)"), "id"),
+        db.Index("ix_cards_board_priority", "board_id", "priority"),
+        # Debe coincidir con la expresión de CARD_SORTS["priority"] para que el índice sirva al ORDER BY
+        db.Index("ix_cards_board_priority_rank", "board_id",
+                 db.text("(CASE priority WHEN 'Alta' THEN 1 WHEN 'Media' THEN 2 WHEN 'Baja' THEN 3 ELSE 4 END)"), "id"),
+        db.Index("ix_cards_board_created", "board_id", "creation_date", "id"),
+        db.Index("ix_cards_board_title", "board_id", "title", "id"),
+        db.Index("ix_cards_responsable_due", "responsable_id", db.text("COALESCE(due_date, '9999-12-31'::timestamp)"), "id"),
+    )
+    __mapper_args__ = {"version_id_col": version}
     
     def serialize(self):
         list_name = self.list.name if self.list else None
@@ -158,12 +202,16 @@ class Card(db.Model):
             "listId": self.list_id,
             "listName": list_name,
             "tags":[tag.name for tag in self.tags],
-            "members": [member.serialize() for member in self.members]
+            "members": [member.serialize() for member in self.members],
+            "commentCount": self.comment_count or 0,
+            "version": self.version,
         }
     
 class Notification(db.Model):
     __tablename__ = "notifications"
 
+    # Tabla particionada por mes sobre created_at (ver services/partitions.py): la clave primaria
+    # debe incluir la columna de partición, por eso es (id, created_at).
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
 
@@ -181,14 +229,28 @@ class Notification(db.Model):
 
     # Estado y tiempo
     read = db.Column(db.Boolean, default=False, nullable=False)
-    created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
-
-    # Idempotencia (opcional pero útil)
-    event_id = db.Column(db.String(100), unique=True, nullable=True)
+    created_at = db.Column(db.DateTime, primary_key=True, nullable=False,
+                           default=datetime.utcnow, server_default=db.func.now())
+    # Última actividad: al sumar un evento a una notificación agrupada cambia esta y no created_at,
+    # que es la clave de partición
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, server_default=db.func.now())
+
+    # Idempotencia (opcional pero útil). Un índice único en una tabla particionada debe incluir
+    # created_at, así que la unicidad la garantiza notification_events (ver NotificationEvent).
+    event_id = db.Column(db.String(100), nullable=True, index=True)
+
+    # Agrupación: eventos del mismo tipo sobre el mismo recurso dentro de una ventana se suman
+    # a una sola notificación no leída (ver create_grouped_notifications)
+    group_key = db.Column(db.String(150), nullable=True)
+    group_count = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    group_actor_ids = db.Column(ARRAY(db.Integer), nullable=True)
 
     # Índices para consultas típicas
     __table_args__ = (
-        db.Index("idx_notifications_user_read_created", "user_id", "read", "created_at"),
+        db.Index("idx_notifications_user_read_updated", "user_id", "read", "updated_at"),
+        db.Index("ix_notifications_user_group_unread", "user_id", "group_key", "updated_at",
+                 postgresql_where=db.text("NOT read AND group_key IS NOT NULL")),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
     def serialize(self):
@@ -205,7 +267,10 @@ class Notification(db.Model):
             "actorId": self.actor_id,
             "read": self.read,
             "createdAt": self.created_at.isoformat() if self.created_at else None,
+            "updatedAt": self.updated_at.isoformat() if self.updated_at else None,
             "eventId": self.event_id,
+            "groupKey": self.group_key,
+            "groupCount": self.group_count,
         }
 
 class Subtask(db.Model):
@@ -222,6 +287,19 @@ class Subtask(db.Model):
     card_id = db.Column(db.Integer, db.ForeignKey("cards.id"), nullable=False)
     # Estado activa/inactiva
     is_active = db.Column(db.Boolean, default=True, nullable=False)
+    # Concurrencia optimista (ver app/concurrency.py)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+    search_vector = _search_vector(("description", "A"))
+
+    __table_args__ = (
+        db.Index("ix_subtasks_search_vector", "search_vector", postgresql_using="gin"),
+        db.Index("ix_subtasks_responsible_active_limit", "responsible_id",
+                 db.text("COALESCE(limit_date, '9999-12-31'::timestamp)"), "id",
+                 postgresql_where=db.text("is_active")),
+        db.Index("ix_subtasks_card_active", "card_id", "limit_date", postgresql_where=db.text("is_active")),
+    )
+    __mapper_args__ = {"version_id_col": version}
 
     def serialize(self):
         return {
@@ -231,6 +309,7 @@ class Subtask(db.Model):
             "responsible": self.responsible.serialize() if self.responsible else None,
             "cardId": self.card_id,
             "isActive": self.is_active,
+            "version": self.version,
         }
     
 
@@ -252,11 +331,23 @@ class Comment(db.Model):
  
     deleted_at = db.Column(db.DateTime, nullable=True)
     deleted_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    # Concurrencia optimista (ver app/concurrency.py)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+    search_vector = _search_vector(("content", "A"))
 
     __table_args__ = (
         db.Index("idx_comments_card_created", "card_id", "created_at"),
+        db.Index("ix_comments_search_vector", "search_vector", postgresql_using="gin"),
+        # Listados de comentarios visibles: no recorren los eliminados
+        db.Index("ix_comments_card_live_created", "card_id", "created_at", "id",
+                 postgresql_where=db.text("deleted_at IS NULL")),
+        # Recorrido por id del job de retención (ver services/retention.py)
+        db.Index("ix_comments_soft_deleted", "id", postgresql_where=db.text("deleted_at IS NOT NULL")),
     )
     user = db.relationship("User", foreign_keys=[user_id])
+    __mapper_args__ = {"version_id_col": version}
+
     def serialize(self, *, include_deleted_content: bool = False):
         is_deleted = self.deleted_at is not None
         u = self.user  
@@ -275,9 +366,130 @@ class Comment(db.Model):
             "deleted": is_deleted,
             "deletedAt": self.deleted_at.isoformat() if self.deleted_at else None,
             "deletedBy": self.deleted_by,
+            "version": self.version,
+        }
+
+
+
+class CommentArchive(db.Model):
+    """Comentarios eliminados movidos por el job de retención. Sin claves foráneas a propósito."""
+    __tablename__ = "comments_archive"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    card_id = db.Column(db.Integer, nullable=False, index=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    parent_id = db.Column(db.Integer, nullable=True)
+    content = db.Column(db.Text, nullable=False)
+    is_edited = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    deleted_at = db.Column(db.DateTime, nullable=False)
+    deleted_by = db.Column(db.Integer, nullable=True)
+    archived_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
+
+
+class CacheVersion(db.Model):
+    """
+    Versión compartida por todos los workers de un caché en memoria. La de "tags" la incrementa
+    un trigger sobre la tabla tags en la misma transacción que la modifica; las de
+    "collaborators:<user_id>", uno sobre board_user_association.
+    """
+    __tablename__ = "cache_versions"
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default="0")
+
+
+class MaintenanceCheckpoint(db.Model):
+    """Último id procesado por cada job de mantenimiento, para retomarlo si se interrumpe."""
+    __tablename__ = "maintenance_checkpoints"
+
+    name = db.Column(db.String(100), primary_key=True)
+    last_id = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
+
+
+class NotificationEvent(db.Model):
+    """
+    Eventos de notificación ya procesados. La clave primaria es la garantía de idempotencia que
+    notifications (particionada) no puede dar: se reclama con INSERT ... ON CONFLICT DO NOTHING
+    en la misma transacción que crea la notificación.
+    """
+    __tablename__ = "notification_events"
+
+    event_id = db.Column(db.String(150), primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now(), index=True)
+
+
+class NotificationArchive(db.Model):
+    """Notificaciones de particiones vencidas (ver apply_notification_retention)."""
+    __tablename__ = "notifications_archive"
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    type = db.Column(db.String(50), nullable=False)
+    title = db.Column(db.String(200), nullable=False)
+    message = db.Column(db.String(500), nullable=False)
+    resource_kind = db.Column(db.String(20), nullable=True)
+    resource_id = db.Column(db.Integer, nullable=True)
+    actor_id = db.Column(db.Integer, nullable=True)
+    read = db.Column(db.Boolean, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    event_id = db.Column(db.String(100), nullable=True)
+    group_key = db.Column(db.String(150), nullable=True)
+    group_count = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    group_actor_ids = db.Column(ARRAY(db.Integer), nullable=True)
+    archived_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
+
+
+class NotificationPreference(db.Model):
+    """Canal habilitado o no por tipo de notificación ("*" = todos los tipos)."""
+    __tablename__ = "notification_preferences"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    type = db.Column(db.String(50), primary_key=True)
+    channel = db.Column(db.String(10), primary_key=True)  # in_app | push | email
+    enabled = db.Column(db.Boolean, nullable=False, default=True)
+
+    def serialize(self):
+        return {"type": self.type, "channel": self.channel, "enabled": self.enabled}
+
+
+class NotificationBoardMute(db.Model):
+    """Tablero silenciado por un usuario (indefinidamente o hasta muted_until)."""
+    __tablename__ = "notification_board_mutes"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    board_id = db.Column(db.Integer, db.ForeignKey("boards.id", ondelete="CASCADE"), primary_key=True)
+    muted_until = db.Column(db.DateTime, nullable=True)
+
+    def serialize(self):
+        return {
+            "boardId": self.board_id,
+            "mutedUntil": self.muted_until.isoformat() if self.muted_until else None,
         }
 
 
+class IdempotencyKey(db.Model):
+    """
+    Respuesta guardada por Idempotency-Key (ver app/idempotency.py). status_code nulo = en curso;
+    0 = completada sin respuesta guardada.
+    """
+    __tablename__ = "idempotency_keys"
+
+    scope = db.Column(db.String(64), primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    method = db.Column(db.String(10), nullable=False)
+    path = db.Column(db.String(255), nullable=False)
+    status_code = db.Column(db.SmallInteger, nullable=True)
+    response_body = db.Column(db.LargeBinary, nullable=True)
+    content_type = db.Column(db.String(100), nullable=True)
+    response_headers = db.Column(JSONB, nullable=True)  # solo las de REPLAYED_HEADERS
+    created_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
 class List(db.Model):
     __tablename__ = "lists"
 
@@ -0,0 +1,194 @@
+"""
+Perfilado por muestreo de solicitudes en producción.
+
+Las vistas de los blueprints se envuelven al iniciar. Una solicitud se perfila si trae
+"X-Profile: <PROFILER_TOKEN>" o si sale sorteada con PROFILER_SAMPLE_RATE; si no, el costo es
+una comparación. Mientras dura una solicitud perfilada, un único hilo muestreador toma la pila
+del hilo que la atiende cada PROFILER_INTERVAL segundos y la acumula por endpoint en formato
+"collapsed stacks" (una línea "a;b;c N" por pila), que leen flamegraph.pl y speedscope.
+Los perfiles son por proceso y se consultan en /debug/profiles con el mismo token.
+"""
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from flask import request, jsonify, Response
+from .config import PROFILER_TOKEN, PROFILER_SAMPLE_RATE, PROFILER_INTERVAL, PROFILER_MAX_STACKS
+
+PROFILE_HEADER = "X-Profile"
+OVERFLOW_STACK = "[otras pilas]"
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if "site-packages" + os.sep in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    elif filename.startswith(_PROJECT_ROOT):
+        filename = filename[len(_PROJECT_ROOT):]
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _collapse(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class _EndpointProfile:
+    __slots__ = ("stacks", "samples", "requests", "seconds")
+
+    def __init__(self):
+        self.stacks = Counter()
+        self.samples = 0
+        self.requests = 0
+        self.seconds = 0.0
+
+
+class SamplingProfiler:
+    """Un hilo por proceso que muestrea solo los hilos con una solicitud perfilada en curso."""
+
+    def __init__(self, interval: float, max_stacks: int):
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.profiles = {}
+        self._active = {}  # id de hilo -> endpoint
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+
+    def _ensure_thread(self):
+        # Con preload_app los hilos del maestro no sobreviven al fork: cada worker arranca el suyo
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name="request-profiler", daemon=True).start()
+
+    def _run(self):
+        while True:
+            if not self._active:
+                self._wake.wait()
+                self._wake.clear()
+            time.sleep(self.interval)
+            with self._lock:
+                active = dict(self._active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, endpoint in active.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self._record(endpoint, _collapse(frame))
+
+    def _record(self, endpoint: str, stack: str):
+        with self._lock:
+            profile = self.profiles.setdefault(endpoint, _EndpointProfile())
+            if stack not in profile.stacks and len(profile.stacks) >= self.max_stacks:
+                stack = OVERFLOW_STACK
+            profile.stacks[stack] += 1
+            profile.samples += 1
+
+    def start(self, endpoint: str):
+        self._ensure_thread()
+        with self._lock:
+            self._active[threading.get_ident()] = endpoint
+        self._wake.set()
+
+    def stop(self, endpoint: str, elapsed: float):
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+            profile = self.profiles.setdefault(endpoint, _EndpointProfile())
+            profile.requests += 1
+            profile.seconds += elapsed
+
+    def summary(self) -> list[dict]:
+        with self._lock:
+            items = [(endpoint, p.requests, p.samples, p.seconds, len(p.stacks)) for endpoint, p in self.profiles.items()]
+        return [{
+            "endpoint": endpoint,
+            "requests": requests_,
+            "samples": samples,
+            "avgMs": round(seconds / requests_ * 1000, 1) if requests_ else None,
+            "stacks": stacks,
+        } for endpoint, requests_, samples, seconds, stacks in sorted(items, key=lambda i: -i[2])]
+
+    def collapsed(self, endpoint: str) -> str | None:
+        with self._lock:
+            profile = self.profiles.get(endpoint)
+            stacks = profile.stacks.most_common() if profile else None
+        if stacks is None:
+            return None
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def reset(self):
+        with self._lock:
+            self.profiles = {}
+
+
+profiler = SamplingProfiler(PROFILER_INTERVAL, PROFILER_MAX_STACKS)
+
+
+def _should_profile() -> bool:
+    if PROFILER_TOKEN and request.headers.get(PROFILE_HEADER) == PROFILER_TOKEN:
+        return True
+    return PROFILER_SAMPLE_RATE > 0 and random.random() < PROFILER_SAMPLE_RATE
+
+
+def profiled(endpoint: str, view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not _should_profile():
+            return view(*args, **kwargs)
+        started = time.perf_counter()
+        profiler.start(endpoint)
+        try:
+            return view(*args, **kwargs)
+        finally:
+            profiler.stop(endpoint, time.perf_counter() - started)
+    return wrapper
+
+
+def _authorized() -> bool:
+    return bool(PROFILER_TOKEN) and request.headers.get(PROFILE_HEADER) == PROFILER_TOKEN
+
+
+def init_profiler(app):
+    """Llamar después de registrar los blueprints: solo se envuelven sus vistas (endpoint "bp.vista")."""
+    if not PROFILER_TOKEN and PROFILER_SAMPLE_RATE <= 0:
+        return
+
+    for endpoint, view in list(app.view_functions.items()):
+        if "." in endpoint:
+            app.view_functions[endpoint] = profiled(endpoint, view)
+
+    # PERFILES (REQUIEREN X-Profile)-----------------------------------------------------------------------------
+    @app.route("/debug/profiles", methods=["GET"])
+    def list_profiles():
+        if not _authorized():
+            return jsonify({"error": "No encontrado"}), 404
+        return jsonify(profiler.summary()), 200
+
+    @app.route("/debug/profiles/<path:endpoint>", methods=["GET"])
+    def get_profile(endpoint):
+        if not _authorized():
+            return jsonify({"error": "No encontrado"}), 404
+        collapsed = profiler.collapsed(endpoint)
+        if collapsed is None:
+            return jsonify({"error": "Sin muestras para ese endpoint"}), 404
+        return Response(collapsed, mimetype="text/plain")
+
+    @app.route("/debug/profiles", methods=["DELETE"])
+    def reset_profiles():
+        if not _authorized():
+            return jsonify({"error": "No encontrado"}), 404
+        profiler.reset()
+        return jsonify({"message": "Perfiles reiniciados"}), 200
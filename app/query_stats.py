@@ -0,0 +1,104 @@
+"""
+Consultas SQL por solicitud.
+
+Los eventos before/after_cursor_execute de todos los engines (primario y réplicas) miden cada
+sentencia. Por solicitud se acumulan cantidad, tiempo total y la sentencia más lenta, que se
+devuelven en Server-Timing. Se registra en el log (JSON) cada sentencia que supera SLOW_QUERY_MS
+y cada solicitud que supera REQUEST_QUERY_COUNT_WARN consultas o REQUEST_DB_TIME_WARN_MS.
+"""
+import json
+import time
+from flask import request, g, current_app, has_app_context, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .config import SLOW_QUERY_MS, REQUEST_QUERY_COUNT_WARN, REQUEST_DB_TIME_WARN_MS, SERVER_TIMING
+from .metrics import db_query_latency
+
+MAX_STATEMENT_LENGTH = 500
+
+
+class QueryStats:
+    __slots__ = ("count", "total", "slowest", "slowest_statement")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement = None
+
+    def add(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.slowest:
+            self.slowest = elapsed
+            self.slowest_statement = statement
+
+
+def _compact(statement: str) -> str:
+    return " ".join(statement.split())[:MAX_STATEMENT_LENGTH]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Se guarda en el contexto de ejecución: si la sentencia falla no queda nada colgado
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    db_query_latency.observe(elapsed, host=conn.engine.url.host or "local")
+
+    stats = g.get("query_stats") if has_request_context() else None
+    if stats is not None:
+        stats.add(statement, elapsed)
+
+    if elapsed * 1000 >= SLOW_QUERY_MS and has_app_context():
+        current_app.logger.warning("[db] slow_query " + json.dumps({
+            "ms": round(elapsed * 1000, 1),
+            "endpoint": request.endpoint if has_request_context() else None,
+            "database": conn.engine.url.database,
+            "executemany": executemany,
+            "statement": _compact(statement),
+        }))
+
+
+def _server_timing(stats: QueryStats, started: float) -> str:
+    parts = [f'db;dur={stats.total * 1000:.1f};desc="{stats.count} queries"']
+    if stats.count:
+        parts.append(f"db-slowest;dur={stats.slowest * 1000:.1f}")
+    parts.append(f"app;dur={(time.perf_counter() - started) * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def init_query_stats(app):
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    @app.before_request
+    def _start_query_stats():
+        g.query_stats = QueryStats()
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _report_query_stats(response):
+        stats = g.get("query_stats")
+        if stats is None:
+            return response
+        if SERVER_TIMING:
+            response.headers.add("Server-Timing", _server_timing(stats, g.request_started))
+
+        if stats.count >= REQUEST_QUERY_COUNT_WARN or stats.total * 1000 >= REQUEST_DB_TIME_WARN_MS:
+            current_app.logger.warning("[db] heavy_request " + json.dumps({
+                "method": request.method,
+                "endpoint": request.endpoint,
+                "path": request.path,
+                "status": response.status_code,
+                "queries": stats.count,
+                "dbMs": round(stats.total * 1000, 1),
+                "slowestMs": round(stats.slowest * 1000, 1),
+                "slowest": _compact(stats.slowest_statement) if stats.slowest_statement else None,
+            }))
+        return response
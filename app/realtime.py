@@ -2,8 +2,11 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_cors import CORS, cross_origin
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy import desc
-from .models import db, Notification
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert
+from .models import db, Notification, NotificationPreference, NotificationBoardMute, Board
 from .services.notifications import build_notification_payload, create_notification
+from .services.notification_preferences import save_preferences, CHANNELS
 from .services.pusher_client import get_pusher_client
 from sqlalchemy import func
 import os
@@ -31,7 +34,7 @@ def get_notifications():
 
         total_count = query.count()
         unread_count = Notification.query.filter_by(user_id=user_id, read=False).count()
-        notifications = query.order_by(Notification.created_at.desc()).limit(limit).offset(offset).all()
+        notifications = query.order_by(Notification.updated_at.desc()).limit(limit).offset(offset).all()
 
         current_app.logger.info(f"[notifications] User {user_id} requested notifications - Total: {total_count}, Unread: {unread_count}")
         
@@ -173,7 +176,7 @@ def test_push_notification():
             send_email_also=False
         )
 
-        return jsonify({"notification_id": notification.id}), 201
+        return jsonify({"notification_id": notification.id if notification else None}), 201
     except Exception as e:
         db.session.rollback()
         current_app.logger.exception(f"Error creating test notification: {e}")
@@ -289,7 +292,7 @@ def test_email_notification():
         
         return jsonify({
             "message": "Email de prueba enviado",
-            "notification_id": notification.id,
+            "notification_id": notification.id if notification else None,
             "email_sent_to": user.email,
             "resource_kind": data.get("resource_kind"),
             "resource_id": data.get("resource_id"),
@@ -299,3 +302,78 @@ def test_email_notification():
         db.session.rollback()
         current_app.logger.exception(f"Error sending test email: {e}")
         return jsonify({"error": "Error al enviar email de prueba"}), 500
+
+# PREFERENCIAS DE NOTIFICACIÓN--------------------------------------------------------------------------------------
+@realtime_bp.route("/preferences", methods=["GET"])
+@jwt_required()
+def get_notification_preferences():
+    try:
+        user_id = int(get_jwt_identity())
+        preferences = NotificationPreference.query.filter_by(user_id=user_id).all()
+        mutes = NotificationBoardMute.query.filter_by(user_id=user_id).all()
+        return jsonify({
+            "channels": list(CHANNELS),
+            "preferences": [p.serialize() for p in preferences],
+            "mutedBoards": [m.serialize() for m in mutes],
+        }), 200
+    except Exception as e:
+        current_app.logger.exception(f"Error getting notification preferences: {e}")
+        return jsonify({"error": "Error al obtener preferencias"}), 500
+
+@realtime_bp.route("/preferences", methods=["PUT"])
+@jwt_required()
+def update_notification_preferences():
+    """Body: {"preferences": [{"type": "COMMENT_NEW" | "*", "channel": "in_app|push|email", "enabled": bool}]}"""
+    try:
+        user_id = int(get_jwt_identity())
+        data = request.get_json(silent=True) or {}
+        try:
+            save_preferences(db.session, user_id, data.get("preferences") or [])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        db.session.commit()
+        preferences = NotificationPreference.query.filter_by(user_id=user_id).all()
+        return jsonify({"preferences": [p.serialize() for p in preferences]}), 200
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception(f"Error updating notification preferences: {e}")
+        return jsonify({"error": "Error al guardar preferencias"}), 500
+
+@realtime_bp.route("/preferences/mute/<int:board_id>", methods=["POST"])
+@jwt_required()
+def mute_board(board_id):
+    """Body opcional: {"until": ISO 8601}; sin until queda silenciado hasta reactivarlo."""
+    try:
+        user_id = int(get_jwt_identity())
+        if not db.session.get(Board, board_id):
+            return jsonify({"error": "Tablero no encontrado"}), 404
+
+        until = (request.get_json(silent=True) or {}).get("until")
+        try:
+            muted_until = datetime.fromisoformat(until) if until else None
+        except ValueError:
+            return jsonify({"error": "until inválido"}), 400
+
+        stmt = insert(NotificationBoardMute.__table__).values(
+            user_id=user_id, board_id=board_id, muted_until=muted_until)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=["user_id", "board_id"], set_={"muted_until": stmt.excluded.muted_until}))
+        db.session.commit()
+        return jsonify({"boardId": board_id, "mutedUntil": muted_until.isoformat() if muted_until else None}), 200
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception(f"Error muting board: {e}")
+        return jsonify({"error": "Error al silenciar el tablero"}), 500
+
+@realtime_bp.route("/preferences/mute/<int:board_id>", methods=["DELETE"])
+@jwt_required()
+def unmute_board(board_id):
+    try:
+        user_id = int(get_jwt_identity())
+        NotificationBoardMute.query.filter_by(user_id=user_id, board_id=board_id).delete(synchronize_session=False)
+        db.session.commit()
+        return jsonify({"boardId": board_id, "muted": False}), 200
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception(f"Error unmuting board: {e}")
+        return jsonify({"error": "Error al reactivar el tablero"}), 500
@@ -0,0 +1,89 @@
+"""
+Lecturas desde réplicas.
+
+Con DATABASE_REPLICA_URLS configurada, los GET/HEAD leen de una réplica elegida al azar al
+comienzo de la solicitud; todo lo demás, los flush del ORM y cualquier sentencia que escriba van
+al primario. Cada escritura exitosa responde con la cabecera X-DB-Primary, un token firmado que el
+cliente reenvía en las solicitudes siguientes: mientras tenga menos de REPLICA_STICKY_SECONDS,
+esas lecturas van al primario y el usuario ve sus propios cambios aunque la réplica tenga retraso.
+El token no depende del proceso, así que lo valida cualquier worker y funciona entre orígenes.
+"""
+import random
+import re
+from flask import request, g, has_request_context
+from flask_sqlalchemy.session import Session
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+from sqlalchemy.sql.elements import TextClause
+from .config import DATABASE_REPLICA_URLS, REPLICA_STICKY_SECONDS, JWT_SECRET_KEY
+
+READ_METHODS = {"GET", "HEAD"}
+STICKY_HEADER = "X-DB-Primary"
+REPLICA_BIND_PREFIX = "replica_"
+_WRITE_SQL = re.compile(r"\b(insert|update|delete|merge|lock)\b|\bfor\s+(no\s+key\s+)?(update|share)\b", re.I)
+
+
+def replica_binds() -> dict[str, str]:
+    """SQLALCHEMY_BINDS de las réplicas: replica_0, replica_1, ..."""
+    return {f"{REPLICA_BIND_PREFIX}{i}": url for i, url in enumerate(DATABASE_REPLICA_URLS)}
+
+
+def _writes(clause) -> bool:
+    if clause is None:
+        return False
+    if getattr(clause, "is_dml", False):
+        return True
+    if getattr(clause, "_for_update_arg", None) is not None:
+        return True
+    if isinstance(clause, TextClause):
+        return bool(_WRITE_SQL.search(clause.text))
+    return False
+
+
+class RoutingSession(Session):
+    """Sesión de Flask-SQLAlchemy que envía a la réplica de la solicitud solo lo que es lectura."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context():
+            replica = g.get("db_replica")
+            if replica is not None and not _writes(clause):
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _signer() -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(JWT_SECRET_KEY, salt="db-primary")
+
+
+def _sticky() -> bool:
+    # El vencimiento va firmado: un cliente no puede fijarse al primario más de REPLICA_STICKY_SECONDS
+    token = request.headers.get(STICKY_HEADER)
+    if not token:
+        return False
+    try:
+        _signer().loads(token, max_age=REPLICA_STICKY_SECONDS)
+        return True
+    except BadSignature:
+        return False
+
+
+def init_replicas(app):
+    if not DATABASE_REPLICA_URLS:
+        return
+
+    from .database import db
+
+    def replicas():
+        return [engine for key, engine in db.engines.items() if key and key.startswith(REPLICA_BIND_PREFIX)]
+
+    @app.before_request
+    def _route_reads():
+        if request.method in READ_METHODS and not _sticky():
+            g.db_replica = random.choice(replicas())
+        return None
+
+    @app.after_request
+    def _stick_after_write(response):
+        if request.method in READ_METHODS or request.method == "OPTIONS" or response.status_code >= 400:
+            return response
+        response.headers[STICKY_HEADER] = _signer().dumps("primary")  # TimedSerializer firma la hora
+        return response
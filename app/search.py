@@ -0,0 +1,91 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_cors import CORS
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import select, func, literal, union_all
+from .models import db, Card, Comment, Subtask, FTS_CONFIG
+from .services.read_models import accessible_board_ids
+
+search_bp = Blueprint("search", __name__)
+CORS(search_bp)
+
+MAX_LIMIT = 50
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=25, MinWords=8, MaxFragments=2"
+
+@search_bp.before_request
+def handle_options_request():
+    if request.method == 'OPTIONS':
+        return '', 204
+
+def _escape_html(column):
+    # ts_headline devuelve el texto original con <mark>: se escapa antes para no inyectar HTML
+    return func.replace(func.replace(func.replace(column, "&", "&amp;"), "<", "&lt;"), ">", "&gt;")
+
+def _search_statement(user_id: int, query: str):
+    tsquery = func.websearch_to_tsquery(FTS_CONFIG, query)
+    boards = accessible_board_ids(user_id)
+
+    cards = (select(literal("card").label("kind"), Card.id.label("id"), Card.id.label("card_id"),
+                    Card.board_id.label("board_id"), Card.title.label("title"),
+                    (func.coalesce(Card.title, "") + " " + func.coalesce(Card.description, "")).label("body"),
+                    func.ts_rank(Card.search_vector, tsquery).label("rank"))
+             .where(Card.search_vector.op("@@")(tsquery), Card.board_id.in_(boards)))
+
+    comments = (select(literal("comment").label("kind"), Comment.id, Comment.card_id,
+                       Card.board_id, Card.title, Comment.content,
+                       func.ts_rank(Comment.search_vector, tsquery))
+                .join(Card, Card.id == Comment.card_id)
+                .where(Comment.search_vector.op("@@")(tsquery), Comment.deleted_at.is_(None),
+                       Card.board_id.in_(boards)))
+
+    subtasks = (select(literal("subtask").label("kind"), Subtask.id, Subtask.card_id,
+                       Card.board_id, Card.title, Subtask.description,
+                       func.ts_rank(Subtask.search_vector, tsquery))
+                .join(Card, Card.id == Subtask.card_id)
+                .where(Subtask.search_vector.op("@@")(tsquery), Subtask.is_active.is_(True),
+                       Card.board_id.in_(boards)))
+
+    return union_all(cards, comments, subtasks).subquery("hits"), tsquery
+
+# BUSCAR EN TARJETAS, COMENTARIOS Y SUBTAREAS------------------------------------------------------------------------
+@search_bp.route("", methods=["GET"])
+@jwt_required()
+def search():
+    try:
+        user_id = int(get_jwt_identity())
+        query = (request.args.get("q") or "").strip()
+        limit = min(max(request.args.get("limit", 20, type=int), 1), MAX_LIMIT)
+        offset = max(request.args.get("offset", 0, type=int), 0)
+
+        if len(query) < 2:
+            return jsonify({"items": [], "meta": {"limit": limit, "offset": offset, "hasMore": False}}), 200
+
+        hits, tsquery = _search_statement(user_id, query)
+
+        # Primero se ordena y pagina por relevancia; ts_headline (costoso) solo corre sobre la página
+        page = (select(hits)
+                .order_by(hits.c.rank.desc(), hits.c.kind, hits.c.id)
+                .limit(limit + 1).offset(offset)
+                .subquery("page"))
+        stmt = (select(page.c.kind, page.c.id, page.c.card_id, page.c.board_id, page.c.title, page.c.rank,
+                       func.ts_headline(FTS_CONFIG, _escape_html(page.c.body), tsquery, HEADLINE_OPTIONS)
+                       .label("snippet"))
+                .order_by(page.c.rank.desc(), page.c.kind, page.c.id))
+
+        rows = db.session.execute(stmt).all()
+        items = [{
+            "kind": r.kind,
+            "id": r.id,
+            "cardId": r.card_id,
+            "boardId": r.board_id,
+            "cardTitle": r.title,
+            "snippet": r.snippet,
+            "rank": round(float(r.rank), 4),
+        } for r in rows[:limit]]
+
+        return jsonify({
+            "items": items,
+            "meta": {"limit": limit, "offset": offset, "hasMore": len(rows) > limit}
+        }), 200
+    except Exception as e:
+        current_app.logger.exception(f"[search] failed: {e}")
+        return jsonify({"error": "Error en la búsqueda"}), 500
@@ -0,0 +1,98 @@
+"""
+Carga por lotes y altas masivas en tablas pivote.
+
+`WHERE id = ANY(:ids)` envía la lista como un único parámetro array: una sola consulta sin
+importar la cantidad de ids y el mismo texto SQL siempre. Las filas pivote se insertan con un
+único INSERT ... ON CONFLICT DO NOTHING, que además devuelve solo las filas realmente nuevas.
+Para reemplazar una colección se aplica solo la diferencia con lo que ya está guardado.
+"""
+from sqlalchemy import select, delete, any_, bindparam, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.orm import Session
+
+
+def parse_ids(values) -> list[int]:
+    """Enteros válidos y sin repetir, en el orden recibido."""
+    ids = []
+    for raw in values or []:
+        try:
+            value = int(raw)
+        except (TypeError, ValueError):
+            continue
+        if value not in ids:
+            ids.append(value)
+    return ids
+
+
+def _ids_param(ids):
+    return any_(bindparam("ids", list(ids), type_=ARRAY(Integer)))
+
+
+def load_by_ids(session: Session, model, ids) -> dict:
+    """Instancias de `model` indexadas por id, en una sola consulta."""
+    ids = parse_ids(ids)
+    if not ids:
+        return {}
+    rows = session.execute(select(model).where(model.id == _ids_param(ids))).scalars()
+    return {obj.id: obj for obj in rows}
+
+
+def existing_ids(session: Session, model, ids) -> list[int]:
+    """Subconjunto de `ids` que existe en la tabla de `model`, conservando el orden."""
+    ids = parse_ids(ids)
+    if not ids:
+        return []
+    found = set(session.execute(select(model.id).where(model.id == _ids_param(ids))).scalars())
+    return [i for i in ids if i in found]
+
+
+def insert_associations(session: Session, table, owner_column: str, owner_id: int,
+                        other_column: str, other_ids) -> list[int]:
+    """
+    Inserta (owner_id, other_id) en la tabla pivote en un solo INSERT e ignora las filas
+    existentes. Devuelve los other_ids que se agregaron. Las colecciones ORM ya cargadas de
+    `owner` quedan desactualizadas hasta el próximo commit o expire().
+    """
+    other_ids = parse_ids(other_ids)
+    if not other_ids:
+        return []
+    stmt = (insert(table)
+            .values([{owner_column: owner_id, other_column: oid} for oid in other_ids])
+            .on_conflict_do_nothing()
+            .returning(table.c[other_column]))
+    return list(session.execute(stmt).scalars())
+
+
+def association_ids(session: Session, table, owner_column: str, owner_id: int, other_column: str) -> set[int]:
+    """other_ids asociados hoy a `owner_id`."""
+    return set(session.execute(select(table.c[other_column])
+                               .where(table.c[owner_column] == owner_id)).scalars())
+
+
+def remove_associations(session: Session, table, owner_column: str, owner_id: int,
+                        other_column: str, other_ids) -> list[int]:
+    """Borra solo las filas (owner_id, other_id) pedidas; devuelve los other_ids que existían."""
+    other_ids = parse_ids(other_ids)
+    if not other_ids:
+        return []
+    stmt = (delete(table)
+            .where(table.c[owner_column] == owner_id, table.c[other_column] == _ids_param(other_ids))
+            .returning(table.c[other_column]))
+    return list(session.execute(stmt).scalars())
+
+
+def sync_associations(session: Session, table, owner_column: str, owner_id: int,
+                      other_column: str, other_ids) -> tuple[list[int], list[int]]:
+    """
+    Deja en la tabla pivote exactamente `other_ids` para `owner_id` tocando solo la diferencia:
+    un DELETE con las que sobran y un INSERT con las que faltan (ninguno si no cambió nada).
+    Devuelve (agregados, quitados).
+    """
+    wanted = parse_ids(other_ids)
+    current = association_ids(session, table, owner_column, owner_id, other_column)
+    wanted_set = set(wanted)
+    removed = remove_associations(session, table, owner_column, owner_id, other_column,
+                                  [oid for oid in current if oid not in wanted_set])
+    added = insert_associations(session, table, owner_column, owner_id, other_column,
+                                [oid for oid in wanted if oid not in current])
+    return added, removed
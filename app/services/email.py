@@ -1,5 +1,6 @@
 import os
 import requests
+from ..metrics import email_latency, email_failures
 
 RESEND_API = "https://api.resend.com/emails"
 
@@ -10,17 +11,25 @@ def send_email(to: str, subject: str, html: str) -> bool:
         # Si no está configurado, no falles toda la request
         return False
 
-    resp = requests.post(
-        RESEND_API,
-        headers={"Authorization": f"Bearer {api_key}"},
-        json={
-            "from": sender,
-            "to": [to],
-            "subject": subject,
-            "html": html,
-        },
-        timeout=10,
-    )
+    try:
+        with email_latency.time():
+            resp = requests.post(
+                RESEND_API,
+                headers={"Authorization": f"Bearer {api_key}"},
+                json={
+                    "from": sender,
+                    "to": [to],
+                    "subject": subject,
+                    "html": html,
+                },
+                timeout=10,
+            )
+    except requests.RequestException:
+        email_failures.inc(reason="request_error")
+        raise
     print(f"Status: {resp.status_code}")
     print(f"Response: {resp.text}")
-    return resp.status_code in (200, 202)
\ No newline at end of file
+    if resp.status_code not in (200, 202):
+        email_failures.inc(reason=f"http_{resp.status_code}")
+        return False
+    return True
\ No newline at end of file
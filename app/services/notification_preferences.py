@@ -0,0 +1,69 @@
+"""
+Preferencias de notificación por usuario: por tipo ("*" = todos) y canal, más tableros silenciados.
+
+Sin filas todo está habilitado. Un tipo concreto tiene prioridad sobre "*". El canal push
+entrega la notificación in-app, así que sin in_app tampoco hay push.
+"""
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from ..models import NotificationPreference
+
+CHANNELS = ("in_app", "push", "email")
+ALL_TYPES = "*"
+
+LOAD_PREFERENCES_SQL = text("""
+    SELECT r.user_id,
+           EXISTS (SELECT 1 FROM notification_board_mutes m
+                   WHERE m.user_id = r.user_id AND m.board_id = CAST(:board_id AS integer)
+                     AND (m.muted_until IS NULL OR m.muted_until > now() AT TIME ZONE 'utc')) AS muted,
+           COALESCE(json_agg(json_build_array(p.type, p.channel, p.enabled))
+                    FILTER (WHERE p.user_id IS NOT NULL), '[]') AS prefs
+    FROM unnest(CAST(:user_ids AS integer[])) AS r(user_id)
+    LEFT JOIN notification_preferences p ON p.user_id = r.user_id AND p.type IN (:type, '*')
+    GROUP BY r.user_id
+""")
+
+
+def _resolve_channels(prefs) -> set[str]:
+    enabled = {channel: True for channel in CHANNELS}
+    # Primero "*" y después el tipo concreto, que lo sobrescribe
+    for pref_type, channel, value in sorted(prefs, key=lambda p: p[0] != ALL_TYPES):
+        if channel in enabled:
+            enabled[channel] = bool(value)
+    if not enabled["in_app"]:
+        enabled["push"] = False
+    return {channel for channel, value in enabled.items() if value}
+
+
+def load_delivery_channels(session: Session, user_ids, type_: str,
+                           board_id: int | None = None) -> dict[int, set[str]]:
+    """
+    Canales habilitados de cada destinatario para `type_`, en una sola consulta. Los usuarios que
+    silenciaron el tablero quedan con un conjunto vacío.
+    """
+    ids = sorted({int(uid) for uid in user_ids})
+    if not ids:
+        return {}
+    rows = session.execute(LOAD_PREFERENCES_SQL, {"user_ids": ids, "type": type_, "board_id": board_id})
+    return {r.user_id: (set() if r.muted else _resolve_channels(r.prefs)) for r in rows}
+
+
+def save_preferences(session: Session, user_id: int, preferences: list[dict]) -> int:
+    """Upsert de [{type, channel, enabled}] en un solo INSERT ... ON CONFLICT."""
+    rows = []
+    for pref in preferences:
+        type_ = (pref.get("type") or ALL_TYPES).strip()
+        channel = pref.get("channel")
+        if channel not in CHANNELS or not isinstance(pref.get("enabled"), bool):
+            raise ValueError(f"preferencia inválida: {pref}")
+        rows.append({"user_id": user_id, "type": type_, "channel": channel, "enabled": pref["enabled"]})
+    if not rows:
+        return 0
+
+    stmt = insert(NotificationPreference.__table__).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "type", "channel"],
+        set_={"enabled": stmt.excluded.enabled},
+    )
+    return session.execute(stmt).rowcount
@@ -1,10 +1,17 @@
 import os
+import threading
+import time
 import uuid
+from sqlalchemy import text, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from datetime import datetime
-from ..models import Notification
-from .pusher_client import trigger_user_notification
+from datetime import datetime, timedelta
+from ..models import Notification, NotificationEvent
+from ..config import NOTIFICATION_GROUP_WINDOW, NOTIFICATION_PUSH_DEBOUNCE
+from .pusher_client import trigger_user_notification, trigger_user_notifications
+from .notification_preferences import load_delivery_channels, CHANNELS
 from .email import send_email
+from ..metrics import notification_fanout
 from flask import current_app
 
 FRONTEND_BASE = os.getenv("FRONTEND_BASE_URL", "http://localhost:3000")
@@ -29,7 +36,7 @@ def get_resource_url(resource_kind: str, resource_id: str, db: Session) -> str |
 
 def build_notification_payload(n: Notification) -> dict:
     return {
-        "id": n.id,
+        "id": str(n.id),
         "type": n.type,
         "title": n.title,
         "message": n.message,
@@ -41,8 +48,28 @@ def build_notification_payload(n: Notification) -> dict:
         "read": n.read,
         "createdAt": n.
         created_at.isoformat() + "Z" if n.created_at else None,
+        "updatedAt": n.updated_at.isoformat() + "Z" if n.updated_at else None,
+        "groupKey": n.group_key,
+        "groupCount": n.group_count or 1,
     }
 
+def claim_notification_events(db: Session, event_ids) -> set[str]:
+    """
+    Reclama los `event_ids` en notification_events y devuelve los que eran nuevos. No hace commit:
+    el reclamo se confirma (o se deshace) junto con lo que el llamador escriba en la misma transacción,
+    y un reintento concurrente espera a que esa transacción termine.
+    """
+    event_ids = list(dict.fromkeys(e for e in event_ids if e))
+    if not event_ids:
+        return set()
+    table = NotificationEvent.__table__
+    return set(db.execute(
+        pg_insert(table).values([{"event_id": e} for e in event_ids])
+        .on_conflict_do_nothing(index_elements=[table.c.event_id])
+        .returning(table.c.event_id)
+    ).scalars())
+
+
 def create_notification(
     db: Session,
     *,
@@ -56,16 +83,126 @@ def create_notification(
     event_id: str | None = None,
     user_email: str | None = None,
     send_email_also: bool = True,
-) -> Notification:
-     # Idempotencia
-    if event_id:
+    board_id: int | None = None,
+) -> Notification | None:
+    """
+    Respeta las preferencias del destinatario: sin in_app no se guarda ni se emite (devuelve None)
+    y el email solo sale si el canal email está habilitado. `board_id` aplica los tableros silenciados.
+    Con `event_id`, un reintento no repite la notificación ni el email, haya o no canal in_app.
+    """
+    channels = set(CHANNELS)
+    if user_id is not None and str(user_id).isdigit():
+        channels = load_delivery_channels(db, [user_id], type_, board_id).get(int(user_id), channels)
+    if "email" not in channels:
+        send_email_also = False
+    if "in_app" not in channels:
+        current_app.logger.info(f"[notifications] user={user_id} opted out of {type_} in-app")
+        notif = None
+        if event_id and send_email_also and user_email:
+            # Sin fila en notifications, el reclamo del evento es lo único que evita reenviar el email
+            if not claim_notification_events(db, [event_id]):
+                current_app.logger.info(f"[notifications] idempotent: email for event={event_id} already sent")
+                return None
+            db.commit()
+    else:
+        notif, created = _store_and_push(db, user_id=user_id, type_=type_, title=title, message=message,
+                                         resource_kind=resource_kind, resource_id=resource_id,
+                                         actor_id=actor_id, event_id=event_id, push="push" in channels)
+        if not created:
+            return notif  # reintento idempotente: el email ya se envió la primera vez
+
+    _send_notification_email(user_email if send_email_also else None, title, message)
+    return notif
+
+
+def create_notifications(
+    db: Session,
+    *,
+    recipients,
+    type_: str,
+    title: str,
+    message: str,
+    event_base: str,
+    resource_kind: str | None = None,
+    resource_id: str | None = None,
+    actor_id: str | None = None,
+    board_id: int | None = None,
+    send_email_also: bool = True,
+) -> list[dict]:
+    """
+    La misma notificación para varios destinatarios (`recipients`: usuarios con id y email) con una
+    cantidad fija de sentencias: una consulta de preferencias, un reclamo de eventos, un INSERT y un
+    commit. Cada destinatario recibe el event_id `<event_base>:<user_id>`; un reintento no repite la
+    notificación ni el email. Los pushes salen en lote y los emails después del commit.
+    Devuelve los payloads de las notificaciones creadas.
+    """
+    users = {int(u.id): u for u in recipients}
+    notification_fanout.observe(len(users), type=type_)
+    if not users:
+        return []
+    channels = load_delivery_channels(db, list(users), type_, board_id)
+    if not send_email_also:
+        channels = {uid: enabled - {"email"} for uid, enabled in channels.items()}
+    per_user_event = {uid: f"{event_base}:{uid}" for uid, enabled in channels.items() if enabled & {"in_app", "email"}}
+
+    claimed = claim_notification_events(db, per_user_event.values())
+    targets = sorted(uid for uid, event in per_user_event.items() if event in claimed)
+    if not targets:
+        return []
+
+    actor = int(actor_id) if actor_id is not None and str(actor_id).isdigit() else None
+    now = datetime.utcnow()
+    rows = [{
+        "id": uuid.uuid4(),
+        "user_id": uid,
+        "type": type_,
+        "title": title,
+        "message": message,
+        "resource_kind": resource_kind,
+        "resource_id": int(resource_id) if resource_id and str(resource_id).isdigit() else None,
+        "actor_id": actor,
+        "read": False,
+        "created_at": now,
+        "updated_at": now,
+        "event_id": per_user_event[uid],
+    } for uid in targets if "in_app" in channels[uid]]
+
+    created = []
+    if rows:
+        table = Notification.__table__
+        created = db.execute(insert(table).values(rows).returning(*_payload_columns(table))).all()
+    db.commit()
+
+    trigger_user_notifications([(r.user_id, build_notification_payload(r)) for r in created
+                                if "push" in channels[r.user_id]])
+    for uid in targets:
+        if "email" in channels[uid]:
+            _send_notification_email(users[uid].email, title, message)
+
+    current_app.logger.info(f"[notifications] type={type_} recipients={len(users)} created={len(created)}")
+    return [build_notification_payload(r) for r in created]
+
+
+def _payload_columns(table):
+    # Columnas que usa build_notification_payload, para los RETURNING de los INSERT masivos
+    return (table.c.id, table.c.user_id, table.c.type, table.c.title, table.c.message,
+            table.c.resource_kind, table.c.resource_id, table.c.actor_id, table.c.read,
+            table.c.created_at, table.c.updated_at, table.c.event_id, table.c.group_key, table.c.group_count)
+
+
+def _store_and_push(db: Session, *, user_id, type_, title, message, resource_kind, resource_id,
+                    actor_id, event_id, push: bool) -> tuple[Notification | None, bool]:
+    # Idempotencia: la clave primaria de notification_events decide, no una búsqueda previa
+    if event_id and not claim_notification_events(db, [event_id]):
         existing = db.query(Notification).filter(Notification.event_id == event_id).first()
         if existing:
             payload = build_notification_payload(existing)
             current_app.logger.info(f"[notifications] idempotent: re-emitting to pusher user={user_id} payload={payload}")
-            trigger_user_notification(user_id, payload)
-            return existing
+            if push:
+                trigger_user_notification(user_id, payload)
+        return existing, False
 
+    now = datetime.utcnow()
     notif = Notification(
       
         user_id=int(user_id) if user_id is not None and str(user_id).isdigit() else user_id,
@@ -76,7 +213,8 @@ def create_notification(
         resource_id=int(resource_id) if resource_id and str(resource_id).isdigit() else resource_id,
         actor_id=int(actor_id) if actor_id and str(actor_id).isdigit() else actor_id,
         read=False,
-        created_at=datetime.utcnow(),
+        created_at=now,
+        updated_at=now,
         event_id=event_id,
     )
     db.add(notif)
@@ -86,14 +224,19 @@ def create_notification(
     payload = build_notification_payload(notif)
 
     # Emitir en tiempo real
-    try:
-        current_app.logger.info(f"[notifications] Emitting pusher for user={user_id} payload={payload}")
-        trigger_user_notification(user_id, payload)
-    except Exception as e:
-        current_app.logger.exception(f"[notifications] Pusher trigger failed for user={user_id}: {e}")
+    if push:
+        try:
+            current_app.logger.info(f"[notifications] Emitting pusher for user={user_id} payload={payload}")
+            trigger_user_notification(user_id, payload)
+        except Exception as e:
+            current_app.logger.exception(f"[notifications] Pusher trigger failed for user={user_id}: {e}")
 
+    return notif, True
+
+
+def _send_notification_email(user_email: str | None, title: str, message: str):
     # Email (opcional) — capturar errores para no romper el flujo
-    if send_email_also and user_email:
+    if user_email:
         try:
             subject = title
             cta = ""
@@ -145,4 +288,180 @@ def create_notification(
         except Exception as e:
             current_app.logger.exception(f"[notifications] Error sending email to {user_email}: {e}")
 
-    return notif
\ No newline at end of file
+# AGRUPACIÓN DE NOTIFICACIONES-------------------------------------------------------------------------------------
+# Suma el evento a la notificación no leída del mismo grupo con actividad dentro de la ventana. El mensaje
+# se rearma en SQL con la lista de actores distintos: {others} es la cantidad de actores además del último.
+# event_id y created_at (clave de partición) quedan como los del primer evento; la actividad va a updated_at.
+FOLD_GROUPED_SQL = text("""
+    WITH target AS (
+        SELECT id, created_at,
+               CASE WHEN CAST(:actor_id AS integer) IS NULL OR CAST(:actor_id AS integer) = ANY(COALESCE(group_actor_ids, '{}'))
+                    THEN COALESCE(group_actor_ids, '{}')
+                    ELSE array_append(COALESCE(group_actor_ids, '{}'), CAST(:actor_id AS integer)) END AS actors
+        FROM notifications
+        WHERE user_id = ANY(:user_ids) AND group_key = :group_key AND NOT read AND updated_at >= :since
+        FOR UPDATE
+    )
+    UPDATE notifications n
+    SET group_count = n.group_count + 1,
+        group_actor_ids = t.actors,
+        actor_id = COALESCE(CAST(:actor_id AS integer), n.actor_id),
+        title = :title,
+        message = CASE WHEN cardinality(t.actors) > 1
+                       THEN replace(:grouped_message, '{others}', (cardinality(t.actors) - 1)::text)
+                       ELSE :message END,
+        updated_at = now() AT TIME ZONE 'utc'
+    FROM target t
+    WHERE n.id = t.id AND n.created_at = t.created_at
+    RETURNING n.id, n.user_id, n.type, n.title, n.message, n.resource_kind, n.resource_id, n.actor_id,
+              n.read, n.created_at, n.updated_at, n.event_id, n.group_key, n.group_count
+""")
+
+
+class _PushDebouncer:
+    """
+    Pushes de notificaciones agrupadas por (usuario, grupo) en este proceso. El primero de una ráfaga
+    sale enseguida; los siguientes dentro del intervalo se acumulan y al cerrarlo se envía solo el
+    último estado, así el cliente no queda con un "N otros" viejo.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._last = {}
+        self._pending = {}  # (usuario, grupo) -> último payload, enviado al cerrar el intervalo
+        self._lock = threading.Lock()
+
+    def mark(self, user_id, group_key):
+        """Inicio de una ráfaga (notificación nueva, ya enviada)."""
+        with self._lock:
+            self._prune(time.monotonic())
+            self._last[(user_id, group_key)] = time.monotonic()
+
+    def submit(self, user_id, group_key, payload: dict, app) -> bool:
+        """True si el push debe salir ahora; si no, queda programado para el final del intervalo."""
+        key = (user_id, group_key)
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            last = self._last.get(key)
+            if last is None or now - last >= self.interval:
+                self._last[key] = now
+                return True
+            scheduled = key in self._pending
+            self._pending[key] = payload
+        if not scheduled:
+            timer = threading.Timer(self.interval - (now - last), self._flush, args=(key, app))
+            timer.daemon = True
+            timer.start()
+        return False
+
+    def _flush(self, key, app):
+        with self._lock:
+            payload = self._pending.pop(key, None)
+            if payload is None:
+                return
+            self._last[key] = time.monotonic()
+        with app.app_context():
+            trigger_user_notifications([(key[0], payload)])
+
+    def _prune(self, now: float):
+        if len(self._last) > 10000:
+            self._last = {k: t for k, t in self._last.items() if now - t < self.interval or k in self._pending}
+
+
+_push_debouncer = _PushDebouncer(NOTIFICATION_PUSH_DEBOUNCE)
+
+
+def create_grouped_notifications(
+    db: Session,
+    *,
+    recipient_ids,
+    type_: str,
+    group_key: str,
+    title: str,
+    message: str,
+    grouped_message: str,
+    resource_kind: str | None = None,
+    resource_id: str | None = None,
+    actor_id: str | None = None,
+    event_id: str,
+    board_id: int | None = None,
+    window_seconds: int = NOTIFICATION_GROUP_WINDOW,
+) -> list[dict]:
+    """
+    Notificación in-app agrupable para varios destinatarios con una cantidad fija de sentencias.
+    Si el destinatario tiene una notificación no leída con el mismo `group_key` y actividad (updated_at)
+    de hace menos de `window_seconds`, se le suma el evento (group_count + 1, mensaje con `grouped_message`, donde
+    {others} es la cantidad de otros actores); si no, se inserta una nueva. `event_id` es la base
+    del id de idempotencia: cada destinatario recibe `<event_id>:to:<user_id>`, reclamado en
+    notification_events aunque el evento termine sumado a otra notificación.
+    Los pushes se envían por lotes; los de notificaciones agrupadas respetan NOTIFICATION_PUSH_DEBOUNCE
+    y el último estado de la ráfaga se envía al cerrar el intervalo.
+    Las preferencias de todos los destinatarios se cargan en una consulta y los que no reciben
+    in-app (o silenciaron `board_id`) se descartan antes de escribir nada.
+    Devuelve los payloads de las notificaciones creadas o actualizadas.
+    """
+    notification_fanout.observe(len(recipient_ids), type=type_)
+    channels = load_delivery_channels(db, recipient_ids, type_, board_id)
+    recipients = sorted(uid for uid, enabled in channels.items() if "in_app" in enabled)
+    if not recipients:
+        return []
+    actor = int(actor_id) if actor_id is not None and str(actor_id).isdigit() else None
+    per_user_event = {uid: f"{event_id}:to:{uid}" for uid in recipients}
+
+    # Idempotencia: un reintento del mismo evento no vuelve a sumar ni a insertar. Los ids se reclaman
+    # en notification_events porque la fila agrupada conserva solo el event_id del primer evento
+    claimed = claim_notification_events(db, per_user_event.values())
+    recipients = [uid for uid in recipients if per_user_event[uid] in claimed]
+    if not recipients:
+        return []
+
+    folded = db.execute(FOLD_GROUPED_SQL, {
+        "user_ids": recipients, "group_key": group_key, "actor_id": actor,
+        "since": datetime.utcnow() - timedelta(seconds=window_seconds),
+        "title": title, "message": message, "grouped_message": grouped_message,
+    }).all()
+
+    folded_users = {r.user_id for r in folded}
+    now = datetime.utcnow()
+    new_rows = [{
+        "id": uuid.uuid4(),
+        "user_id": uid,
+        "type": type_,
+        "title": title,
+        "message": message,
+        "resource_kind": resource_kind,
+        "resource_id": int(resource_id) if resource_id and str(resource_id).isdigit() else None,
+        "actor_id": actor,
+        "read": False,
+        "created_at": now,
+        "updated_at": now,
+        "event_id": per_user_event[uid],
+        "group_key": group_key,
+        "group_count": 1,
+        "group_actor_ids": [actor] if actor is not None else [],
+    } for uid in recipients if uid not in folded_users]
+
+    created = []
+    if new_rows:
+        table = Notification.__table__
+        created = db.execute(insert(table).values(new_rows).returning(*_payload_columns(table))).all()
+    db.commit()
+
+    pushes = []
+    for r in created:
+        if "push" in channels[r.user_id]:
+            _push_debouncer.mark(r.user_id, group_key)
+            pushes.append((r.user_id, build_notification_payload(r)))
+    app = current_app._get_current_object()
+    for r in folded:
+        # Agrupadas: el primer evento de la ráfaga se envía; del resto, el último estado al cerrar el intervalo
+        if "push" in channels[r.user_id]:
+            payload = build_notification_payload(r)
+            if _push_debouncer.submit(r.user_id, group_key, payload, app):
+                pushes.append((r.user_id, payload))
+    trigger_user_notifications(pushes)
+
+    current_app.logger.info(f"[notifications] group={group_key} created={len(created)} folded={len(folded)} "
+                            f"pushed={len(pushes)}")
+    return [build_notification_payload(r) for r in [*created, *folded]]
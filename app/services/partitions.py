@@ -0,0 +1,136 @@
+"""
+Particiones mensuales de `notifications` (RANGE sobre created_at).
+
+Cada mes vive en notifications_yAAAAmMM y notifications_default recibe lo que no cae en
+ninguna partición, así un INSERT nunca falla por falta de partición. La retención trabaja
+partición por partición: en vez de un DELETE masivo se separa (DETACH) y se borra la tabla.
+"""
+import re
+from datetime import date, datetime
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+PARENT_TABLE = "notifications"
+DEFAULT_PARTITION = "notifications_default"
+PARTITION_NAME = re.compile(r"^notifications_y(\d{4})m(\d{2})$")
+
+# Columnas que se copian a notifications_archive
+NOTIFICATION_COLUMNS = ("id, user_id, type, title, message, resource_kind, resource_id, actor_id, read, "
+                        "created_at, updated_at, event_id, group_key, group_count, group_actor_ids")
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def list_notification_partitions(session: Session) -> list[tuple[str, date]]:
+    """Particiones mensuales existentes (nombre, primer día del mes), de la más vieja a la más nueva."""
+    rows = session.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :parent
+    """), {"parent": PARENT_TABLE}).scalars()
+
+    partitions = []
+    for name in rows:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def ensure_notification_partitions(session: Session, *, months_ahead: int = 3, lock_timeout_ms: int = 5000,
+                                   log=print) -> list[str]:
+    """
+    Crea las particiones del mes actual y de los `months_ahead` siguientes si faltan. Postgres no
+    deja crear una partición si notifications_default tiene filas de ese rango, así que en la misma
+    transacción esas filas se sacan a una tabla temporal, se crea la partición y se vuelven a insertar.
+    """
+    existing = {name for name, _ in list_notification_partitions(session)}
+    current = month_start(datetime.utcnow().date())
+    created = []
+    for offset in range(months_ahead + 1):
+        start = add_months(current, offset)
+        name = partition_name(start)
+        if name in existing:
+            continue
+        bounds = {"start": start, "end": add_months(start, 1)}
+        session.execute(text(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}"))
+        session.execute(text(f"CREATE TEMP TABLE notifications_moving (LIKE {PARENT_TABLE}) ON COMMIT DROP"))
+        moved = session.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end RETURNING *
+            )
+            INSERT INTO notifications_moving SELECT * FROM moved
+        """), bounds).rowcount
+        session.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {PARENT_TABLE} '
+            f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+        ))
+        session.execute(text(f"INSERT INTO {PARENT_TABLE} SELECT * FROM notifications_moving"))
+        session.commit()
+        created.append(name)
+        log(f"[partitions] creada {name} ({moved} filas movidas desde {DEFAULT_PARTITION})")
+    return created
+
+
+def apply_notification_retention(session: Session, *, keep_months: int = 6, archive: bool = True,
+                                 lock_timeout_ms: int = 5000, log=print) -> dict:
+    """
+    Elimina las particiones mensuales anteriores a `keep_months` meses, una transacción por partición:
+    DETACH, copia opcional de todas sus filas (leídas o no) a notifications_archive y DROP. Las filas
+    de ese rango que hayan caído en notifications_default corren la misma suerte, para que la
+    partición por defecto no crezca sin límite.
+    """
+    cutoff = add_months(month_start(datetime.utcnow().date()), -keep_months)
+    summary = {"dropped": [], "archived": 0, "purged_default": 0, "events_purged": 0}
+
+    for name, start in list_notification_partitions(session):
+        if add_months(start, 1) > cutoff:
+            break
+
+        session.execute(text(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}"))
+        session.execute(text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{name}"'))
+
+        if archive:
+            summary["archived"] += session.execute(text(
+                f"INSERT INTO notifications_archive ({NOTIFICATION_COLUMNS}) "
+                f'SELECT {NOTIFICATION_COLUMNS} FROM "{name}" '
+                f"ON CONFLICT (id) DO NOTHING"
+            )).rowcount
+
+        session.execute(text(f'DROP TABLE "{name}"'))
+        session.commit()
+        summary["dropped"].append(name)
+        log(f"[retention] notifications: {name} eliminada")
+
+    # Filas vencidas en la partición por defecto (meses sin partición propia)
+    if archive:
+        summary["archived"] += session.execute(text(f"""
+            INSERT INTO notifications_archive ({NOTIFICATION_COLUMNS})
+            SELECT {NOTIFICATION_COLUMNS} FROM {DEFAULT_PARTITION} WHERE created_at < :cutoff
+            ON CONFLICT (id) DO NOTHING
+        """), {"cutoff": cutoff}).rowcount
+    summary["purged_default"] = session.execute(
+        text(f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at < :cutoff"), {"cutoff": cutoff}
+    ).rowcount
+    session.commit()
+    if summary["purged_default"]:
+        log(f"[retention] notifications: {summary['purged_default']} filas vencidas de {DEFAULT_PARTITION}")
+
+    # Los ids de evento reclamados solo sirven contra reintentos: los de notificaciones vencidas sobran
+    summary["events_purged"] = session.execute(
+        text("DELETE FROM notification_events WHERE created_at < :cutoff"), {"cutoff": cutoff}
+    ).rowcount
+    session.commit()
+    return summary
@@ -2,6 +2,7 @@
 import os
 import pusher
 from flask import current_app
+from ..metrics import pusher_latency, pusher_failures, pusher_batch_size
 
 _pusher = None
 
@@ -18,11 +19,38 @@ def get_pusher_client():
         )
     return _pusher
 
+def reset_pusher_client():
+    # Tras un fork cada worker debe crear su propio cliente (sesión HTTP propia)
+    global _pusher
+    _pusher = None
+
 def trigger_user_notification(user_id: str, payload: dict, private: bool = True):
     channel = f"private-user-{user_id}" if private else f"user-{user_id}"
     try:
         client = get_pusher_client()
         current_app.logger.info(f"[pusher] Triggering event 'notification' on {channel} payload={payload}")
-        client.trigger(channel, "notification", payload)
+        with pusher_latency.time(operation="trigger"):
+            client.trigger(channel, "notification", payload)
     except Exception as e:
+        pusher_failures.inc(operation="trigger")
         current_app.logger.exception(f"[pusher] Failed to trigger on {channel}: {e}")
+
+PUSHER_BATCH_LIMIT = 10  # máximo de eventos por llamada a trigger_batch
+
+def trigger_user_notifications(items):
+    """Envía (user_id, payload) en lotes de trigger_batch: una llamada HTTP cada 10 eventos."""
+    events = [{"channel": f"private-user-{user_id}", "name": "notification", "data": payload}
+              for user_id, payload in items]
+    if not events:
+        return
+    client = get_pusher_client()
+    for start in range(0, len(events), PUSHER_BATCH_LIMIT):
+        batch = events[start:start + PUSHER_BATCH_LIMIT]
+        try:
+            current_app.logger.info(f"[pusher] Triggering batch of {len(batch)} notification events")
+            pusher_batch_size.observe(len(batch))
+            with pusher_latency.time(operation="trigger_batch"):
+                client.trigger_batch(batch)
+        except Exception as e:
+            pusher_failures.inc(operation="trigger_batch")
+            current_app.logger.exception(f"[pusher] Failed to trigger batch: {e}")
@@ -0,0 +1,673 @@
+"""
+Modelos de lectura para vistas de listado.
+
+Construyen las respuestas directamente desde filas de `select()` con solo las columnas
+necesarias, sin hidratar instancias ORM ni cargar relaciones de forma perezosa. Etiquetas
+y miembros se agregan en PostgreSQL (array_agg / json_agg) con subconsultas correlacionadas
+que usan las PK de las tablas pivote.
+
+Las fechas se devuelven como datetime: FastJSONProvider las codifica en ISO 8601, igual
+que los serialize() de los modelos, así que la forma de la respuesta es la misma.
+"""
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import select, func, and_, or_, text, literal_column, Integer, tuple_, literal, union_all
+from sqlalchemy.orm import Session, aliased
+from ..models import (
+    User, Board, Tag, Card, Comment, List, Subtask,
+    board_user_association, board_tag_association,
+    card_user_association, card_tag_association, favorite_boards,
+)
+
+
+def _user_json():
+    # Misma forma que User.serialize()
+    return func.json_build_object(
+        "id", User.id,
+        "firstName", User.first_name,
+        "lastName", User.last_name,
+        "email", User.email,
+    )
+
+
+def _card_tag_names():
+    return (select(func.array_agg(Tag.name))
+            .select_from(card_tag_association.join(Tag, Tag.id == card_tag_association.c.tag_id))
+            .where(card_tag_association.c.card_id == Card.id)
+            .scalar_subquery())
+
+
+def _card_member_ids():
+    return (select(func.array_agg(card_user_association.c.user_id))
+            .where(card_user_association.c.card_id == Card.id)
+            .scalar_subquery())
+
+
+def _card_members():
+    return (select(func.json_agg(_user_json()))
+            .select_from(card_user_association.join(User, User.id == card_user_association.c.user_id))
+            .where(card_user_association.c.card_id == Card.id)
+            .scalar_subquery())
+
+
+def _card_subtask_counts():
+    # Subtareas activas y vencidas de la tarjeta; ambas se resuelven sobre ix_subtasks_card_active
+    active = and_(Subtask.card_id == Card.id, Subtask.is_active)
+    total = select(func.count()).select_from(Subtask).where(active).scalar_subquery()
+    overdue = (select(func.count()).select_from(Subtask)
+               .where(active, Subtask.limit_date < func.now()).scalar_subquery())
+    return total.label("subtask_count"), overdue.label("overdue_subtask_count")
+
+
+def accessible_board_ids(user_id: int):
+    """Subconsulta con los tableros propios o de los que el usuario es miembro."""
+    member_of = select(board_user_association.c.board_id).where(board_user_association.c.user_id == user_id)
+    return select(Board.id).where(or_(Board.user_id == user_id, Board.id.in_(member_of)))
+
+
+# TARJETAS---------------------------------------------------------------------------------------------------------
+def board_cards_statement(board_id: int, *, compact: bool = False, normalized: bool = False):
+    """Select de las tarjetas de un tablero (ver cards_statement)."""
+    return cards_statement(Card.board_id == board_id, compact=compact, normalized=normalized)
+
+
+def cards_statement(*criteria, compact: bool = False, normalized: bool = False):
+    """
+    Select de tarjetas que cumplen `criteria`. `compact` deja solo lo que muestra la vista de tablero;
+    `normalized` trae los ids de los miembros en lugar de sus objetos (ver with_users_map).
+    """
+    if compact:
+        columns = [
+            Card.id, Card.title, Card.list_id, Card.position, Card.priority,
+            Card.due_date, Card.state, Card.comment_count, Card.version,
+            _card_tag_names().label("tag_names"),
+            _card_member_ids().label("member_ids"),
+            *_card_subtask_counts(),
+        ]
+    else:
+        columns = [
+            Card.id, Card.title, Card.description, Card.priority, Card.responsable_id,
+            Card.creation_date, Card.begin_date, Card.due_date, Card.state,
+            Card.board_id, Card.list_id, List.name.label("list_name"), Card.comment_count, Card.version,
+            _card_tag_names().label("tag_names"),
+            (_card_member_ids().label("member_ids") if normalized else _card_members().label("members")),
+            *_card_subtask_counts(),
+        ]
+
+    stmt = select(*columns).where(*criteria)
+    if not compact:
+        stmt = stmt.select_from(Card).outerjoin(List, List.id == Card.list_id)
+    return stmt
+
+
+def card_row_to_dict(r, *, normalized: bool = False) -> dict:
+    # Misma forma que Card.serialize()
+    data = {
+        "id": r.id,
+        "title": r.title,
+        "description": r.description,
+        "priority": r.priority,
+        "responsableId": r.responsable_id,
+        "creationDate": r.creation_date,
+        "beginDate": r.begin_date,
+        "dueDate": r.due_date,
+        "state": r.state,
+        "boardId": r.board_id,
+        "listId": r.list_id,
+        "listName": r.list_name,
+        "tags": r.tag_names or [],
+        "commentCount": r.comment_count,
+        "subtaskCount": r.subtask_count,
+        "overdueSubtaskCount": r.overdue_subtask_count,
+        "version": r.version,
+    }
+    if normalized:
+        data["memberIds"] = r.member_ids or []
+    else:
+        data["members"] = r.members or []
+    return data
+
+
+def compact_card_row_to_dict(r) -> dict:
+    return {
+        "id": r.id,
+        "title": r.title,
+        "listId": r.list_id,
+        "position": r.position,
+        "priority": r.priority,
+        "dueDate": r.due_date,
+        "state": r.state,
+        "tags": r.tag_names or [],
+        "memberIds": r.member_ids or [],
+        "commentCount": r.comment_count,
+        "subtaskCount": r.subtask_count,
+        "overdueSubtaskCount": r.overdue_subtask_count,
+        "version": r.version,
+    }
+
+
+# Claves de orden. Las columnas nulas se reemplazan para que el keyset funcione con una tupla
+# simple. Cada expresión coincide exactamente con un índice (board_id, clave, id) de Card:
+# ix_cards_board_position, ix_cards_board_due, ix_cards_board_created, ix_cards_board_priority_rank
+# (la prioridad va como SQL literal: con parámetros el planner no la reconoce) e ix_cards_board_title.
+FAR_FUTURE = literal_column("'9999-12-31'::timestamp")
+CARD_SORTS = {
+    "position": func.coalesce(Card.position, 0),
+    "dueDate": func.coalesce(Card.due_date, FAR_FUTURE),
+    "createdAt": Card.creation_date,
+    "priority": literal_column("(CASE cards.priority WHEN 'Alta' THEN 1 WHEN 'Media' THEN 2 "
+                               "WHEN 'Baja' THEN 3 ELSE 4 END)", Integer),
+    "title": Card.title,
+}
+DATETIME_SORTS = {"dueDate", "createdAt"}
+INTEGER_SORTS = {"position", "priority"}
+
+
+def card_filter_criteria(filters: dict) -> list:
+    """
+    Criterios WHERE para el listado de tarjetas. Claves admitidas: list_ids, member_id,
+    responsable_id, tags (nombres, cualquiera de ellos), priorities, due_from, due_to, state.
+    """
+    criteria = []
+    if filters.get("list_ids"):
+        criteria.append(Card.list_id.in_(filters["list_ids"]))
+    if filters.get("member_id") is not None:
+        criteria.append(select(card_user_association.c.card_id)
+                        .where(card_user_association.c.card_id == Card.id,
+                               card_user_association.c.user_id == filters["member_id"])
+                        .exists())
+    if filters.get("responsable_id") is not None:
+        criteria.append(Card.responsable_id == filters["responsable_id"])
+    if filters.get("tags"):
+        names = [name.lower() for name in filters["tags"]]
+        criteria.append(select(card_tag_association.c.card_id)
+                        .join(Tag, Tag.id == card_tag_association.c.tag_id)
+                        .where(card_tag_association.c.card_id == Card.id, func.lower(Tag.name).in_(names))
+                        .exists())
+    if filters.get("priorities"):
+        criteria.append(Card.priority.in_(filters["priorities"]))
+    if filters.get("due_from") is not None:
+        criteria.append(Card.due_date >= filters["due_from"])
+    if filters.get("due_to") is not None:
+        criteria.append(Card.due_date < filters["due_to"])
+    if filters.get("state"):
+        criteria.append(func.lower(Card.state) == filters["state"].lower())
+    return criteria
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """Lanza ValueError si el cursor no es válido."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as error:
+        raise ValueError("cursor inválido") from error
+    if not isinstance(values, list):
+        raise ValueError("cursor inválido")
+    return values
+
+
+def decode_sort_cursor(cursor: str, sort: str) -> tuple:
+    """[clave, id] con el tipo que corresponde a `sort`; ValueError si es de otro orden o está mal formado."""
+    values = decode_cursor(cursor)
+    if len(values) != 2:
+        raise ValueError("cursor inválido")
+    last_key, last_id = values
+    if not _is_id(last_id):
+        raise ValueError("cursor inválido")
+    if sort in DATETIME_SORTS:
+        if not isinstance(last_key, str):
+            raise ValueError("cursor inválido para este orden")
+        return _cursor_datetime(last_key), last_id
+    if sort in INTEGER_SORTS:
+        if not _is_id(last_key):
+            raise ValueError("cursor inválido para este orden")
+        return last_key, last_id
+    if not isinstance(last_key, str):
+        raise ValueError("cursor inválido para este orden")
+    return last_key, last_id
+
+
+def _is_id(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _cursor_datetime(value) -> datetime:
+    if not isinstance(value, str):
+        raise ValueError("cursor inválido")
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError as error:
+        raise ValueError("cursor inválido") from error
+
+
+def decode_comment_cursor(cursor: str) -> tuple:
+    """[created_at, id] de list_comment_threads; ValueError si está mal formado."""
+    values = decode_cursor(cursor)
+    if len(values) != 2 or not _is_id(values[1]):
+        raise ValueError("cursor inválido")
+    return _cursor_datetime(values[0]), values[1]
+
+
+def decode_work_cursor(cursor: str) -> tuple:
+    """[fecha límite, tipo, id] de list_assigned_work; ValueError si está mal formado."""
+    values = decode_cursor(cursor)
+    if len(values) != 3 or values[1] not in ("card", "subtask") or not _is_id(values[2]):
+        raise ValueError("cursor inválido")
+    return _cursor_datetime(values[0]), values[1], values[2]
+
+
+def list_board_cards(session: Session, board_id: int, *, compact: bool = False, normalized: bool = False,
+                     filters: dict | None = None, sort: str = "position", descending: bool = False,
+                     limit: int | None = None, cursor: str | None = None) -> tuple[list[dict], str | None]:
+    """
+    Tarjetas de un tablero filtradas y ordenadas en SQL, con paginación por keyset
+    (sort_key, id). Devuelve los items y el cursor de la página siguiente (o None).
+    """
+    sort_key = CARD_SORTS[sort]
+    stmt = (board_cards_statement(board_id, compact=compact, normalized=normalized)
+            .add_columns(sort_key.label("sort_key"))
+            .where(*card_filter_criteria(filters or {})))
+
+    if cursor:
+        last_key, last_id = decode_sort_cursor(cursor, sort)
+        position = tuple_(sort_key, Card.id)
+        stmt = stmt.where(position < tuple_(last_key, last_id) if descending else position > tuple_(last_key, last_id))
+
+    if descending:
+        stmt = stmt.order_by(sort_key.desc(), Card.id.desc())
+    else:
+        stmt = stmt.order_by(sort_key.asc(), Card.id.asc())
+    if limit:
+        stmt = stmt.limit(limit + 1)
+
+    rows = session.execute(stmt).all()
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1].sort_key, rows[-1].id])
+
+    if compact:
+        return [compact_card_row_to_dict(r) for r in rows], next_cursor
+    return [card_row_to_dict(r, normalized=normalized) for r in rows], next_cursor
+
+
+# RESPUESTAS NORMALIZADAS------------------------------------------------------------------------------------------
+def users_by_id(session: Session, user_ids) -> dict[int, dict]:
+    """Usuarios con la forma de User.serialize(), indexados por id, en una sola consulta."""
+    ids = sorted({int(uid) for uid in user_ids if uid is not None})
+    if not ids:
+        return {}
+    rows = session.execute(select(User.id, User.first_name, User.last_name, User.email)
+                           .where(User.id.in_(ids)))
+    return {r.id: {"id": r.id, "firstName": r.first_name, "lastName": r.last_name, "email": r.email}
+            for r in rows}
+
+
+def with_users_map(session: Session, items: list[dict], key: str) -> dict:
+    """
+    Respuesta normalizada: cada usuario se envía una sola vez en `users` y los items lo
+    referencian por id (`key` puede ser una lista de ids, p. ej. memberIds, o un id, p. ej. userId).
+    Así el tamaño deja de crecer con tarjetas x miembros.
+    """
+    ids = set()
+    for item in items:
+        value = item.get(key)
+        if isinstance(value, list):
+            ids.update(value)
+        elif value is not None:
+            ids.add(value)
+    return {"items": items, "users": users_by_id(session, ids)}
+
+
+# TABLEROS---------------------------------------------------------------------------------------------------------
+def _board_columns():
+    members = (select(func.json_agg(_user_json()))
+               .select_from(board_user_association.join(User, User.id == board_user_association.c.user_id))
+               .where(board_user_association.c.board_id == Board.id)
+               .scalar_subquery())
+    tags = (select(func.json_agg(func.json_build_object("id", Tag.id, "name", Tag.name)))
+            .select_from(board_tag_association.join(Tag, Tag.id == board_tag_association.c.tag_id))
+            .where(board_tag_association.c.board_id == Board.id)
+            .scalar_subquery())
+    return [
+        Board.id, Board.name, Board.description, Board.image, Board.creation_date,
+        Board.user_id, Board.is_public, Board.version,
+        members.label("members"),
+        tags.label("tags"),
+    ]
+
+
+def board_row_to_dict(r) -> dict:
+    # Misma forma que Board.serialize()
+    return {
+        "id": r.id,
+        "name": r.name,
+        "description": r.description,
+        "image": r.image,
+        "creationDate": r.creation_date,
+        "userId": r.user_id,
+        "members": r.members or [],
+        "tags": r.tags or [],
+        "isPublic": r.is_public,
+        "version": r.version,
+    }
+
+
+def list_member_boards(session: Session, user_id: int) -> list[dict]:
+    """Tableros de los que el usuario es miembro (equivale a user.boards)."""
+    stmt = (select(*_board_columns())
+            .join(board_user_association, and_(board_user_association.c.board_id == Board.id,
+                                               board_user_association.c.user_id == user_id))
+            .order_by(Board.id.asc()))
+    return [board_row_to_dict(r) for r in session.execute(stmt)]
+
+
+def list_favorite_boards(session: Session, user_id: int) -> list[dict]:
+    """Tableros favoritos del usuario (equivale a user.favorites)."""
+    stmt = (select(*_board_columns())
+            .join(favorite_boards, and_(favorite_boards.c.board_id == Board.id,
+                                        favorite_boards.c.user_id == user_id))
+            .order_by(Board.id.asc()))
+    return [board_row_to_dict(r) for r in session.execute(stmt)]
+
+
+# COMENTARIOS------------------------------------------------------------------------------------------------------
+def _card_comments_criteria(card_id: int, include_deleted: bool) -> list:
+    criteria = [Comment.card_id == card_id]
+    if not include_deleted:
+        criteria.append(Comment.deleted_at.is_(None))
+    return criteria
+
+
+def card_comments_statement(card_id: int, *, include_deleted: bool = False):
+    return (select(
+                Comment.id, Comment.card_id, Comment.user_id, Comment.parent_id, Comment.content,
+                Comment.is_edited, Comment.created_at, Comment.updated_at,
+                Comment.deleted_at, Comment.deleted_by, Comment.version,
+                User.first_name, User.last_name, User.email,
+            )
+            .select_from(Comment)
+            .outerjoin(User, User.id == Comment.user_id)
+            .where(*_card_comments_criteria(card_id, include_deleted)))
+
+
+def comment_row_to_dict(r, *, include_deleted_content: bool = False, normalized: bool = False) -> dict:
+    # Misma forma que Comment.serialize(); normalizado omite "user" (va en el mapa `users`)
+    is_deleted = r.deleted_at is not None
+    data = {
+        "id": r.id,
+        "cardId": r.card_id,
+        "userId": r.user_id,
+        "parentId": r.parent_id,
+        "content": (r.content if (not is_deleted or include_deleted_content) else None),
+        "placeholder": ("Comentario eliminado" if is_deleted else None),
+        "isEdited": r.is_edited,
+        "createdAt": r.created_at,
+        "updatedAt": r.updated_at,
+        "deleted": is_deleted,
+        "deletedAt": r.deleted_at,
+        "deletedBy": r.deleted_by,
+        "version": r.version,
+    }
+    if not normalized:
+        data["user"] = ({"id": r.user_id, "firstName": r.first_name, "lastName": r.last_name, "email": r.email}
+                        if r.email is not None else None)
+    return data
+
+
+def list_card_comments(session: Session, card_id: int, *, include_deleted: bool = False,
+                       limit: int = 100, offset: int = 0, normalized: bool = False) -> tuple[list[dict], int]:
+    """Página de comentarios de una tarjeta (orden cronológico) y el total."""
+    stmt = card_comments_statement(card_id, include_deleted=include_deleted)
+    total = session.execute(select(func.count(Comment.id))
+                            .where(*_card_comments_criteria(card_id, include_deleted))).scalar()
+    rows = session.execute(stmt.order_by(Comment.created_at.asc(), Comment.id.asc())
+                           .limit(limit).offset(offset))
+    items = [comment_row_to_dict(r, include_deleted_content=include_deleted, normalized=normalized)
+             for r in rows]
+    return items, total
+
+
+def list_comment_threads(session: Session, card_id: int, *, include_deleted: bool = False,
+                         limit: int = 50, cursor: str | None = None,
+                         normalized: bool = False) -> tuple[list[dict], list[dict], str | None]:
+    """
+    Modo árbol: una página de comentarios raíz (keyset sobre created_at, id) y todas sus
+    respuestas en una segunda consulta recursiva. Cada comentario lleva sus `replies`.
+    Los eliminados solo se muestran (como placeholder) si tienen respuestas visibles, salvo
+    con include_deleted. Devuelve las raíces, la lista plana de todos los nodos y el cursor.
+    """
+    child = aliased(Comment)
+    roots_stmt = card_comments_statement(card_id, include_deleted=True).where(Comment.parent_id.is_(None))
+    if not include_deleted:
+        roots_stmt = roots_stmt.where(or_(Comment.deleted_at.is_(None),
+                                          select(child.id).where(child.parent_id == Comment.id).exists()))
+    if cursor:
+        last_created, last_id = decode_comment_cursor(cursor)
+        roots_stmt = roots_stmt.where(tuple_(Comment.created_at, Comment.id) > tuple_(last_created, last_id))
+    roots = session.execute(roots_stmt.order_by(Comment.created_at.asc(), Comment.id.asc())
+                            .limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(roots) > limit:
+        roots = roots[:limit]
+        next_cursor = encode_cursor([roots[-1].created_at, roots[-1].id])
+    if not roots:
+        return [], [], next_cursor
+
+    thread = (select(Comment.id)
+              .where(Comment.parent_id.in_([r.id for r in roots]))
+              .cte("thread", recursive=True))
+    thread = thread.union_all(select(child.id).where(child.parent_id == thread.c.id))
+    replies = session.execute(card_comments_statement(card_id, include_deleted=True)
+                              .where(Comment.id.in_(select(thread.c.id)))
+                              .order_by(Comment.created_at.asc(), Comment.id.asc())).all()
+
+    nodes = {}
+    for r in [*roots, *replies]:
+        node = comment_row_to_dict(r, include_deleted_content=include_deleted, normalized=normalized)
+        node["replies"] = []
+        nodes[r.id] = node
+    for r in replies:
+        parent = nodes.get(r.parent_id)
+        if parent is not None:
+            parent["replies"].append(nodes[r.id])
+
+    def visible(node):
+        node["replies"] = [reply for reply in node["replies"] if visible(reply)]
+        return include_deleted or not node["deleted"] or bool(node["replies"])
+
+    tree = [nodes[r.id] for r in roots if visible(nodes[r.id])]
+    flat = []
+    stack = list(tree)
+    while stack:
+        node = stack.pop()
+        flat.append(node)
+        stack.extend(node["replies"])
+    return tree, flat, next_cursor
+
+
+# TABLERO COMPLETO-------------------------------------------------------------------------------------------------
+def board_access(session: Session, board_id: int, user_id: int) -> bool | None:
+    """None si el tablero no existe; True si es público o el usuario es dueño o miembro."""
+    is_member = (select(board_user_association.c.user_id)
+                 .where(board_user_association.c.board_id == Board.id,
+                        board_user_association.c.user_id == user_id)
+                 .exists())
+    row = session.execute(
+        select(Board.is_public, Board.user_id, is_member.label("is_member")).where(Board.id == board_id)
+    ).first()
+    if row is None:
+        return None
+    return bool(row.is_public or row.user_id == user_id or row.is_member)
+
+
+# Tablero -> listas -> tarjetas (con etiquetas y miembros) armado por PostgreSQL en una sola sentencia.
+# Las claves coinciden con Board.serialize(), List.serialize() y Card.serialize().
+BOARD_DOCUMENT_SQL = text("""
+WITH card_docs AS (
+    SELECT c.list_id, c.position, c.id,
+           json_build_object(
+               'id', c.id,
+               'title', c.title,
+               'description', c.description,
+               'priority', c.priority,
+               'responsableId', c.responsable_id,
+               'creationDate', c.creation_date,
+               'beginDate', c.begin_date,
+               'dueDate', c.due_date,
+               'state', c.state,
+               'boardId', c.board_id,
+               'listId', c.list_id,
+               'listName', l.name,
+               'tags', COALESCE((SELECT json_agg(t.name)
+                                 FROM card_tag_association ct JOIN tags t ON t.id = ct.tag_id
+                                 WHERE ct.card_id = c.id), '[]'::json),
+               'members', COALESCE((SELECT json_agg(json_build_object('id', u.id, 'firstName', u.first_name,
+                                                                      'lastName', u.last_name, 'email', u.email))
+                                    FROM card_user_association cu JOIN users u ON u.id = cu.user_id
+                                    WHERE cu.card_id = c.id), '[]'::json),
+               'commentCount', c.comment_count,
+               'version', c.version
+           ) AS doc
+    FROM cards c
+    LEFT JOIN lists l ON l.id = c.list_id
+    WHERE c.board_id = :board_id
+)
+SELECT json_build_object(
+    'id', b.id,
+    'name', b.name,
+    'description', b.description,
+    'image', b.image,
+    'creationDate', b.creation_date,
+    'userId', b.user_id,
+    'isPublic', b.is_public,
+    'version', b.version,
+    'members', COALESCE((SELECT json_agg(json_build_object('id', u.id, 'firstName', u.first_name,
+                                                           'lastName', u.last_name, 'email', u.email))
+                         FROM board_user_association bu JOIN users u ON u.id = bu.user_id
+                         WHERE bu.board_id = b.id), '[]'::json),
+    'tags', COALESCE((SELECT json_agg(json_build_object('id', t.id, 'name', t.name))
+                      FROM board_tag_association bt JOIN tags t ON t.id = bt.tag_id
+                      WHERE bt.board_id = b.id), '[]'::json),
+    'lists', COALESCE((SELECT json_agg(json_build_object(
+                                  'id', l.id,
+                                  'boardId', l.board_id,
+                                  'name', l.name,
+                                  'position', l.position,
+                                  'createdBy', l.created_by,
+                                  'createdAt', l.created_at,
+                                  'cards', COALESCE((SELECT json_agg(cd.doc ORDER BY cd.position, cd.id)
+                                                     FROM card_docs cd WHERE cd.list_id = l.id), '[]'::json)
+                              ) ORDER BY l.position, l.id)
+                       FROM lists l WHERE l.board_id = b.id), '[]'::json),
+    'unlistedCards', COALESCE((SELECT json_agg(cd.doc ORDER BY cd.position, cd.id)
+                               FROM card_docs cd WHERE cd.list_id IS NULL), '[]'::json)
+)::text
+FROM boards b
+WHERE b.id = :board_id
+""")
+
+
+def board_document_sql(session: Session, board_id: int) -> bytes | None:
+    """
+    JSON del tablero completo generado por PostgreSQL. Se castea a text para que psycopg2
+    no lo parsee: los bytes van directo a la respuesta sin decodificar ni re-codificar.
+    """
+    raw = session.execute(BOARD_DOCUMENT_SQL, {"board_id": board_id}).scalar()
+    return raw.encode("utf-8") if raw is not None else None
+
+
+def board_document_orm(board: Board) -> dict:
+    """Mismo documento armado con los serialize() de los modelos (camino ORM)."""
+    cards_by_list = {}
+    for card in sorted(board.cards, key=lambda c: (c.position or 0, c.id)):
+        cards_by_list.setdefault(card.list_id, []).append(card.serialize())
+
+    payload = board.serialize()
+    payload["lists"] = [
+        {**lst.serialize(), "cards": cards_by_list.get(lst.id, [])}
+        for lst in sorted(board.lists, key=lambda l: (l.position, l.id))
+    ]
+    payload["unlistedCards"] = cards_by_list.get(None, [])
+    return payload
+
+
+# MI TRABAJO (TARJETAS Y SUBTAREAS ASIGNADAS)-----------------------------------------------------------------------
+def subtasks_statement(*criteria):
+    # Misma forma que Subtask.serialize(), más el contexto de la tarjeta
+    responsible = (select(_user_json()).where(User.id == Subtask.responsible_id).scalar_subquery())
+    return (select(Subtask.id, Subtask.description, Subtask.limit_date, Subtask.card_id, Subtask.is_active,
+                   Subtask.version, responsible.label("responsible"), Card.title.label("card_title"), Card.board_id)
+            .join(Card, Card.id == Subtask.card_id)
+            .where(*criteria))
+
+
+def subtask_row_to_dict(r) -> dict:
+    return {
+        "id": r.id,
+        "description": r.description,
+        "limitDate": r.limit_date,
+        "responsible": r.responsible,
+        "cardId": r.card_id,
+        "isActive": r.is_active,
+        "version": r.version,
+        "cardTitle": r.card_title,
+        "boardId": r.board_id,
+    }
+
+
+def list_assigned_work(session: Session, user_id: int, *, limit: int = 50,
+                       cursor: str | None = None) -> tuple[list[dict], str | None]:
+    """
+    Tarjetas (responsable o miembro) y subtareas activas (responsable) del usuario en todos sus
+    tableros, ordenadas por fecha límite (sin fecha al final) con paginación por keyset.
+    Una consulta arma el orden sobre índices y otras dos hidratan solo la página.
+    """
+    boards = accessible_board_ids(user_id)
+    card_ids = (select(card_user_association.c.card_id).where(card_user_association.c.user_id == user_id)
+                .union(select(Card.id).where(Card.responsable_id == user_id)))
+
+    # Las expresiones coinciden con ix_cards_responsable_due e ix_subtasks_responsible_active_limit
+    due_card = func.coalesce(Card.due_date, FAR_FUTURE)
+    due_subtask = func.coalesce(Subtask.limit_date, FAR_FUTURE)
+    work = union_all(
+        select(due_card.label("due_key"), literal("card").label("kind"), Card.id.label("id"))
+        .where(Card.id.in_(card_ids), Card.board_id.in_(boards)),
+        select(due_subtask, literal("subtask"), Subtask.id)
+        .join(Card, Card.id == Subtask.card_id)
+        .where(Subtask.responsible_id == user_id, Subtask.is_active, Card.board_id.in_(boards)),
+    ).subquery("work")
+
+    stmt = select(work.c.due_key, work.c.kind, work.c.id)
+    if cursor:
+        last_due, last_kind, last_id = decode_work_cursor(cursor)
+        stmt = stmt.where(tuple_(work.c.due_key, work.c.kind, work.c.id) > tuple_(last_due, last_kind, last_id))
+    rows = session.execute(stmt.order_by(work.c.due_key, work.c.kind, work.c.id).limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1].due_key, rows[-1].kind, rows[-1].id])
+
+    wanted_cards = [r.id for r in rows if r.kind == "card"]
+    wanted_subtasks = [r.id for r in rows if r.kind == "subtask"]
+    cards = ({c.id: card_row_to_dict(c) for c in session.execute(cards_statement(Card.id.in_(wanted_cards)))}
+             if wanted_cards else {})
+    subtasks = ({t.id: subtask_row_to_dict(t) for t in session.execute(subtasks_statement(Subtask.id.in_(wanted_subtasks)))}
+                if wanted_subtasks else {})
+
+    items = []
+    for r in rows:
+        if r.kind == "card" and r.id in cards:
+            items.append({"kind": "card", "dueDate": cards[r.id]["dueDate"], "card": cards[r.id]})
+        elif r.kind == "subtask" and r.id in subtasks:
+            items.append({"kind": "subtask", "dueDate": subtasks[r.id]["limitDate"], "subtask": subtasks[r.id]})
+    return items, next_cursor
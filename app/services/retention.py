@@ -0,0 +1,109 @@
+"""
+Jobs de retención. Trabajan por lotes cortos (una transacción por lote, con lock_timeout)
+para no bloquear tablas grandes, hacen una pausa entre lotes y guardan el último id
+procesado en maintenance_checkpoints: si se interrumpen, la siguiente corrida sigue desde ahí.
+"""
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+COMMENTS_CHECKPOINT = "comments_archive"
+
+# Candidatos: eliminados antes del corte y sin respuestas (parent_id los referencia).
+# Las respuestas se archivan primero; sus padres quedan para una corrida posterior.
+SELECT_DELETED_COMMENTS_SQL = text("""
+    SELECT c.id FROM comments c
+    WHERE c.deleted_at IS NOT NULL AND c.id > :last_id AND c.deleted_at < :cutoff
+      AND NOT EXISTS (SELECT 1 FROM comments r WHERE r.parent_id = c.id)
+    ORDER BY c.id
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+""")
+
+MOVE_COMMENTS_SQL = text("""
+    WITH moved AS (
+        DELETE FROM comments WHERE id = ANY(:ids)
+        RETURNING id, card_id, user_id, parent_id, content, is_edited,
+                  created_at, updated_at, deleted_at, deleted_by
+    )
+    INSERT INTO comments_archive (id, card_id, user_id, parent_id, content, is_edited,
+                                  created_at, updated_at, deleted_at, deleted_by)
+    SELECT * FROM moved
+    ON CONFLICT (id) DO NOTHING
+""")
+
+SAVE_CHECKPOINT_SQL = text("""
+    INSERT INTO maintenance_checkpoints (name, last_id, updated_at) VALUES (:name, :last_id, now())
+    ON CONFLICT (name) DO UPDATE SET last_id = EXCLUDED.last_id, updated_at = EXCLUDED.updated_at
+""")
+
+
+def load_checkpoint(session: Session, name: str) -> int:
+    value = session.execute(text("SELECT last_id FROM maintenance_checkpoints WHERE name = :name"),
+                            {"name": name}).scalar()
+    return value or 0
+
+
+def save_checkpoint(session: Session, name: str, last_id: int):
+    session.execute(SAVE_CHECKPOINT_SQL, {"name": name, "last_id": last_id})
+
+
+def archive_deleted_comments(session: Session, *, older_than_days: int, batch_size: int = 500,
+                             pause: float = 0.5, max_batches: int | None = None,
+                             lock_timeout_ms: int = 2000, log=print) -> int:
+    """
+    Mueve a comments_archive los comentarios eliminados hace más de `older_than_days` días.
+    Devuelve la cantidad archivada. Al llegar al final reinicia el checkpoint, así la próxima
+    corrida vuelve a revisar los padres que antes tenían respuestas.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    last_id = load_checkpoint(session, COMMENTS_CHECKPOINT)
+    session.commit()
+
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        session.execute(text(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}"))
+        ids = list(session.execute(SELECT_DELETED_COMMENTS_SQL, {
+            "last_id": last_id, "cutoff": cutoff, "batch_size": batch_size,
+        }).scalars())
+
+        if not ids:
+            save_checkpoint(session, COMMENTS_CHECKPOINT, 0)
+            session.commit()
+            log(f"[retention] comments: fin del recorrido, {archived} archivados")
+            break
+
+        session.execute(MOVE_COMMENTS_SQL, {"ids": ids})
+        last_id = ids[-1]
+        save_checkpoint(session, COMMENTS_CHECKPOINT, last_id)
+        session.commit()
+
+        archived += len(ids)
+        batches += 1
+        log(f"[retention] comments: lote {batches}, {len(ids)} archivados (hasta id {last_id})")
+        if pause:
+            time.sleep(pause)
+
+    return archived
+
+
+def purge_expired_idempotency_keys(session: Session, *, batch_size: int = 5000, pause: float = 0.1,
+                                   log=print) -> int:
+    """Borra por lotes las claves de idempotencia vencidas."""
+    purged = 0
+    while True:
+        deleted = session.execute(text("""
+            DELETE FROM idempotency_keys WHERE ctid IN (
+                SELECT ctid FROM idempotency_keys WHERE expires_at < now() AT TIME ZONE 'utc' LIMIT :batch_size
+            )
+        """), {"batch_size": batch_size}).rowcount
+        session.commit()
+        purged += deleted
+        if deleted < batch_size:
+            break
+        log(f"[retention] idempotency_keys: {purged} borradas")
+        if pause:
+            time.sleep(pause)
+    return purged
@@ -0,0 +1,141 @@
+import threading
+import time
+from sqlalchemy import select, text, bindparam, func
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+from ..models import Tag, CacheVersion
+from ..config import TAG_CACHE_TTL, TAG_VERSION_CHECK_INTERVAL
+from .batch import parse_ids, existing_ids as existing_rows
+
+# Crea las etiquetas que faltan y devuelve id y nombre de todas las pedidas en un solo viaje.
+# El SELECT final no ve lo insertado en la misma sentencia, por eso se une con RETURNING.
+RESOLVE_TAGS_SQL = text("""
+    WITH wanted(name) AS (SELECT unnest(:names)),
+    created AS (
+        INSERT INTO tags (name)
+        SELECT w.name FROM wanted w
+        WHERE NOT EXISTS (SELECT 1 FROM tags t WHERE lower(t.name) = lower(w.name))
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id, name
+    )
+    SELECT id, name FROM created
+    UNION ALL
+    SELECT t.id, t.name FROM tags t WHERE lower(t.name) IN (SELECT lower(name) FROM wanted)
+""").bindparams(bindparam("names", type_=ARRAY(Tag.name.type)))
+
+
+def normalize_tag_name(name) -> str:
+    # Mismo criterio que create_tag: sin espacios repetidos ni en los extremos
+    return " ".join((name or "").split())
+
+
+class _TagDictionary:
+    """
+    Copia en memoria de la tabla de etiquetas (id → nombre y nombre en minúsculas → id).
+    Se recarga cuando cambia la versión local (invalidate() en este worker), cuando cambia la
+    versión compartida en cache_versions (la sube un trigger en cada escritura sobre tags, desde
+    cualquier worker; se consulta como mucho cada TAG_VERSION_CHECK_INTERVAL) o al vencer el TTL.
+    Un id o nombre que no está en la copia se busca en la base antes de darlo por inexistente.
+    """
+
+    def __init__(self, ttl: float, check_interval: float):
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.version = 0
+        self._loaded_version = -1
+        self._shared_version = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._by_id = {}
+        self._by_name = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+
+    def _ensure_loaded(self, session: Session):
+        now = time.monotonic()
+        with self._lock:
+            fresh = self._loaded_version == self.version and now - self._loaded_at < self.ttl
+            if fresh and now - self._checked_at < self.check_interval:
+                return
+            version = self.version
+            shared_loaded = self._shared_version
+        # Conexión propia: solo se cachean etiquetas ya confirmadas, nunca las de una transacción en curso.
+        # La versión se lee antes que las filas: si cambia en el medio, la próxima lectura vuelve a cargar.
+        with session.get_bind().connect() as conn:
+            shared = conn.execute(select(CacheVersion.version).where(CacheVersion.name == "tags")).scalar()
+            if fresh and shared == shared_loaded:
+                with self._lock:
+                    self._checked_at = now
+                return
+            rows = conn.execute(select(Tag.id, Tag.name)).all()
+        with self._lock:
+            self._by_id = {r.id: r.name for r in rows}
+            self._by_name = {r.name.lower(): r.id for r in rows}
+            self._loaded_version = version
+            self._shared_version = shared
+            self._loaded_at = self._checked_at = time.monotonic()
+
+    def all(self, session: Session) -> list[dict]:
+        self._ensure_loaded(session)
+        by_id = self._by_id
+        return [{"id": tid, "name": name} for tid, name in sorted(by_id.items(), key=lambda t: t[1].lower())]
+
+    def find(self, session: Session, name: str) -> dict | None:
+        self._ensure_loaded(session)
+        key = normalize_tag_name(name).lower()
+        by_id, by_name = self._by_id, self._by_name
+        tid = by_name.get(key)
+        if tid is not None:
+            return {"id": tid, "name": by_id[tid]}
+        # Puede haberse creado en otro worker después de la última recarga
+        row = session.execute(select(Tag.id, Tag.name).where(func.lower(Tag.name) == key)).first()
+        if row is None:
+            return None
+        self.invalidate()
+        return {"id": row.id, "name": row.name}
+
+    def existing_ids(self, session: Session, ids) -> list[int]:
+        """Ids de `ids` que existen, en el orden recibido y sin repetidos."""
+        self._ensure_loaded(session)
+        ids = parse_ids(ids)
+        by_id = self._by_id
+        missing = [tid for tid in ids if tid not in by_id]
+        found = set(existing_rows(session, Tag, missing)) if missing else set()
+        if found:
+            self.invalidate()
+        return [tid for tid in ids if tid in by_id or tid in found]
+
+    def ids_for_names(self, session: Session, names) -> tuple[list[int], bool]:
+        """
+        Ids de las etiquetas pedidas (sin distinguir mayúsculas), en el orden recibido y sin
+        repetidos. Las que no existen se crean dentro de la transacción de `session`; el segundo
+        valor indica si se creó alguna, para llamar a invalidate_tags() después del commit.
+        """
+        self._ensure_loaded(session)
+        ordered = []
+        for raw in names:
+            name = normalize_tag_name(raw)
+            if name and name.lower() not in (n.lower() for n in ordered):
+                ordered.append(name)
+
+        found = {n.lower(): self._by_name.get(n.lower()) for n in ordered}
+        missing = [n for n in ordered if found[n.lower()] is None]
+        if missing:
+            rows = session.execute(RESOLVE_TAGS_SQL, {"names": missing}).all()
+            for r in rows:
+                found[r.name.lower()] = r.id
+            # Quedan sin id solo si otra transacción creó la etiqueta con distinta capitalización
+            # y aún no confirmó; se omiten antes que fallar la actualización completa.
+        return [found[n.lower()] for n in ordered if found[n.lower()] is not None], bool(missing)
+
+
+tags = _TagDictionary(TAG_CACHE_TTL, TAG_VERSION_CHECK_INTERVAL)
+
+
+def invalidate_tags():
+    """Llamar después de crear o renombrar etiquetas."""
+    tags.invalidate()
+
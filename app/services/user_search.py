@@ -0,0 +1,187 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from sqlalchemy import select, func, case, or_, literal_column
+from sqlalchemy.orm import Session, aliased
+from ..models import User, USER_SEARCH_SQL, board_user_association, CacheVersion
+from ..config import TYPEAHEAD_CACHE_SIZE, TYPEAHEAD_CACHE_TTL
+
+# Misma expresión que el índice ix_users_search_trgm (ver USER_SEARCH_SQL)
+search_text = literal_column(USER_SEARCH_SQL)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def user_row_to_dict(r) -> dict:
+    # Forma histórica de /board/users/search (snake_case)
+    return {
+        "id": r.id,
+        "first_name": r.first_name,
+        "last_name": r.last_name,
+        "email": r.email,
+    }
+
+
+def search_users_global(session: Session, query: str, limit: int = 10) -> list[dict]:
+    """
+    Busca usuarios por nombre, apellido o email usando el índice de trigramas.
+    Primero los que empiezan con el texto buscado, luego por similitud.
+    """
+    q = query.strip().lower()
+    if not q:
+        return []
+
+    prefix = f"{_escape_like(q)}%"
+    is_prefix = or_(
+        func.lower(User.first_name).like(prefix, escape="\\"),
+        func.lower(User.last_name).like(prefix, escape="\\"),
+        func.lower(User.email).like(prefix, escape="\\"),
+    )
+    stmt = (select(User.id, User.first_name, User.last_name, User.email)
+            .where(search_text.like(f"%{_escape_like(q)}%", escape="\\"))
+            .order_by(case((is_prefix, 0), else_=1),
+                      func.similarity(search_text, q).desc(),
+                      User.id.asc())
+            .limit(limit))
+    return [user_row_to_dict(r) for r in session.execute(stmt)]
+
+
+# AUTOCOMPLETADO POR COLABORADORES---------------------------------------------------------------------------------
+class CollaboratorIndex:
+    """
+    Índice de prefijos de los colaboradores de un usuario (quienes comparten algún tablero con él).
+    Es un arreglo ordenado de (token, user_id): una búsqueda es un bisect más un recorrido corto.
+    """
+
+    __slots__ = ("tokens", "user_ids", "users", "boards", "built_at", "version")
+
+    def __init__(self, rows, version: int = 0):
+        self.version = version
+        self.users = {}
+        self.boards = {}
+        for r in rows:
+            self.users[r.id] = user_row_to_dict(r)
+            self.boards.setdefault(r.id, set()).add(r.board_id)
+
+        entries = sorted({(token, uid) for uid, user in self.users.items() for token in self._tokens(user)})
+        self.tokens = [token for token, _ in entries]
+        self.user_ids = [uid for _, uid in entries]
+        self.built_at = time.monotonic()
+
+    @staticmethod
+    def _tokens(user):
+        email = user["email"].lower()
+        full_name = f"{user['first_name']} {user['last_name']}".lower()
+        return {email, email.split("@", 1)[0], full_name, *full_name.split()}
+
+    def search(self, query: str, limit: int, board_id: int | None = None) -> list[dict]:
+        q = query.strip().lower()
+        matches = set()
+        i = bisect_left(self.tokens, q)
+        while i < len(self.tokens) and self.tokens[i].startswith(q):
+            matches.add(self.user_ids[i])
+            i += 1
+
+        # Primero los miembros del tablero en contexto, luego quienes comparten más tableros
+        def rank(uid):
+            shared = self.boards[uid]
+            return (0 if board_id in shared else 1, -len(shared), self.users[uid]["first_name"].lower(), uid)
+
+        return [self.users[uid] for uid in sorted(matches, key=rank)[:limit]]
+
+
+class _CollaboratorCache:
+    """
+    LRU por usuario con expiración. Cada worker tiene la suya: una entrada se descarta si cambió la
+    versión compartida del usuario en cache_versions ("collaborators:<id>"), que sube un trigger
+    sobre board_user_association desde cualquier worker, o al vencer el TTL.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int, version: int):
+        with self._lock:
+            index = self._entries.get(user_id)
+            if index is None:
+                return None
+            if index.version != version or time.monotonic() - index.built_at > self.ttl:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return index
+
+    def put(self, user_id: int, index: CollaboratorIndex):
+        with self._lock:
+            self._entries[user_id] = index
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_ids):
+        with self._lock:
+            for uid in user_ids:
+                self._entries.pop(int(uid), None)
+
+
+_collaborators = _CollaboratorCache(TYPEAHEAD_CACHE_SIZE, TYPEAHEAD_CACHE_TTL)
+
+
+def invalidate_collaborators(user_ids):
+    """
+    Llamar cuando cambian los miembros de un tablero, con todos los miembros afectados. Solo libera
+    la memoria de este worker: los demás se enteran por la versión compartida.
+    """
+    _collaborators.invalidate(user_ids)
+
+
+def collaborators_version_name(user_id: int) -> str:
+    return f"collaborators:{int(user_id)}"
+
+
+def get_collaborator_index(session: Session, user_id: int) -> CollaboratorIndex:
+    # Una lectura por clave primaria por búsqueda: un miembro quitado deja de sugerirse enseguida
+    version = session.execute(
+        select(CacheVersion.version).where(CacheVersion.name == collaborators_version_name(user_id))
+    ).scalar() or 0
+    index = _collaborators.get(user_id, version)
+    if index is not None:
+        return index
+
+    mine = aliased(board_user_association)
+    theirs = aliased(board_user_association)
+    stmt = (select(User.id, User.first_name, User.last_name, User.email, theirs.c.board_id)
+            .select_from(mine)
+            .join(theirs, theirs.c.board_id == mine.c.board_id)
+            .join(User, User.id == theirs.c.user_id)
+            .where(mine.c.user_id == user_id, theirs.c.user_id != user_id))
+    index = CollaboratorIndex(session.execute(stmt), version)
+    _collaborators.put(user_id, index)
+    return index
+
+
+def typeahead_users(session: Session, requester_id: int, query: str, limit: int = 10,
+                    board_id: int | None = None, include_global: bool = False) -> list[dict]:
+    """
+    Autocompletado de usuarios para el selector de miembros. Responde desde el índice en memoria
+    de colaboradores; la búsqueda global por trigramas solo corre si no hubo ninguna coincidencia
+    o si el cliente la pide explícitamente (include_global, p. ej. "ver más").
+    """
+    results = get_collaborator_index(session, requester_id).search(query, limit, board_id)
+    if (results and not include_global) or len(results) >= limit:
+        return results
+
+    seen = {u["id"] for u in results}
+    for user in search_users_global(session, query, limit=limit + len(seen)):
+        if user["id"] not in seen:
+            results.append(user)
+            seen.add(user["id"])
+            if len(results) >= limit:
+                break
+    return results
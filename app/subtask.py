@@ -1,7 +1,12 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask_cors import CORS, cross_origin
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from .models import db, Subtask, User, Card
+from .services.batch import parse_ids
+from .services.read_models import accessible_board_ids
+from .concurrency import check_version, stale_conflict, with_etag, StaleDataError
 from datetime import datetime
 
 subtask_bp = Blueprint("subtask", __name__)
@@ -44,10 +49,47 @@ def create_subtask():
 @jwt_required()
 def get_subtasks(card_id):
     # Filtrar solo subtareas activas de la tarjeta indicada
-    subtasks = Subtask.query.filter_by(card_id=card_id, is_active=True).all()
+    subtasks = (Subtask.query.options(joinedload(Subtask.responsible))
+                .filter_by(card_id=card_id, is_active=True).all())
     return jsonify([s.serialize() for s in subtasks]), 200
 
 
+# MOSTRAR SUBTAREAS DE VARIAS TARJETAS---------------------------------------------------------------------------
+@subtask_bp.route("/byCards", methods=["GET"])
+@jwt_required()
+def get_subtasks_by_cards():
+    """
+    Subtareas activas de varias tarjetas en una sola llamada: ?cardIds=1,2,3 (máx. 500).
+    Responde {"<cardId>": [subtareas]}; los responsables se cargan en la misma consulta. Las tarjetas
+    de tableros a los que el usuario no tiene acceso (o inexistentes) no aparecen en la respuesta.
+    """
+    try:
+        card_ids = parse_ids((request.args.get("cardIds") or "").split(","))
+        if not card_ids:
+            return jsonify({"error": "cardIds es obligatorio"}), 400
+        if len(card_ids) > 500:
+            return jsonify({"error": "Máximo 500 tarjetas por consulta"}), 400
+
+        # Solo tarjetas de tableros propios o de los que es miembro; las demás se omiten
+        user_id = int(get_jwt_identity())
+        card_ids = db.session.execute(
+            select(Card.id).where(Card.id.in_(card_ids), Card.board_id.in_(accessible_board_ids(user_id)))
+        ).scalars().all()
+
+        subtasks = (Subtask.query
+                    .options(joinedload(Subtask.responsible))
+                    .filter(Subtask.card_id.in_(card_ids), Subtask.is_active)
+                    .order_by(Subtask.card_id, Subtask.id)
+                    .all()) if card_ids else []
+
+        grouped = {str(card_id): [] for card_id in sorted(card_ids)}
+        for subtask in subtasks:
+            grouped[str(subtask.card_id)].append(subtask.serialize())
+        return jsonify(grouped), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 # MOSTRAR UNA SUBTAREA POR ID----------------------------------------------------------------------------------
 @subtask_bp.route("/getSubtask/<int:id>", methods=["GET"])
 @jwt_required()
@@ -55,7 +97,7 @@ def get_subtask(id):
     subtask = Subtask.query.get(id)
     if not subtask or not subtask.is_active:
         return jsonify({"error": "Subtask no encontrada"}), 404
-    return jsonify(subtask.serialize()), 200
+    return with_etag(jsonify(subtask.serialize()), subtask), 200
 
 
 # MODIFICAR UNA SUBTAREA----------------------------------------------------------------------------------------
@@ -68,14 +110,20 @@ def update_subtask(id):
             return jsonify({"error": "Subtask no encontrada"}), 404
 
         data = request.get_json()
+        conflict = check_version(subtask, Subtask.serialize, data)
+        if conflict:
+            return conflict
+
         subtask.description = data.get("description", subtask.description)
         subtask.limit_date = datetime.fromisoformat(data["limitDate"]) if data.get("limitDate") else subtask.limit_date
         subtask.responsible_id = data.get("responsibleId", subtask.responsible_id)
         subtask.card_id = data.get("cardId", subtask.card_id)
 
         db.session.commit()
-        return jsonify(subtask.serialize()), 200
+        return with_etag(jsonify(subtask.serialize()), subtask), 200
 
+    except StaleDataError:
+        return stale_conflict(db.session, Subtask, id, Subtask.serialize)
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
@@ -3,6 +3,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask_cors import CORS, cross_origin
 from sqlalchemy import func
 from .models import db, User, Tag
+from .services.tag_cache import tags as tag_dictionary, invalidate_tags
 
 tag_bp = Blueprint("tag", __name__)
 CORS(tag_bp)
@@ -29,11 +30,11 @@ def get_all_tags():
     user, err = _require_user()
     if err: return err
     try:
-        tags = Tag.query.order_by(Tag.name.asc()).all()
+        tags = tag_dictionary.all(db.session)
         return jsonify({
             "success": True,
             "total": len(tags),
-            "items": [{"id": t.id, "name": t.name} for t in tags]
+            "items": tags
         }), 200
     except Exception as error:
         return jsonify({"error": str(error)}), 500
@@ -48,13 +49,12 @@ def get_tag_by_name(name):
     user, err = _require_user()
     if err: return err
 
-    norm = name.strip()
-    tag = Tag.query.filter(func.lower(Tag.name) == norm.lower()).first()
+    tag = tag_dictionary.find(db.session, name)
 
     if not tag:
         return jsonify({"success": False, "message": "Etiqueta no encontrada"}), 404
 
-    return jsonify({"success": True, "tag": tag.serialize()}), 200
+    return jsonify({"success": True, "tag": tag}), 200
 
 # =========================
 # CREAR ETIQUETA 
@@ -79,6 +79,7 @@ def create_tag():
     try:
         db.session.add(new_tag)
         db.session.commit()
+        invalidate_tags()
         return jsonify({"success": True, "tag": new_tag.serialize(), "created": True}), 201
     except Exception as error:
         db.session.rollback()
@@ -115,6 +116,7 @@ def update_tag(tag_id):
     try:
         tag.name = tag_name
         db.session.commit()
+        invalidate_tags()
         return jsonify({"success": True, "tag": tag.serialize()}), 200
     except Exception as error:
         db.session.rollback()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark del tablero completo: camino ORM (serialize() + encoder) vs JSON armado por PostgreSQL.
+
+Requiere una base con datos (usa DATABASE_URL). Uso:
+    BENCH_BOARD_ID=1 python bench_board_payload.py
+"""
+
+import os
+import time
+from app.main import app
+from app.database import db
+from app.models import Board
+from app.services.read_models import board_document_sql, board_document_orm
+
+BOARD_ID = int(os.getenv("BENCH_BOARD_ID", "1"))
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "20"))
+
+def orm_path():
+    board = Board.query.get(BOARD_ID)
+    body = app.json.dumps(board_document_orm(board)).encode("utf-8")
+    db.session.expunge_all()  # sin caché de identidad entre rondas
+    return body
+
+def sql_path():
+    return board_document_sql(db.session, BOARD_ID)
+
+def measure(fn):
+    timings = []
+    size = 0
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        size = len(fn())
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2], size
+
+def main():
+    with app.app_context():
+        if not Board.query.get(BOARD_ID):
+            print(f"❌ El tablero {BOARD_ID} no existe")
+            return
+        db.session.expunge_all()
+
+        orm_time, orm_size = measure(orm_path)
+        sql_time, sql_size = measure(sql_path)
+
+        print(f"📋 Tablero {BOARD_ID} ({ROUNDS} rondas, mediana)")
+        print(f"   ORM + serialize():  {orm_time * 1000:8.1f} ms  ({orm_size} bytes)")
+        print(f"   json_agg en SQL:    {sql_time * 1000:8.1f} ms  ({sql_size} bytes)  (x{orm_time / sql_time:.1f})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de serialización JSON: encoder estándar de Flask vs FastJSONProvider (orjson).
+
+Construye tarjetas en memoria (sin base de datos) con etiquetas y miembros, igual que
+las que devuelve /card/getCards, y mide cuánto tarda cada proveedor en codificarlas.
+
+Uso: python bench_json.py
+"""
+
+import time
+from datetime import datetime, timedelta
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app.models import Card, Tag, User
+from app.json_provider import FastJSONProvider, orjson
+
+ROUNDS = 5
+
+def build_cards(count):
+    """Crea tarjetas transitorias con 3 etiquetas y 4 miembros cada una"""
+    tags = [Tag(id=i, name=f"tag-{i}") for i in range(10)]
+    users = [User(id=i, first_name=f"Nombre{i}", last_name=f"Apellido{i}", email=f"user{i}@example.com")
+             for i in range(20)]
+    now = datetime.utcnow()
+    cards = []
+    for i in range(count):
+        card = Card(
+            id=i,
+            title=f"Tarjeta {i}",
+            description="Descripción de prueba " * 3,
+            priority="Media",
+            responsable_id=i % 20,
+            creation_date=now,
+            begin_date=now,
+            due_date=now + timedelta(days=i % 30),
+            state="TO DO",
+            board_id=1,
+            list_id=None,
+        )
+        card.tags.extend(tags[j % 10] for j in range(i, i + 3))
+        card.members.extend(users[j % 20] for j in range(i, i + 4))
+        cards.append(card)
+    return cards
+
+def measure(provider, payload):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        provider.response(payload)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    app = Flask(__name__)
+    stdlib = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+    print(f"orjson disponible: {orjson is not None}")
+
+    with app.app_context():
+        for count in (1_000, 10_000):
+            cards = build_cards(count)
+
+            start = time.perf_counter()
+            payload = [card.serialize() for card in cards]
+            serialize_time = time.perf_counter() - start
+
+            stdlib_time = measure(stdlib, payload)
+            fast_time = measure(fast, payload)
+
+            print(f"\n📦 {count} tarjetas")
+            print(f"   serialize():        {serialize_time * 1000:8.1f} ms")
+            print(f"   json estándar:      {stdlib_time * 1000:8.1f} ms")
+            print(f"   FastJSONProvider:   {fast_time * 1000:8.1f} ms  (x{stdlib_time / fast_time:.1f})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark del buscador de miembros (/board/users/search) sobre una tabla de usuarios grande.
+
+Siembra BENCH_USERS usuarios sintéticos (emails @bench.invalid) si aún no existen y compara
+la consulta anterior (tres ILIKE '%q%') con la búsqueda por trigramas. Requiere la migración
+a3f1c92e7b10 aplicada. Uso:
+    BENCH_USERS=500000 python bench_user_search.py
+    python bench_user_search.py --cleanup     # borra los usuarios sintéticos
+"""
+
+import os
+import sys
+import time
+from sqlalchemy import text
+from app.main import app
+from app.database import db
+from app.models import User
+from app.services.user_search import search_users_global
+
+BENCH_USERS = int(os.getenv("BENCH_USERS", "500000"))
+QUERIES = ["ana", "gonz", "mart", "perez", "lopez@", "xq"]
+ROUNDS = 5
+
+FIRST_NAMES = ["Ana", "Juan", "María", "Carlos", "Lucía", "Pedro", "Sofía", "Martín", "Valentina", "Diego"]
+LAST_NAMES = ["González", "Pérez", "López", "Martínez", "Rodríguez", "Gómez", "Fernández", "Díaz", "Romero", "Sosa"]
+
+def seed():
+    existing = db.session.execute(text("SELECT count(*) FROM users WHERE email LIKE '%@bench.invalid'")).scalar()
+    if existing >= BENCH_USERS:
+        print(f"🌱 Ya existen {existing} usuarios sintéticos")
+        return
+    print(f"🌱 Sembrando {BENCH_USERS - existing} usuarios...")
+    db.session.execute(text("""
+        INSERT INTO users (first_name, last_name, email)
+        SELECT (:first_names)[1 + (n % 10)] || substr(md5(n::text), 1, 4),
+               (:last_names)[1 + ((n / 10) % 10)],
+               'bench-' || n || '-' || substr(md5(n::text), 1, 6) || '@bench.invalid'
+        FROM generate_series(:start, :stop) AS n
+    """), {"first_names": FIRST_NAMES, "last_names": LAST_NAMES, "start": existing + 1, "stop": BENCH_USERS})
+    db.session.commit()
+    db.session.execute(text("ANALYZE users"))
+    db.session.commit()
+
+def legacy_search(query):
+    return User.query.filter(
+        db.or_(
+            User.first_name.ilike(f"%{query}%"),
+            User.last_name.ilike(f"%{query}%"),
+            User.email.ilike(f"%{query}%")
+        )
+    ).limit(10).all()
+
+def measure(fn, query):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn(query)
+        best = min(best, time.perf_counter() - start)
+        db.session.expunge_all()
+    return best
+
+def main():
+    with app.app_context():
+        if "--cleanup" in sys.argv:
+            deleted = db.session.execute(text("DELETE FROM users WHERE email LIKE '%@bench.invalid'")).rowcount
+            db.session.commit()
+            print(f"🧹 {deleted} usuarios sintéticos eliminados")
+            return
+
+        seed()
+        print(f"\n{'consulta':<10} {'ILIKE x3':>12} {'trigramas':>12}")
+        for query in QUERIES:
+            legacy = measure(legacy_search, query)
+            trigram = measure(lambda q: search_users_global(db.session, q), query)
+            print(f"{query:<10} {legacy * 1000:10.1f}ms {trigram * 1000:10.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Configuración de Gunicorn para producción.
+
+Uso (gunicorn lee este archivo automáticamente desde la raíz del proyecto):
+    gunicorn app.main:app
+
+Todas las opciones se pueden ajustar por variables de entorno sin tocar el código.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+
+# La app pasa la mayor parte del tiempo esperando I/O (PostgreSQL, Pusher, Resend, S3),
+# por eso se usan workers con hilos. Regla clásica: (2 x núcleos) + 1 procesos.
+_cores = multiprocessing.cpu_count()
+workers = int(os.getenv("GUNICORN_WORKERS", str(2 * _cores + 1)))
+
+# Cada hilo puede tomar una conexión del pool (pool_size=5 + max_overflow=10 en database.py),
+# así que no conviene superar 15 hilos por worker.
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = "gthread" if threads > 1 else "sync"
+
+# Carga la app una sola vez en el proceso maestro y la comparte (copy-on-write) con los workers
+preload_app = True
+
+# Apagado ordenado: los workers terminan las peticiones en curso antes de salir
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Reciclar workers periódicamente evita que crezca la memoria por fugas lentas
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = os.getenv("GUNICORN_ERROR_LOG", "-")
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def post_fork(server, worker):
+    """
+    Con preload_app el pool de conexiones y los clientes externos se crearon en el maestro.
+    Compartir sockets entre procesos corrompe las conexiones, así que cada worker los reinicia.
+    """
+    from app.main import app
+    from app.database import dispose_engines
+    from app.services.pusher_client import reset_pusher_client
+    from app.board import reset_s3_client
+
+    dispose_engines(app)
+    reset_pusher_client()
+    reset_s3_client()
+    server.log.info(f"[gunicorn] worker {worker.pid} listo (threads={threads})")
+
+
+def on_starting(server):
+    # Con METRICS_DIR las métricas se agregan entre workers: cada arranque empieza de cero
+    from app.metrics import reset_metrics_dir
+
+    reset_metrics_dir()
+
+
+def worker_exit(server, worker):
+    # Cierra las conexiones del worker para no dejar sesiones abiertas en PostgreSQL
+    from app.main import app
+    from app.database import db
+    from app.metrics import flush_worker_metrics
+
+    flush_worker_metrics()  # último estado de sus métricas, antes de que child_exit lo acumule
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def child_exit(server, worker):
+    # En el maestro: los contadores del worker que terminó pasan a dead.json (ver app/metrics.py)
+    from app.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    server.log.info("[gunicorn] servidor detenido")
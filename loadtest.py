@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga simple para comparar el servidor de desarrollo con gunicorn.
+
+1. Levantar el servidor de desarrollo:   python -m app.main
+   y ejecutar:                           python loadtest.py
+2. Levantar gunicorn:                    gunicorn app.main:app
+   y ejecutar nuevamente:                python loadtest.py
+
+Variables opcionales: LOAD_TEST_PATH, LOAD_TEST_CONCURRENCY, LOAD_TEST_REQUESTS.
+"""
+
+import os
+import time
+import statistics
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+# Configuración
+API_BASE = os.getenv("API_BASE", "http://localhost:5000")
+TEST_USER_EMAIL = "test@example.com"
+TEST_USER_PASSWORD = "123456"
+PATH = os.getenv("LOAD_TEST_PATH", "/board/getMyBoards")
+CONCURRENCY = int(os.getenv("LOAD_TEST_CONCURRENCY", "32"))
+TOTAL_REQUESTS = int(os.getenv("LOAD_TEST_REQUESTS", "2000"))
+
+def login_user():
+    """Autentica un usuario y retorna el token JWT"""
+    response = requests.post(f"{API_BASE}/auth/login", json={
+        "email": TEST_USER_EMAIL,
+        "password": TEST_USER_PASSWORD
+    })
+
+    if response.status_code == 200:
+        return response.json().get("access_token")
+    print(f"Error en login: {response.status_code} - {response.text}")
+    return None
+
+def run_worker(token, count):
+    """Ejecuta `count` peticiones reutilizando la conexión y devuelve las latencias"""
+    session = requests.Session()
+    session.headers["Authorization"] = f"Bearer {token}"
+    latencies, errors = [], 0
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            response = session.get(f"{API_BASE}{PATH}", timeout=30)
+            if response.status_code >= 400:
+                errors += 1
+        except requests.RequestException:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+def main():
+    token = login_user()
+    if not token:
+        print("❌ No se pudo autenticar")
+        return
+
+    per_worker = max(1, TOTAL_REQUESTS // CONCURRENCY)
+    print(f"🚀 {per_worker * CONCURRENCY} peticiones a {PATH} con {CONCURRENCY} clientes concurrentes...")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        results = list(pool.map(lambda _: run_worker(token, per_worker), range(CONCURRENCY)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(l for worker_latencies, _ in results for l in worker_latencies)
+    errors = sum(e for _, e in results)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+
+    print(f"⏱️  Tiempo total: {elapsed:.2f}s")
+    print(f"📈 Throughput: {len(latencies) / elapsed:.1f} req/s")
+    print(f"📊 Latencia p50: {statistics.median(latencies) * 1000:.1f} ms | p95: {p95 * 1000:.1f} ms")
+    print(f"❌ Errores: {errors}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""comment retention: live index, archive and checkpoints
+
+Revision ID: 0a4c7e9d1b26
+Revises: f36d9b2c8e15
+Create Date: 2026-10-19 14:12:37.640218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a4c7e9d1b26'
+down_revision = 'f36d9b2c8e15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('comments_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('card_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('parent_id', sa.Integer(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('is_edited', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.Column('deleted_by', sa.Integer(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('comments_archive', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_comments_archive_card_id'), ['card_id'], unique=False)
+
+    op.create_table('maintenance_checkpoints',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('last_id', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.create_index('ix_comments_card_live_created', ['card_id', 'created_at', 'id'], unique=False, postgresql_where=sa.text('deleted_at IS NULL'))
+        batch_op.create_index('ix_comments_soft_deleted', ['id'], unique=False, postgresql_where=sa.text('deleted_at IS NOT NULL'))
+
+
+def downgrade():
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.drop_index('ix_comments_soft_deleted')
+        batch_op.drop_index('ix_comments_card_live_created')
+
+    op.drop_table('maintenance_checkpoints')
+
+    with op.batch_alter_table('comments_archive', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_comments_archive_card_id'))
+
+    op.drop_table('comments_archive')
@@ -0,0 +1,125 @@
+"""partition notifications by month
+
+Revision ID: 1b5e8d3f7c92
+Revises: 0a4c7e9d1b26
+Create Date: 2026-10-19 14:58:09.372615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '1b5e8d3f7c92'
+down_revision = '0a4c7e9d1b26'
+branch_labels = None
+depends_on = None
+
+COLUMNS = "id, user_id, type, title, message, resource_kind, resource_id, actor_id, read, created_at, event_id"
+
+
+def upgrade():
+    op.execute("ALTER TABLE notifications RENAME TO notifications_legacy")
+    op.execute("ALTER TABLE notifications_legacy RENAME CONSTRAINT notifications_pkey TO notifications_legacy_pkey")
+    op.execute("ALTER INDEX idx_notifications_user_read_created RENAME TO idx_notifications_legacy_user_read_created")
+
+    op.execute("""
+        CREATE TABLE notifications (
+            id UUID NOT NULL,
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            type VARCHAR(50) NOT NULL,
+            title VARCHAR(200) NOT NULL,
+            message VARCHAR(500) NOT NULL,
+            resource_kind VARCHAR(20),
+            resource_id INTEGER,
+            actor_id INTEGER REFERENCES users (id),
+            read BOOLEAN NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+            event_id VARCHAR(100),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE TABLE notifications_default PARTITION OF notifications DEFAULT")
+
+    # Una partición por mes desde la notificación más antigua hasta tres meses adelante
+    op.execute("""
+        DO $$
+        DECLARE
+            month_start date := date_trunc('month', COALESCE((SELECT min(created_at) FROM notifications_legacy), now()));
+            last_month date := date_trunc('month', now() + interval '3 months');
+        BEGIN
+            WHILE month_start <= last_month LOOP
+                EXECUTE format('CREATE TABLE %I PARTITION OF notifications FOR VALUES FROM (%L) TO (%L)',
+                               'notifications_y' || to_char(month_start, 'YYYY') || 'm' || to_char(month_start, 'MM'),
+                               month_start, (month_start + interval '1 month')::date);
+                month_start := (month_start + interval '1 month')::date;
+            END LOOP;
+        END $$;
+    """)
+
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.create_index('idx_notifications_user_read_created', ['user_id', 'read', 'created_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_notifications_event_id'), ['event_id'], unique=False)
+
+    op.execute(f"INSERT INTO notifications ({COLUMNS}) SELECT {COLUMNS} FROM notifications_legacy")
+    op.drop_table('notifications_legacy')
+
+    op.create_table('notifications_archive',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('message', sa.String(length=500), nullable=False),
+    sa.Column('resource_kind', sa.String(length=20), nullable=True),
+    sa.Column('resource_id', sa.Integer(), nullable=True),
+    sa.Column('actor_id', sa.Integer(), nullable=True),
+    sa.Column('read', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('event_id', sa.String(length=100), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('notifications_archive', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_notifications_archive_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notifications_archive', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_notifications_archive_user_id'))
+
+    op.drop_table('notifications_archive')
+
+    op.execute("ALTER TABLE notifications RENAME TO notifications_partitioned")
+    op.execute("ALTER TABLE notifications_partitioned RENAME CONSTRAINT notifications_pkey TO notifications_partitioned_pkey")
+    op.execute("ALTER INDEX idx_notifications_user_read_created RENAME TO idx_notifications_partitioned_user_read_created")
+    op.execute("ALTER INDEX ix_notifications_event_id RENAME TO ix_notifications_partitioned_event_id")
+
+    op.create_table('notifications',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('message', sa.String(length=500), nullable=False),
+    sa.Column('resource_kind', sa.String(length=20), nullable=True),
+    sa.Column('resource_id', sa.Integer(), nullable=True),
+    sa.Column('actor_id', sa.Integer(), nullable=True),
+    sa.Column('read', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('event_id', sa.String(length=100), nullable=True),
+    sa.ForeignKeyConstraint(['actor_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('event_id')
+    )
+    # Con la restricción única de nuevo, los event_id repetidos conservan solo el más reciente
+    op.execute(f"""
+        INSERT INTO notifications ({COLUMNS})
+        SELECT DISTINCT ON (COALESCE(event_id, id::text)) {COLUMNS}
+        FROM notifications_partitioned
+        ORDER BY COALESCE(event_id, id::text), created_at DESC
+    """)
+    op.drop_table('notifications_partitioned')
+
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.create_index('idx_notifications_user_read_created', ['user_id', 'read', 'created_at'], unique=False)
@@ -0,0 +1,41 @@
+"""notification grouping columns
+
+Revision ID: 2c9f4a6e0d38
+Revises: 1b5e8d3f7c92
+Create Date: 2026-10-19 15:36:44.902117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '2c9f4a6e0d38'
+down_revision = '1b5e8d3f7c92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('group_key', sa.String(length=150), nullable=True))
+        batch_op.add_column(sa.Column('group_count', sa.Integer(), server_default='1', nullable=False))
+        batch_op.add_column(sa.Column('group_actor_ids', postgresql.ARRAY(sa.Integer()), nullable=True))
+        batch_op.create_index('ix_notifications_user_group_unread', ['user_id', 'group_key', 'created_at'], unique=False, postgresql_where=sa.text('NOT read AND group_key IS NOT NULL'))
+
+    with op.batch_alter_table('notifications_archive', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('group_key', sa.String(length=150), nullable=True))
+        batch_op.add_column(sa.Column('group_count', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('notifications_archive', schema=None) as batch_op:
+        batch_op.drop_column('group_count')
+        batch_op.drop_column('group_key')
+
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.drop_index('ix_notifications_user_group_unread')
+        batch_op.drop_column('group_actor_ids')
+        batch_op.drop_column('group_count')
+        batch_op.drop_column('group_key')
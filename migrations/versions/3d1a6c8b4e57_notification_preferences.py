@@ -0,0 +1,40 @@
+"""notification preferences and board mutes
+
+Revision ID: 3d1a6c8b4e57
+Revises: 2c9f4a6e0d38
+Create Date: 2026-10-19 16:14:25.381930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d1a6c8b4e57'
+down_revision = '2c9f4a6e0d38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('notification_preferences',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('channel', sa.String(length=10), nullable=False),
+    sa.Column('enabled', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'type', 'channel')
+    )
+    op.create_table('notification_board_mutes',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('board_id', sa.Integer(), nullable=False),
+    sa.Column('muted_until', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['board_id'], ['boards.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'board_id')
+    )
+
+
+def downgrade():
+    op.drop_table('notification_board_mutes')
+    op.drop_table('notification_preferences')
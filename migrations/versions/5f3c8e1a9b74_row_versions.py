@@ -0,0 +1,29 @@
+"""row versions
+
+Revision ID: 5f3c8e1a9b74
+Revises: 4e7b2d9a5f61
+Create Date: 2026-10-19 17:12:40.508213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f3c8e1a9b74'
+down_revision = '4e7b2d9a5f61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # server_default evita reescribir la tabla: las filas existentes arrancan en versión 1
+    for table in ('boards', 'cards', 'subtasks', 'comments'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    for table in ('comments', 'subtasks', 'cards', 'boards'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('version')
@@ -0,0 +1,31 @@
+"""card sort indexes
+
+Revision ID: 6a2d9f4c1e83
+Revises: 5f3c8e1a9b74
+Create Date: 2026-10-19 18:05:12.640193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a2d9f4c1e83'
+down_revision = '5f3c8e1a9b74'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Un índice (board_id, clave, id) por cada orden de /card/getCards que no tenía uno
+    with op.batch_alter_table('cards', schema=None) as batch_op:
+        batch_op.create_index('ix_cards_board_priority_rank', ['board_id', sa.text("(CASE priority WHEN 'Alta' THEN 1 WHEN 'Media' THEN 2 WHEN 'Baja' THEN 3 ELSE 4 END)"), 'id'], unique=False)
+        batch_op.create_index('ix_cards_board_created', ['board_id', 'creation_date', 'id'], unique=False)
+        batch_op.create_index('ix_cards_board_title', ['board_id', 'title', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('cards', schema=None) as batch_op:
+        batch_op.drop_index('ix_cards_board_title')
+        batch_op.drop_index('ix_cards_board_created')
+        batch_op.drop_index('ix_cards_board_priority_rank')
@@ -0,0 +1,47 @@
+"""shared tag cache version
+
+Revision ID: 7b4e1c8d2f95
+Revises: 6a2d9f4c1e83
+Create Date: 2026-10-19 18:31:47.203518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b4e1c8d2f95'
+down_revision = '6a2d9f4c1e83'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cache_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.execute("INSERT INTO cache_versions (name, version) VALUES ('tags', 0)")
+
+    # Toda escritura sobre tags sube la versión en la misma transacción: los diccionarios en memoria
+    # de los demás workers lo detectan en la siguiente comprobación (ver services/tag_cache.py)
+    op.execute("""
+        CREATE FUNCTION bump_tags_cache_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE cache_versions SET version = version + 1 WHERE name = 'tags';
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER tags_cache_version
+        AFTER INSERT OR UPDATE OR DELETE ON tags
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_tags_cache_version()
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS tags_cache_version ON tags")
+    op.execute("DROP FUNCTION IF EXISTS bump_tags_cache_version()")
+    op.drop_table('cache_versions')
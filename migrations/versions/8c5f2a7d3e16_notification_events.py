@@ -0,0 +1,41 @@
+"""notification events
+
+Revision ID: 8c5f2a7d3e16
+Revises: 7b4e1c8d2f95
+Create Date: 2026-10-19 19:02:36.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c5f2a7d3e16'
+down_revision = '7b4e1c8d2f95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('notification_events',
+    sa.Column('event_id', sa.String(length=150), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('event_id')
+    )
+    with op.batch_alter_table('notification_events', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_notification_events_created_at'), ['created_at'], unique=False)
+
+    # Los eventos ya entregados cuentan como reclamados, así un reintento posterior no los duplica
+    op.execute("""
+        INSERT INTO notification_events (event_id, created_at)
+        SELECT event_id, min(created_at) FROM notifications
+        WHERE event_id IS NOT NULL
+        GROUP BY event_id
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('notification_events', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_notification_events_created_at'))
+
+    op.drop_table('notification_events')
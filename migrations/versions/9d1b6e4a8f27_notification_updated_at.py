@@ -0,0 +1,42 @@
+"""notification updated_at
+
+Revision ID: 9d1b6e4a8f27
+Revises: 8c5f2a7d3e16
+Create Date: 2026-10-19 19:24:08.371945
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d1b6e4a8f27'
+down_revision = '8c5f2a7d3e16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # created_at es la clave de partición y no se toca: la última actividad de una notificación
+    # agrupada pasa a updated_at
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    op.execute("UPDATE notifications SET updated_at = created_at")
+
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False,
+                              server_default=sa.text('now()'))
+        batch_op.drop_index('ix_notifications_user_group_unread')
+        batch_op.create_index('ix_notifications_user_group_unread', ['user_id', 'group_key', 'updated_at'], unique=False, postgresql_where=sa.text('NOT read AND group_key IS NOT NULL'))
+        batch_op.drop_index('idx_notifications_user_read_created')
+        batch_op.create_index('idx_notifications_user_read_updated', ['user_id', 'read', 'updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.drop_index('idx_notifications_user_read_updated')
+        batch_op.create_index('idx_notifications_user_read_created', ['user_id', 'read', 'created_at'], unique=False)
+        batch_op.drop_index('ix_notifications_user_group_unread')
+        batch_op.create_index('ix_notifications_user_group_unread', ['user_id', 'group_key', 'created_at'], unique=False, postgresql_where=sa.text('NOT read AND group_key IS NOT NULL'))
+        batch_op.drop_column('updated_at')
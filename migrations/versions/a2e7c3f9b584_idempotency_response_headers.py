@@ -0,0 +1,27 @@
+"""idempotency response headers
+
+Revision ID: a2e7c3f9b584
+Revises: 9d1b6e4a8f27
+Create Date: 2026-10-19 19:41:52.094316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2e7c3f9b584'
+down_revision = '9d1b6e4a8f27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('response_headers', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.drop_column('response_headers')
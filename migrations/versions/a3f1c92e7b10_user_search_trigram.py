@@ -0,0 +1,29 @@
+"""user search trigram index
+
+Revision ID: a3f1c92e7b10
+Revises: 329c39474120
+Create Date: 2026-10-19 10:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f1c92e7b10'
+down_revision = '329c39474120'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Debe coincidir exactamente con USER_SEARCH_SQL en app/models.py para que el planner use el índice
+    op.execute(
+        "CREATE INDEX ix_users_search_trgm ON users "
+        "USING gin ((lower(first_name || ' ' || last_name || ' ' || email)) gin_trgm_ops)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_users_search_trgm")
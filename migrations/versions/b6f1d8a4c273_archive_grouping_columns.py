@@ -0,0 +1,32 @@
+"""archive grouping columns
+
+Revision ID: b6f1d8a4c273
+Revises: a2e7c3f9b584
+Create Date: 2026-10-19 20:12:40.552871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6f1d8a4c273'
+down_revision = 'a2e7c3f9b584'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notifications_archive', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('group_actor_ids', postgresql.ARRAY(sa.Integer()), nullable=True))
+
+    # Lo ya archivado no tenía actividad posterior registrada
+    op.execute("UPDATE notifications_archive SET updated_at = created_at")
+
+
+def downgrade():
+    with op.batch_alter_table('notifications_archive', schema=None) as batch_op:
+        batch_op.drop_column('group_actor_ids')
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,59 @@
+"""full text search vectors for cards, comments and subtasks
+
+Revision ID: b7d24e5a9c31
+Revises: a3f1c92e7b10
+Create Date: 2026-10-19 11:03:17.552091
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d24e5a9c31'
+down_revision = 'a3f1c92e7b10'
+branch_labels = None
+depends_on = None
+
+
+def _vector(*weighted_columns):
+    # Misma expresión que _search_vector() en app/models.py
+    return " || ".join(
+        f"setweight(to_tsvector('spanish', coalesce({column}, '')), '{weight}')"
+        for column, weight in weighted_columns
+    )
+
+
+def upgrade():
+    with op.batch_alter_table('cards', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_vector', postgresql.TSVECTOR(),
+                                      sa.Computed(_vector(('title', 'A'), ('description', 'B')), persisted=True),
+                                      nullable=True))
+        batch_op.create_index('ix_cards_search_vector', ['search_vector'], unique=False, postgresql_using='gin')
+
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_vector', postgresql.TSVECTOR(),
+                                      sa.Computed(_vector(('content', 'A')), persisted=True),
+                                      nullable=True))
+        batch_op.create_index('ix_comments_search_vector', ['search_vector'], unique=False, postgresql_using='gin')
+
+    with op.batch_alter_table('subtasks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_vector', postgresql.TSVECTOR(),
+                                      sa.Computed(_vector(('description', 'A')), persisted=True),
+                                      nullable=True))
+        batch_op.create_index('ix_subtasks_search_vector', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    with op.batch_alter_table('subtasks', schema=None) as batch_op:
+        batch_op.drop_index('ix_subtasks_search_vector', postgresql_using='gin')
+        batch_op.drop_column('search_vector')
+
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.drop_index('ix_comments_search_vector', postgresql_using='gin')
+        batch_op.drop_column('search_vector')
+
+    with op.batch_alter_table('cards', schema=None) as batch_op:
+        batch_op.drop_index('ix_cards_search_vector', postgresql_using='gin')
+        batch_op.drop_column('search_vector')
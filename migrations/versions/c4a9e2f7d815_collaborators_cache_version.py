@@ -0,0 +1,54 @@
+"""collaborators cache version
+
+Revision ID: c4a9e2f7d815
+Revises: b6f1d8a4c273
+Create Date: 2026-10-19 20:47:15.730462
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a9e2f7d815'
+down_revision = 'b6f1d8a4c273'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Al agregar o quitar un miembro cambian los colaboradores de él y de todos los miembros del
+    # tablero: se sube la versión de cada uno (ver services/user_search.py). El ORDER BY fija el
+    # orden de los bloqueos para que dos cambios simultáneos no se traben entre sí.
+    op.execute("""
+        CREATE FUNCTION bump_collaborators_cache_version() RETURNS trigger AS $$
+        DECLARE
+            changed board_user_association%ROWTYPE;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                changed := OLD;
+            ELSE
+                changed := NEW;
+            END IF;
+            INSERT INTO cache_versions (name, version)
+            SELECT 'collaborators:' || affected.user_id, 1
+            FROM (SELECT changed.user_id
+                  UNION
+                  SELECT user_id FROM board_user_association WHERE board_id = changed.board_id) AS affected(user_id)
+            ORDER BY 1
+            ON CONFLICT (name) DO UPDATE SET version = cache_versions.version + 1;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER collaborators_cache_version
+        AFTER INSERT OR DELETE ON board_user_association
+        FOR EACH ROW EXECUTE FUNCTION bump_collaborators_cache_version()
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS collaborators_cache_version ON board_user_association")
+    op.execute("DROP FUNCTION IF EXISTS bump_collaborators_cache_version()")
+    op.execute("DELETE FROM cache_versions WHERE name LIKE 'collaborators:%'")
@@ -0,0 +1,44 @@
+"""card filter and sort indexes
+
+Revision ID: c5e8a1f3d402
+Revises: b7d24e5a9c31
+Create Date: 2026-10-19 11:47:05.917320
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e8a1f3d402'
+down_revision = 'b7d24e5a9c31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('cards', schema=None) as batch_op:
+        batch_op.create_index('ix_cards_board_position', ['board_id', sa.text('COALESCE(position, 0)'), 'id'], unique=False)
+        batch_op.create_index('ix_cards_board_due', ['board_id', sa.text("COALESCE(due_date, '9999-12-31'::timestamp)"), 'id'], unique=False)
+        batch_op.create_index('ix_cards_board_priority', ['board_id', 'priority'], unique=False)
+        batch_op.create_index('ix_cards_responsable_id', ['responsable_id'], unique=False)
+
+    with op.batch_alter_table('card_user_association', schema=None) as batch_op:
+        batch_op.create_index('ix_card_user_association_user_card', ['user_id', 'card_id'], unique=False)
+
+    with op.batch_alter_table('card_tag_association', schema=None) as batch_op:
+        batch_op.create_index('ix_card_tag_association_tag_card', ['tag_id', 'card_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('card_tag_association', schema=None) as batch_op:
+        batch_op.drop_index('ix_card_tag_association_tag_card')
+
+    with op.batch_alter_table('card_user_association', schema=None) as batch_op:
+        batch_op.drop_index('ix_card_user_association_user_card')
+
+    with op.batch_alter_table('cards', schema=None) as batch_op:
+        batch_op.drop_index('ix_cards_responsable_id')
+        batch_op.drop_index('ix_cards_board_priority')
+        batch_op.drop_index('ix_cards_board_due')
+        batch_op.drop_index('ix_cards_board_position')
@@ -0,0 +1,34 @@
+"""assigned work indexes
+
+Revision ID: d8b36f1e2a47
+Revises: c5e8a1f3d402
+Create Date: 2026-10-19 12:31:44.208153
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8b36f1e2a47'
+down_revision = 'c5e8a1f3d402'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('cards', schema=None) as batch_op:
+        batch_op.drop_index('ix_cards_responsable_id')
+        batch_op.create_index('ix_cards_responsable_due', ['responsable_id', sa.text("COALESCE(due_date, '9999-12-31'::timestamp)"), 'id'], unique=False)
+
+    with op.batch_alter_table('subtasks', schema=None) as batch_op:
+        batch_op.create_index('ix_subtasks_responsible_active_limit', ['responsible_id', sa.text("COALESCE(limit_date, '9999-12-31'::timestamp)"), 'id'], unique=False, postgresql_where=sa.text('is_active'))
+
+
+def downgrade():
+    with op.batch_alter_table('subtasks', schema=None) as batch_op:
+        batch_op.drop_index('ix_subtasks_responsible_active_limit')
+
+    with op.batch_alter_table('cards', schema=None) as batch_op:
+        batch_op.drop_index('ix_cards_responsable_due')
+        batch_op.create_index('ix_cards_responsable_id', ['responsable_id'], unique=False)
@@ -0,0 +1,26 @@
+"""subtask card active index
+
+Revision ID: e1a7c4b95f03
+Revises: d8b36f1e2a47
+Create Date: 2026-10-19 13:02:18.551902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1a7c4b95f03'
+down_revision = 'd8b36f1e2a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('subtasks', schema=None) as batch_op:
+        batch_op.create_index('ix_subtasks_card_active', ['card_id', 'limit_date'], unique=False, postgresql_where=sa.text('is_active'))
+
+
+def downgrade():
+    with op.batch_alter_table('subtasks', schema=None) as batch_op:
+        batch_op.drop_index('ix_subtasks_card_active')
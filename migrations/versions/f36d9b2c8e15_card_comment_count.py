@@ -0,0 +1,33 @@
+"""card comment count
+
+Revision ID: f36d9b2c8e15
+Revises: e1a7c4b95f03
+Create Date: 2026-10-19 13:40:52.117604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f36d9b2c8e15'
+down_revision = 'e1a7c4b95f03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('cards', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute("""
+        UPDATE cards SET comment_count = counts.total
+        FROM (SELECT card_id, count(*) AS total FROM comments
+              WHERE deleted_at IS NULL GROUP BY card_id) AS counts
+        WHERE cards.id = counts.card_id
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('cards', schema=None) as batch_op:
+        batch_op.drop_column('comment_count')
@@ -0,0 +1,66 @@
+import pytest
+
+from app.services import batch
+
+
+def test_parse_ids_keeps_order_and_drops_duplicates_and_garbage():
+    assert batch.parse_ids(["3", 1, "x", None, 3, "2", 1.0]) == [3, 1, 2]
+    assert batch.parse_ids(None) == []
+
+
+@pytest.fixture
+def pivot(monkeypatch):
+    """Tabla pivote en memoria detrás de las funciones que usa sync_associations."""
+    state = {"rows": set(), "calls": []}
+
+    def association_ids(session, table, owner_column, owner_id, other_column):
+        return set(state["rows"])
+
+    def remove_associations(session, table, owner_column, owner_id, other_column, other_ids):
+        other_ids = batch.parse_ids(other_ids)
+        state["calls"].append(("delete", other_ids))
+        removed = [oid for oid in other_ids if oid in state["rows"]]
+        state["rows"] -= set(removed)
+        return removed
+
+    def insert_associations(session, table, owner_column, owner_id, other_column, other_ids):
+        other_ids = batch.parse_ids(other_ids)
+        state["calls"].append(("insert", other_ids))
+        added = [oid for oid in other_ids if oid not in state["rows"]]
+        state["rows"] |= set(added)
+        return added
+
+    monkeypatch.setattr(batch, "association_ids", association_ids)
+    monkeypatch.setattr(batch, "remove_associations", remove_associations)
+    monkeypatch.setattr(batch, "insert_associations", insert_associations)
+    return state
+
+
+def sync(ids):
+    return batch.sync_associations(None, None, "card_id", 1, "tag_id", ids)
+
+
+def test_sync_touches_only_the_difference(pivot):
+    pivot["rows"] = {1, 2, 3}
+
+    added, removed = sync(["2", 3, 4, 4, "x"])
+
+    assert (added, removed) == ([4], [1])
+    assert pivot["rows"] == {2, 3, 4}
+    assert pivot["calls"] == [("delete", [1]), ("insert", [4])]
+
+
+def test_sync_without_changes_writes_nothing(pivot):
+    pivot["rows"] = {5, 6}
+
+    assert sync([6, 5]) == ([], [])
+    assert pivot["calls"] == [("delete", []), ("insert", [])]
+
+
+def test_sync_to_empty_removes_everything(pivot):
+    pivot["rows"] = {1, 2}
+
+    added, removed = sync([])
+
+    assert added == [] and sorted(removed) == [1, 2]
+    assert pivot["rows"] == set()
@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+from flask import Flask
+
+from app.concurrency import check_version, with_etag
+
+app = Flask(__name__)
+card = SimpleNamespace(id=7, version=3)
+
+
+def serialize(obj):
+    return {"id": obj.id, "version": obj.version}
+
+
+def test_stale_if_match_returns_409_with_current_state():
+    with app.test_request_context(method="PUT", headers={"If-Match": '"2"'}):
+        response = check_version(card, serialize, {})
+
+    assert response.status_code == 409
+    assert response.headers["ETag"] == '"3"'
+    body = response.get_json()
+    assert body["code"] == "VERSION_CONFLICT"
+    assert body["current"] == {"id": 7, "version": 3}
+
+
+def test_matching_if_match_or_body_version_is_accepted():
+    with app.test_request_context(method="PUT", headers={"If-Match": 'W/"3"'}):
+        assert check_version(card, serialize, {}) is None
+    with app.test_request_context(method="PUT"):
+        assert check_version(card, serialize, {"version": 3}) is None
+        assert check_version(card, serialize, {}) is None  # clientes sin versión
+
+
+def test_stale_body_version_returns_409_and_garbage_returns_400():
+    with app.test_request_context(method="PUT"):
+        assert check_version(card, serialize, {"version": 1}).status_code == 409
+    with app.test_request_context(method="PUT", headers={"If-Match": '"abc"'}):
+        _, status = check_version(card, serialize, {})
+    assert status == 400
+
+
+def test_with_etag_uses_current_version():
+    with app.test_request_context():
+        response = with_etag(app.response_class("{}"), card)
+    assert response.headers["ETag"] == '"3"'
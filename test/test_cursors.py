@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.read_models import (
+    encode_cursor, decode_cursor, decode_sort_cursor, decode_comment_cursor, decode_work_cursor,
+)
+
+WHEN = datetime(2026, 10, 19, 12, 30, 5, 123456)
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor([WHEN, "card", 42])
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == [WHEN.isoformat(), "card", 42]
+    assert decode_work_cursor(cursor) == (WHEN, "card", 42)
+    assert decode_comment_cursor(encode_cursor([WHEN, 9])) == (WHEN, 9)
+
+
+@pytest.mark.parametrize("sort, key", [("createdAt", WHEN), ("title", "Alpha"), ("priority", 2)])
+def test_sort_cursor_round_trip(sort, key):
+    last_key, last_id = decode_sort_cursor(encode_cursor([key, 5]), sort)
+    assert (last_key, last_id) == (key, 5)
+
+
+@pytest.mark.parametrize("cursor", ["not base64 !!", "e30", encode_cursor(["only-one"])])
+def test_decode_rejects_garbage(cursor):
+    with pytest.raises(ValueError):
+        decode_comment_cursor(cursor)
+
+
+@pytest.mark.parametrize("values", [
+    [1, 2],                 # fecha que no es texto
+    ["yesterday", 2],       # texto que no es fecha
+    [WHEN.isoformat(), "2"],
+    [WHEN.isoformat(), True],
+    [WHEN.isoformat(), 2, 3],
+])
+def test_comment_cursor_rejects_malformed_values(values):
+    with pytest.raises(ValueError):
+        decode_comment_cursor(encode_cursor(values))
+
+
+@pytest.mark.parametrize("values", [
+    [1, 2, 3],
+    [WHEN.isoformat(), "board", 3],
+    [WHEN.isoformat(), "card", "3"],
+    [WHEN.isoformat(), "card"],
+])
+def test_work_cursor_rejects_malformed_values(values):
+    with pytest.raises(ValueError):
+        decode_work_cursor(encode_cursor(values))
+
+
+def test_sort_cursor_from_another_sort_is_rejected():
+    with pytest.raises(ValueError):
+        decode_sort_cursor(encode_cursor(["Alpha", 5]), "priority")
+
+
+def test_sort_cursor_with_bad_date_is_rejected():
+    with pytest.raises(ValueError, match="cursor inválido"):
+        decode_sort_cursor(encode_cursor(["yesterday", 5]), "createdAt")
@@ -0,0 +1,137 @@
+import io
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask, jsonify, request
+
+from app import idempotency
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+
+class FakeKeyStore:
+    """idempotency_keys en memoria: interpreta las sentencias de app/idempotency.py."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def execute(self, statement, params):
+        key = (params["scope"], params["key"])
+        row = self.rows.get(key)
+        if statement is idempotency.CLAIM_SQL:
+            if row is None or row["expires_at"] < params["now"]:
+                self.rows[key] = {"fingerprint": params["fingerprint"], "status_code": None,
+                                  "response_body": None, "content_type": None, "response_headers": None,
+                                  "expires_at": params["expires_at"]}
+                return FakeResult([SimpleNamespace(key=params["key"])])
+            return FakeResult([])
+        if statement is idempotency.LOOKUP_SQL:
+            return FakeResult([SimpleNamespace(**row)] if row else [])
+        if statement is idempotency.COMPLETE_SQL:
+            row.update(status_code=params["status_code"], response_body=params["body"],
+                       content_type=params["content_type"], response_headers=params["headers"])
+        elif statement is idempotency.COMPLETE_UNKNOWN_SQL:
+            if row["status_code"] is None:
+                row["status_code"] = idempotency.COMPLETED_UNKNOWN
+        elif statement is idempotency.RELEASE_SQL:
+            if row is not None and row["status_code"] is None:
+                del self.rows[key]
+        return FakeResult([])
+
+
+@pytest.fixture
+def store(monkeypatch):
+    fake = FakeKeyStore()
+    monkeypatch.setattr(idempotency, "_execute", fake.execute)
+    return fake
+
+
+@pytest.fixture
+def client(store):
+    app = Flask(__name__)
+    idempotency.init_idempotency(app)
+    app.calls = 0
+
+    @app.route("/boards", methods=["POST"])
+    def create_board():
+        app.calls += 1
+        if request.args.get("fail"):
+            return jsonify({"error": "boom"}), 500
+        name = request.form.get("name") if request.form else (request.get_json() or {}).get("name")
+        response = jsonify({"id": app.calls, "name": name, "padding": request.args.get("pad", "")})
+        response.headers["ETag"] = f'"{app.calls}"'
+        response.headers["Location"] = f"/boards/{app.calls}"
+        return response, 201
+
+    test_client = app.test_client()
+    test_client.app = app
+    return test_client
+
+
+def test_retry_replays_original_response_and_headers(client):
+    first = client.post("/boards", json={"name": "A"}, headers={"Idempotency-Key": "k1"})
+    retry = client.post("/boards", json={"name": "A"}, headers={"Idempotency-Key": "k1"})
+
+    assert client.app.calls == 1
+    assert retry.status_code == 201
+    assert retry.get_json() == first.get_json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.headers["ETag"] == first.headers["ETag"]
+    assert retry.headers["Location"] == "/boards/1"
+
+
+def test_same_key_with_other_body_is_rejected(client):
+    client.post("/boards", json={"name": "A"}, headers={"Idempotency-Key": "k1"})
+    response = client.post("/boards", json={"name": "B"}, headers={"Idempotency-Key": "k1"})
+
+    assert response.status_code == 422
+    assert client.app.calls == 1
+
+
+def test_json_key_order_does_not_change_fingerprint(client):
+    client.post("/boards", data='{"name": "A", "color": 1}', content_type="application/json",
+                headers={"Idempotency-Key": "k1"})
+    retry = client.post("/boards", data='{"color": 1, "name": "A"}', content_type="application/json",
+                        headers={"Idempotency-Key": "k1"})
+
+    assert retry.status_code == 201
+    assert client.app.calls == 1
+
+
+def test_multipart_retry_with_new_boundary_is_replayed(client):
+    def post(boundary, content=b"png-bytes"):
+        return client.post("/boards", data={"name": "A", "image": (io.BytesIO(content), "a.png")},
+                           content_type=f"multipart/form-data; boundary={boundary}",
+                           headers={"Idempotency-Key": "k1"})
+
+    post("first-boundary")
+    retry = post("second-boundary")
+    other_file = post("third-boundary", content=b"other-bytes")
+
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert other_file.status_code == 422
+    assert client.app.calls == 1
+
+
+def test_server_error_releases_key_for_retry(client):
+    assert client.post("/boards?fail=1", json={}, headers={"Idempotency-Key": "k1"}).status_code == 500
+    assert client.post("/boards?fail=1", json={}, headers={"Idempotency-Key": "k1"}).status_code == 500
+    assert client.app.calls == 2
+
+
+def test_unstorable_response_is_never_executed_twice(client, monkeypatch):
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_MAX_BODY", 10)
+
+    first = client.post("/boards?pad=" + "x" * 50, json={"name": "A"}, headers={"Idempotency-Key": "k1"})
+    retry = client.post("/boards?pad=" + "x" * 50, json={"name": "A"}, headers={"Idempotency-Key": "k1"})
+
+    assert first.status_code == 201
+    assert retry.status_code == 409
+    assert client.app.calls == 1